@@ -0,0 +1,74 @@
+"""Adaptive inference resolution for a frame-time budget.
+
+This module contains the ResolutionController class, which moves the model
+input size along a fixed ladder so that the measured detection time per
+frame stays within a target budget on slow or busy machines.
+"""
+import collections
+import statistics
+import time
+
+DEFAULT_LADDER = (320, 416, 512, 640)
+
+
+class ResolutionController:
+    """Chooses the inference imgsz from measured frame times.
+
+    The median of the last window frame times is compared with target_ms: above
+    the target the size steps down, below up_ratio * target it steps up. The gap
+    between the two thresholds is the hysteresis; a larger input costs about the
+    square of the size ratio more, e.g. 1.56x from 512 to 640. After every step
+    the samples are cleared, so the next decision only sees the new size, and
+    on_change(old, new) is called if set. clock returns seconds and times measure().
+    """
+    def __init__(self, target_ms=100.0, ladder=DEFAULT_LADDER, window=10, up_ratio=0.6,
+                 on_change=None, clock=time.perf_counter):
+        if target_ms <= 0:
+            raise ValueError(f"target_ms must be positive, got {target_ms}")
+        if not ladder or list(ladder) != sorted(ladder):
+            raise ValueError(f"ladder must be a non-empty ascending sequence, got {ladder}")
+        if not 0 < up_ratio < 1:
+            raise ValueError(f"up_ratio must be in (0, 1), got {up_ratio}")
+        self.target_ms = target_ms
+        self.ladder = tuple(ladder)
+        self.window = window
+        self.up_ratio = up_ratio
+        self.on_change = on_change
+        self.clock = clock
+        self.level = len(self.ladder) - 1  # start at the largest size
+        self._samples = collections.deque(maxlen=window)
+
+    @property
+    def imgsz(self):
+        """Current inference input size in pixels."""
+        return self.ladder[self.level]
+
+    def record(self, frame_ms):
+        """Adds one measured frame time; returns the imgsz to use for the next frame."""
+        self._samples.append(frame_ms)
+        if len(self._samples) < self.window:
+            return self.imgsz
+        median = statistics.median(self._samples)
+        previous = self.imgsz
+        if median > self.target_ms and self.level > 0:
+            self.level -= 1
+        elif median < self.target_ms * self.up_ratio and self.level < len(self.ladder) - 1:
+            self.level += 1
+        else:
+            return previous
+        self._samples.clear()
+        if self.on_change is not None:
+            self.on_change(previous, self.imgsz)
+        return self.imgsz
+
+    def measure(self, detect, frame):
+        """Runs detect(frame, imgsz=...) at the current size, records its time and returns it."""
+        start = self.clock()
+        output = detect(frame, imgsz=self.imgsz)
+        self.record((self.clock() - start) * 1000.0)
+        return output
+
+    def reset(self):
+        """Starts over at the largest size without samples."""
+        self.level = len(self.ladder) - 1
+        self._samples.clear()
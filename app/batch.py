@@ -0,0 +1,213 @@
+"""Headless batch detection for folders of images.
+
+Walks a directory, spreads the images across a pool of worker processes
+(each loading WeedDetectorModel once) and writes the detections to a JSONL
+or CSV file, optionally together with annotated copies of the images.
+
+Usage:
+    python -m app.batch <dir> [--workers N] [--batch-size N] [--output FILE]
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import cv2
+import torch
+from app.capture import IMAGE_EXTENSIONS
+from app.log import configure_logging
+from app.model import BACKENDS, WeedDetectorModel
+
+logger = logging.getLogger(__name__)
+
+# Per-process state, set up once by _init_worker
+_worker_model = None
+_worker_annotated_dir = None
+
+
+def find_images(directory):
+    """Returns the paths of all images below directory, sorted."""
+    if not os.path.isdir(directory):
+        raise ValueError(f"Input directory does not exist: {os.path.abspath(directory)}")
+
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def detection_records(detections):
+    """Returns the detections as JSON-ready dicts with class, center and confidence."""
+    return [{"class": class_name, "x": x, "y": y, "confidence": round(conf, 4)}
+            for x, y, class_name, conf in detections]
+
+
+def _init_worker(conf, annotated_dir, threads, backend="pytorch", int8=False, tiling=None):
+    """Loads the model once per worker process."""
+    global _worker_model, _worker_annotated_dir  # pylint: disable=global-statement
+    configure_logging()
+    torch.set_num_threads(threads)
+    _worker_model = WeedDetectorModel(backend=backend, int8=int8)
+    _worker_model.model.conf = conf
+    if tiling:
+        _worker_model.configure_tiling(**tiling)
+    _worker_annotated_dir = annotated_dir
+
+
+def _process_chunk(chunk):
+    """Runs detection on a list of (path, relative_path) pairs in the current worker."""
+    records = []
+    loaded = []
+    for path, rel_path in chunk:
+        image = cv2.imread(path)
+        if image is None:
+            records.append({"image": rel_path, "detections": [],
+                            "error": "Failed to load image"})
+        else:
+            loaded.append((rel_path, image))
+
+    if not loaded:
+        return records
+
+    outputs = _worker_model.predict_batch([image for _, image in loaded],
+                                          batch_size=len(loaded),
+                                          render=bool(_worker_annotated_dir))
+    for (rel_path, _), (processed_image, detections) in zip(loaded, outputs):
+        records.append({
+            "image": rel_path,
+            "detections": detection_records(detections),
+            "error": None,
+        })
+        if _worker_annotated_dir:
+            out_path = os.path.join(_worker_annotated_dir, rel_path)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            cv2.imwrite(out_path, processed_image)
+    return records
+
+
+class _JsonlWriter:
+    """Writes one JSON record per image."""
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, record):
+        """Write a single image record."""
+        self.file.write(json.dumps(record) + "\n")
+
+
+class _CsvWriter:
+    """Writes one CSV row per detection, or one empty row for images without any."""
+    FIELDS = ["image", "class", "x", "y", "confidence", "error"]
+
+    def __init__(self, file):
+        self.writer = csv.DictWriter(file, fieldnames=self.FIELDS)
+        self.writer.writeheader()
+
+    def write(self, record):
+        """Write the rows for a single image record."""
+        if not record["detections"]:
+            self.writer.writerow({"image": record["image"], "error": record["error"] or ""})
+        for detection in record["detections"]:
+            self.writer.writerow({"image": record["image"], "error": "", **detection})
+
+
+def run_batch(input_dir, output_path, workers=1, batch_size=8, conf=0.15,
+              annotated_dir=None, output_format=None, backend="pytorch", int8=False,
+              tiling=None):
+    """Detects weeds in every image below input_dir and writes the results.
+
+    tiling holds the configure_tiling() arguments for large images, if any.
+    Returns the number of processed images.
+    """
+    paths = find_images(input_dir)
+    pairs = [(path, os.path.relpath(path, input_dir)) for path in paths]
+    chunks = [pairs[i:i + batch_size] for i in range(0, len(pairs), batch_size)]
+    if output_format is None:
+        output_format = "csv" if output_path.lower().endswith(".csv") else "jsonl"
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    logger.info("Processing %d image(s) from %s with %d worker(s)", len(paths), input_dir, workers)
+
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        writer = _CsvWriter(f) if output_format == "csv" else _JsonlWriter(f)
+        if workers == 1:
+            _init_worker(conf, annotated_dir, threads, backend, int8, tiling)
+            for records in map(_process_chunk, chunks):
+                for record in records:
+                    writer.write(record)
+        else:
+            if backend != "pytorch":
+                # Create the cached export once here instead of racing in every worker
+                WeedDetectorModel(backend=backend, int8=int8)
+            ctx = multiprocessing.get_context("spawn")
+            with ctx.Pool(workers, initializer=_init_worker,
+                          initargs=(conf, annotated_dir, threads, backend, int8,
+                                    tiling)) as pool:
+                for records in pool.imap(_process_chunk, chunks):
+                    for record in records:
+                        writer.write(record)
+
+    logger.info("Wrote detections for %d image(s) to %s", len(paths), output_path,
+                extra={"images": len(paths), "output": output_path})
+    return len(paths)
+
+
+def parse_args(argv=None):
+    """Parses the command line arguments of the batch command."""
+    parser = argparse.ArgumentParser(description="Detect weeds in a folder of images.")
+    parser.add_argument("input_dir", help="Directory that is searched for images")
+    parser.add_argument("-o", "--output", default="detections.jsonl",
+                        help="Output file (.jsonl or .csv)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                        help="Output format, derived from the output file name by default")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes")
+    parser.add_argument("-b", "--batch-size", type=int, default=8,
+                        help="Images per model call")
+    parser.add_argument("--conf", type=float, default=0.15, help="Confidence threshold")
+    parser.add_argument("--annotated-dir", default=None,
+                        help="Also write annotated images into this directory")
+    parser.add_argument("--backend", choices=BACKENDS, default="pytorch",
+                        help="Inference backend, onnx and openvino are faster on CPUs")
+    parser.add_argument("--int8", action="store_true",
+                        help="Use the INT8 quantized model (requires --backend openvino)")
+    parser.add_argument("--tile-size", type=int, default=None,
+                        help="Cut images larger than this into overlapping tiles")
+    parser.add_argument("--tile-overlap", type=float, default=0.2,
+                        help="Fraction of a tile shared with its neighbours")
+    parser.add_argument("--tile-batch", type=int, default=8, help="Tiles per model call")
+    parser.add_argument("--tile-merge", choices=["nms", "wbf"], default="nms",
+                        help="How duplicate boxes along tile seams are merged")
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.batch_size < 1:
+        parser.error("--workers and --batch-size must be at least 1")
+    if args.int8 and args.backend != "openvino":
+        parser.error("--int8 requires --backend openvino")
+    return args
+
+
+def main(argv=None):
+    """Entry point of the headless batch detection command."""
+    args = parse_args(argv)
+    configure_logging()
+    tiling = None
+    if args.tile_size:
+        tiling = {"tile_size": args.tile_size, "overlap": args.tile_overlap,
+                  "batch_size": args.tile_batch, "merge": args.tile_merge}
+    try:
+        run_batch(args.input_dir, args.output, workers=args.workers,
+                  batch_size=args.batch_size, conf=args.conf,
+                  annotated_dir=args.annotated_dir, output_format=args.format,
+                  backend=args.backend, int8=args.int8, tiling=tiling)
+    except (ValueError, OSError) as e:
+        logger.error("Batch detection failed: %s", e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Byte-bounded LRU cache for decoded images and detection results.
+
+This module contains the ByteLRUCache class, which evicts the least recently
+used entries once the total size of its values exceeds a byte budget, and
+helpers to build content-addressed cache keys.
+"""
+import collections
+import hashlib
+import os
+import threading
+import numpy as np
+
+
+def file_key(path):
+    """Returns a key for the file at path that changes when the file is modified."""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def content_hash(image):
+    """Returns a hex digest of the pixel data, shape and dtype of an image array."""
+    image = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.shape}{image.dtype}".encode())
+    digest.update(memoryview(image).cast("B"))
+    return digest.hexdigest()
+
+
+def size_of(value):
+    """Returns the number of bytes a value occupies, using its nbytes if it has one."""
+    nbytes = getattr(value, "nbytes", None)
+    return int(nbytes) if nbytes is not None else 0
+
+
+class ByteLRUCache:
+    """Least recently used cache bounded by the total bytes of its values.
+
+    Values larger than max_bytes are not stored. All methods are thread-safe.
+    """
+    def __init__(self, max_bytes):
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must not be negative, got {max_bytes}")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # key -> (value, nbytes)
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        """Total size of the cached values in bytes."""
+        return self._nbytes
+
+    def get(self, key, default=None):
+        """Returns the value for key and marks it as recently used, or default."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        """Stores value under key and evicts the oldest entries until it fits."""
+        nbytes = size_of(value) if nbytes is None else nbytes
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted
+
+    def clear(self):
+        """Removes all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
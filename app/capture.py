@@ -0,0 +1,194 @@
+"""Frame sources for the Weed Detector application.
+
+This module turns video files, image directories and glob patterns into a
+stream of frames and provides a prefetcher that decodes the next frames on
+a background thread while the current one is being processed. For live
+cameras, LatestFrameCapture grabs frames on its own thread and only keeps
+the newest one.
+"""
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+import cv2
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tiff")
+
+logger = logging.getLogger(__name__)
+
+
+def iter_frames(source):
+    """Yields (frame_index, frame) from a video file, an image directory or a glob pattern."""
+    if os.path.isdir(source):
+        paths = sorted(os.path.join(source, name) for name in os.listdir(source)
+                       if name.lower().endswith(IMAGE_EXTENSIONS))
+        yield from _iter_image_files(paths)
+    elif glob.has_magic(source):
+        yield from _iter_image_files(sorted(glob.glob(source)))
+    elif source.lower().endswith(IMAGE_EXTENSIONS):
+        yield from _iter_image_files([source])
+    else:
+        yield from _iter_video(source)
+
+
+def _iter_image_files(paths):
+    """Yields the decoded images of the given paths, skipping unreadable files."""
+    index = 0
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is None:
+            logger.warning("Skipping unreadable image: %s", path)
+            continue
+        yield index, frame
+        index += 1
+
+
+def _iter_video(path):
+    """Yields the frames of a video file one after another."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video source: {path}")
+    try:
+        index = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield index, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+class FramePrefetcher:
+    """Reads frames from an iterator on a background thread into a bounded queue.
+
+    At most max_prefetch decoded frames are held at any time, so long
+    recordings are processed at constant memory.
+    """
+    _END = object()
+
+    def __init__(self, frames, max_prefetch=2):
+        if max_prefetch < 1:
+            raise ValueError(f"max_prefetch must be at least 1, got {max_prefetch}")
+        self._frames = frames
+        self._queue = queue.Queue(maxsize=max_prefetch)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Decode frames until the source is exhausted or stop() is called."""
+        try:
+            for item in self._frames:
+                if not self._put(item):
+                    return
+            self._put(self._END)
+        except (OSError, RuntimeError, ValueError) as e:
+            self._put(e)
+        finally:
+            # Release the underlying video capture if we stopped early
+            if hasattr(self._frames, "close"):
+                self._frames.close()
+
+    def _put(self, item):
+        """Put an item into the queue, giving up when stop() was called."""
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is self._END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def stop(self):
+        """Stop the background thread and drop any prefetched frames."""
+        self._stop_event.set()
+        self._thread.join()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class LatestFrameCapture:
+    """Reads a cv2.VideoCapture on its own thread and keeps only the newest frame.
+
+    read() mirrors cv2.VideoCapture.read(), but it returns each frame at most once and
+    always the freshest one. Frames that were replaced before anyone read them are
+    counted in dropped_frames, so slow consumers never fall behind the real scene.
+    frame_time is the time.monotonic() at which the last returned frame was grabbed.
+    """
+    def __init__(self, cap):
+        self.cap = cap
+        self.frames_read = 0
+        self.dropped_frames = 0
+        self.frame_time = None
+        self._condition = threading.Condition()
+        self._frame = None
+        self._grabbed_at = None
+        self._fresh = False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Grab frames as fast as the device delivers them."""
+        while self._running:
+            try:
+                ret, frame = self.cap.read()
+            except (ValueError, TypeError, cv2.error):  # pylint: disable=catching-non-exception
+                ret, frame = False, None
+            with self._condition:
+                if not ret:
+                    self._running = False
+                    self._condition.notify_all()
+                    return
+                if self._fresh:
+                    self.dropped_frames += 1
+                self._frame = frame
+                self._grabbed_at = time.monotonic()
+                self._fresh = True
+                self.frames_read += 1
+                self._condition.notify_all()
+
+    def read(self, timeout=None):
+        """Return (True, frame) for the newest unread frame, or (False, None) at the end.
+
+        Waits for a new frame if the latest one has already been returned.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._fresh or not self._running, timeout)
+            if not self._fresh:
+                return False, None
+            self._fresh = False
+            self.frame_time = self._grabbed_at
+            return True, self._frame
+
+    def isOpened(self):  # pylint: disable=invalid-name
+        """Mirror cv2.VideoCapture.isOpened()."""
+        return self._running and self.cap.isOpened()
+
+    def release(self):
+        """Stop the capture thread and release the device. Safe to call more than once."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread.is_alive() and threading.current_thread() != self._thread:
+            self._thread.join()
+        self.cap.release()
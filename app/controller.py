@@ -4,11 +4,19 @@ This module contains the WeedDetectorController class that coordinates
 interactions between the model, GUI, and robot components.
 """
 
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from app.adaptive import ResolutionController
 from app.model import WeedDetectorModel
-from app.gui import WeedDetectorGUI
+from app.gui import MIN_CONFIDENCE, WeedDetectorGUI
+from app.motion import MotionGate
+from app.multicam import MultiCameraScheduler, tile_frames
+from app.shm import PIPELINE_DEPTH, RESULT_TIMEOUT, InferenceProcess
 from app.robot import Robot
 
+logger = logging.getLogger(__name__)
+
 
 class WeedDetectorController:
     """Controller class that manages interactions between model, GUI, and robot.
@@ -20,9 +28,31 @@ class WeedDetectorController:
         self.model = model
         self.gui = gui
         self.robot = Robot(gui, model)
+        # Live frames use the model's input size until configure_frame_budget() is called
+        self.resolution = None
+        # Live frames are detected in this process unless configure_inference_process() is called
+        self.inference = None
+        # Several cameras share the model through one scheduler while they run
+        self.cameras = None
+        self._camera_frames = []
+
+        # Last still image and its detections at MIN_CONFIDENCE, re-filtered on slider changes
+        self._still_image = None
+        self._raw_detections = None
+        # Still images are detected on a worker thread so the Tk event loop keeps running.
+        # Every request gets a new generation; results of older generations are dropped.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="detect")
+        self._generation = 0
+        self._pending = None
+        # Live frames that barely changed reuse the detections of the last inferred frame
+        self.motion_gate = MotionGate()
+        self._live_detections = None
+        self._live_conf = None
 
         # Pass model reference to GUI for confidence updates
         self.gui.model = model
+        # Share the latency statistics so the GUI can add capture and display timings
+        self.gui.stats = model.stats
 
         model_name = os.path.basename(model.model_path)
         gui.model_info_var.set(f"Model: {model_name}")
@@ -33,10 +63,14 @@ class WeedDetectorController:
         self.gui.on_start_robot = self.handle_start_robot
         self.gui.on_stop_robot = self.handle_stop_robot
         self.gui.on_camera_frame = self.handle_camera_frame
+        self.gui.on_conf_change = self.handle_conf_change
+        self.gui.on_start_cameras = self.handle_start_cameras
+        self.gui.on_stop_cameras = self.handle_stop_cameras
 
         # Optional: Model information display
         if hasattr(self.gui, "model_info_var"):
-            self.gui.model_info_var.set(f"Model: {self.model.model_path}")
+            self.gui.model_info_var.set(f"Model: {self.model.model_path} "
+                                        f"({self.model.backend}, {self.model.precision})")
 
     def handle_select_image(self, file_path):
         """ will be called when the user selects an image file."""
@@ -44,40 +78,191 @@ class WeedDetectorController:
             image = self.model.load_image(file_path)
             self.gui.display_image(image)
             # Start detection process after image is loaded
-            self.handle_detect(file_path)
+            self.handle_detect(file_path, image)
         except (ValueError, FileNotFoundError, OSError) as e:
+            logger.warning("Failed to load image %s: %s", file_path, e)
             self.gui.show_error_box(f"Fehler beim Laden des Bildes: {e}")
 
-    def handle_detect(self, file_path):
-        """ will be called when the user clicks the detect button."""
+    def handle_detect(self, file_path, image=None):
+        """ will be called when the user clicks the detect button.
+
+        The detection runs in the background and supersedes any request that has not
+        finished yet. The model runs once at the slider's minimum confidence; the raw
+        detections are kept so that later slider changes only filter and redraw them.
+        """
+        try:
+            if image is None:
+                image = self.model.load_image(file_path)
+        except (ValueError, FileNotFoundError, OSError) as e:
+            logger.warning("Detection failed for %s: %s", file_path, e)
+            self.gui.show_error_box(f"Fehler bei der Erkennung: {e}")
+            return
+
+        self._generation += 1
+        if self._pending is not None:
+            self._pending.cancel()
+        # Slider changes are ignored until the new image has its detections
+        self._raw_detections = None
+        self.gui.set_busy(True)
+        self._pending = self._executor.submit(self._run_detection, self._generation,
+                                              file_path, image)
+
+    def _run_detection(self, generation, file_path, image):
+        """Detects on the worker thread and posts the result back to the Tk thread."""
+        if generation != self._generation:
+            return  # superseded while waiting in the queue
         try:
-            # Update model confidence from GUI slider
-            confidence = self.gui.conf_var.get()
+            # Detect at the slider minimum so slider changes only need to filter
+            result = self.model.detect(image, use_cache=True, conf=MIN_CONFIDENCE)
+        except (ValueError, OSError, RuntimeError) as e:
+            result = e
+        self.gui.call_soon(self._finish_detection, generation, file_path, image, result)
+
+    def _finish_detection(self, generation, file_path, image, result):
+        """Shows the result of a background detection unless a newer one was requested."""
+        if generation != self._generation:
+            logger.debug("Dropping superseded detection of %s", file_path)
+            return
+        self.gui.set_busy(False)
+        if isinstance(result, Exception):
+            logger.warning("Detection failed for %s: %s", file_path, result)
+            self.gui.show_error_box(f"Fehler bei der Erkennung: {result}")
+            return
+        self._still_image = image
+        self._raw_detections = result
+        self.show_detections(self.gui.conf_var.get())
+
+    def handle_conf_change(self, confidence):
+        """ will be called when the user moves the confidence slider."""
+        if self.cameras is not None:
+            # The camera scheduler does not read the slider itself; it applies from the next batch
             self.model.model.conf = confidence
+            return
+        if self._raw_detections is None or self.gui.camera_running:
+            return
+        self.show_detections(confidence)
 
-            image = self.model.load_image(file_path)
-            # Perform detection using the model
-            processed_image, result = self.model.detect_weeds(image)
-            # Display the processed image and results in the GUI
-            if processed_image is None:
-                raise ValueError("Processed image is None, detection failed.")
-            self.gui.display_image(processed_image)
-            self.gui.update_results(f"Detection with confidence {confidence}: {result}")
-        except (ValueError, FileNotFoundError, OSError, RuntimeError) as e:
-            self.gui.show_error_box(f"Fehler bei der Erkennung: {e}")
+    def show_detections(self, confidence):
+        """Displays the last still image with the detections above the given confidence."""
+        detections = self._raw_detections.filter(confidence)
+        self.model.detected_centers = detections
+        processed_image = self.model.render_overlay(self._still_image, detections, confidence)
+        self.gui.display_image(processed_image)
+        result = self.model.format_detections(detections)
+        self.gui.update_results(f"Detection with confidence {confidence}: {result}")
 
     def handle_camera_frame(self, frame, conf):
-        """ will be called when a new camera frame is available."""
+        """ will be called when a new camera frame is available.
+
+        If the scene did not change since the last inferred frame and the confidence is
+        the same, its detections are drawn onto the new frame without inference. With a
+        frame-time budget, the input size follows the measured inference times.
+        """
+        changed = self.motion_gate.changed(frame)
+        if not changed and conf == self._live_conf and self._live_detections is not None:
+            self.model.stats.increment("skipped_inference")
+            return self.model.render_overlay(frame, self._live_detections), self._live_detections
+
+        self._live_detections = None
+        if self.inference is not None:
+            processed_frame, self._live_detections = self._infer_in_process(frame, conf)
+            self._live_conf = conf
+            return processed_frame, self._live_detections or []
         self.model.model.conf = conf
-        self.model.detected_centers = []
-        processed_frame = self.model.predict(frame)
-        return processed_frame, getattr(self.model, "detected_centers", [])
+        # The frame's own Detections; model.detected_centers is shared with the robot
+        if self.resolution is None:
+            detections = self.model.detect(frame)
+        else:
+            detections = self.resolution.measure(self.model.detect, frame)
+        self._live_conf = conf
+        self._live_detections = detections
+        return self.model.render_overlay(frame, detections), detections
+
+    def _infer_in_process(self, frame, conf):
+        """Hands a frame to the inference process and returns an earlier frame's result.
+
+        Up to PIPELINE_DEPTH frames are in flight, so capturing and showing the next frame
+        overlaps with inference. Returns (annotated frame, detections), or the unchanged
+        frame and None while the pipeline is filling up.
+        """
+        imgsz = self.resolution.imgsz if self.resolution is not None else None
+        self.inference.submit(frame, conf, imgsz)
+        result = self.inference.result(
+            timeout=RESULT_TIMEOUT if self.inference.pending >= PIPELINE_DEPTH else 0)
+        if result is None:
+            return frame, None
+        earlier_frame, detections, inference_ms = result
+        if self.resolution is not None:
+            self.resolution.record(inference_ms)
+        return self.model.render_overlay(earlier_frame, detections), detections
+
+    def configure_inference_process(self, slots=4):
+        """Detect live camera frames in a separate process fed through shared memory.
+
+        The process loads the same weights, backend and tiling as this model.
+        """
+        tiling = None
+        if self.model.tile_size:
+            tiling = {"tile_size": self.model.tile_size, "overlap": self.model.tile_overlap,
+                      "batch_size": self.model.tile_batch_size, "merge": self.model.tile_merge}
+        self.inference = InferenceProcess(
+            slots=slots, tiling=tiling,
+            model_args={"model_path": self.model.model_path, "backend": self.model.backend,
+                        "int8": self.model.precision == "int8"})
+        self.inference.start()
+
+    def configure_frame_budget(self, target_ms):
+        """Adapt the input size of live camera and robot frames to target_ms per frame."""
+        self.resolution = ResolutionController(target_ms, on_change=self.handle_input_size_change)
+        self.robot.resolution = self.resolution
+        self.gui.show_input_size(self.resolution.imgsz)
+
+    def handle_input_size_change(self, previous, imgsz):
+        """ will be called when the frame-time budget changes the live input size."""
+        logger.info("Input size %d -> %d px for the %.0f ms frame budget", previous, imgsz,
+                    self.resolution.target_ms)
+        self.gui.show_input_size(imgsz)
+
+    def handle_start_cameras(self, sources):
+        """ will be called when the camera is started with several sources.
+
+        Returns False if a camera could not be opened.
+        """
+        try:
+            self.cameras = MultiCameraScheduler.open(self.model, sources,
+                                                     on_results=self.handle_camera_batch)
+        except ValueError as e:
+            logger.error("Failed to open cameras: %s", e)
+            self.gui.show_error_box(f"Fehler beim Öffnen der Kameras: {e}")
+            return False
+        self.model.model.conf = self.gui.conf_var.get()
+        self._camera_frames = [None] * len(sources)
+        self.cameras.start()
+        return True
+
+    def handle_camera_batch(self, results):
+        """ will be called on the scheduler thread with the detections of a camera batch.
+
+        Shows the newest annotated frame of every camera in one mosaic together with
+        the frame rate and lag per camera.
+        """
+        for index, frame, detections in results:
+            self._camera_frames[index] = self.model.render_overlay(frame, detections)
+        self.gui.display_frame(tile_frames(self._camera_frames))
+        self.gui.update_live_results(self.cameras.format_stats())
+
+    def handle_stop_cameras(self):
+        """ will be called when the cameras started by handle_start_cameras are stopped."""
+        if self.cameras is not None:
+            self.cameras.stop()
+            self.cameras = None
 
     def handle_start_robot(self):
         """ will be called when the user clicks the start robot button."""
         try:
             self.robot.start_robot()
         except (RuntimeError, OSError) as e:
+            logger.error("Failed to start robot: %s", e)
             self.gui.show_error_box(f"Fehler beim Starten des Roboters: {e}")
 
     def handle_stop_robot(self):
@@ -85,8 +270,14 @@ class WeedDetectorController:
         try:
             self.robot.stop_robot()
         except (RuntimeError, OSError) as e:
+            logger.error("Failed to stop robot: %s", e)
             self.gui.show_error_box(f"Fehler beim Stoppen des Roboters: {e}")
 
     def run(self):
         """Start GUI event loop."""
-        self.gui.run()
+        try:
+            self.gui.run()
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            if self.inference is not None:
+                self.inference.stop()
@@ -0,0 +1,75 @@
+"""Array-backed container for the detections of one image.
+
+This module contains the Detections class, which keeps boxes, centers,
+class ids and confidences in NumPy arrays instead of one Python tuple
+per box.
+"""
+import numpy as np
+
+
+class Detections:
+    """Detections of one image, stored as NumPy arrays.
+
+    boxes is an (N, 4) int array of xyxy pixel boxes clipped to the image, centers
+    an (N, 2) int array, class_ids an (N,) int array and confidences an (N,) float
+    array. Iterating yields (center_x, center_y, class_name, confidence) tuples,
+    the detected_centers format used throughout the application.
+    """
+    __slots__ = ("boxes", "centers", "class_ids", "confidences", "names")
+
+    def __init__(self, boxes, class_ids, confidences, names):
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.class_ids = np.asarray(class_ids, dtype=np.int32).reshape(-1)
+        self.confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        self.centers = (self.boxes[:, :2] + self.boxes[:, 2:]) // 2
+        self.names = names if names is not None else {}
+
+    @classmethod
+    def empty(cls, names=None):
+        """Returns detections without any boxes."""
+        return cls(np.empty((0, 4)), [], [], names)
+
+    @classmethod
+    def from_yolo(cls, result, image_shape, names):
+        """Builds detections from one YOLO result, moving the box tensor to NumPy once."""
+        boxes = getattr(result, "boxes", None)
+        if boxes is None or len(boxes) == 0:
+            return cls.empty(names)
+
+        # Rows of boxes.data are (x1, y1, x2, y2, conf, cls)
+        data = boxes.data.cpu().numpy()
+        height, width = image_shape[:2]
+        xyxy = np.clip(data[:, :4].astype(np.int32), 0,
+                       [width - 1, height - 1, width - 1, height - 1])
+        return cls(xyxy, data[:, 5], data[:, 4], names)
+
+    def filter(self, min_confidence):
+        """Returns the detections with a confidence of at least min_confidence."""
+        keep = self.confidences >= min_confidence
+        return Detections(self.boxes[keep], self.class_ids[keep], self.confidences[keep],
+                          self.names)
+
+    @property
+    def nbytes(self):
+        """Memory used by the detection arrays in bytes."""
+        return (self.boxes.nbytes + self.centers.nbytes + self.class_ids.nbytes
+                + self.confidences.nbytes)
+
+    @property
+    def class_names(self):
+        """List of the class names, one per detection."""
+        return [self.names[c] for c in self.class_ids.tolist()]
+
+    def __len__(self):
+        return len(self.confidences)
+
+    def __iter__(self):
+        return zip(self.centers[:, 0].tolist(), self.centers[:, 1].tolist(),
+                   self.class_names, self.confidences.tolist())
+
+    def __getitem__(self, index):
+        x, y = self.centers[index].tolist()
+        return x, y, self.names[int(self.class_ids[index])], float(self.confidences[index])
+
+    def __repr__(self):
+        return f"Detections({len(self)} boxes)"
@@ -0,0 +1,89 @@
+"""Thread-safe dispatcher for GUI updates.
+
+This module contains the UIDispatcher class. Worker threads post updates to
+it instead of touching Tk widgets, and the Tk thread applies them at a fixed
+refresh rate. Updates are coalesced: only the newest update per key is kept
+(e.g. the latest camera frame), log lines are delivered in batches, and
+one-off calls run once each in the order they were posted.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_HZ = 30.0
+
+
+class UIDispatcher:
+    """Collects updates from any thread and flushes them on the Tk thread.
+
+    root is the Tk root (anything with after() and after_cancel()). Posting only
+    takes a lock; nothing is queued in Tk until the next flush, so a fast
+    producer cannot flood the Tk event queue.
+    """
+    def __init__(self, root, rate_hz=DEFAULT_RATE_HZ):
+        if rate_hz <= 0:
+            raise ValueError(f"rate_hz must be positive, got {rate_hz}")
+        self.root = root
+        self.interval_ms = max(1, round(1000.0 / rate_hz))
+        self.coalesced = 0  # updates replaced by a newer one before they were shown
+        self._latest = {}  # key -> (callback, args)
+        self._lines = {}  # key -> (callback, [lines])
+        self._calls = []  # [(callback, args)]
+        self._lock = threading.Lock()
+        self._after_id = None
+
+    def post_latest(self, key, callback, *args):
+        """Schedules callback(*args), replacing any pending update with the same key."""
+        with self._lock:
+            if key in self._latest:
+                self.coalesced += 1
+            self._latest[key] = (callback, args)
+
+    def post_line(self, key, callback, line):
+        """Queues a line; all lines of a key are passed to one callback(*lines) call."""
+        with self._lock:
+            if key in self._lines:
+                self._lines[key][1].append(line)
+            else:
+                self._lines[key] = (callback, [line])
+
+    def call(self, callback, *args):
+        """Schedules callback(*args) to run once, in order with other calls."""
+        with self._lock:
+            self._calls.append((callback, args))
+
+    def start(self):
+        """Starts flushing every interval_ms on the Tk thread."""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        """Stops the periodic flush; pending updates stay queued."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def flush(self):
+        """Applies all pending updates; must be called on the Tk thread."""
+        with self._lock:
+            calls, self._calls = self._calls, []
+            lines, self._lines = self._lines, {}
+            latest, self._latest = self._latest, {}
+
+        updates = calls + [(callback, tuple(batch)) for callback, batch in lines.values()]
+        updates += list(latest.values())
+        for callback, args in updates:
+            try:
+                callback(*args)
+            except Exception:  # pylint: disable=broad-exception-caught
+                # One failing update must not stop the refresh loop
+                logger.exception("UI update %s failed", getattr(callback, "__name__", callback))
+
+    def _tick(self):
+        """Flushes and schedules the next flush."""
+        self._after_id = None
+        try:
+            self.flush()
+        finally:
+            self.start()
@@ -1,39 +1,71 @@
 """Weed Detection GUI using Tkinter and OpenCV"""
+import contextlib
+import logging
 import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk
 import cv2
+from app.capture import LatestFrameCapture
+from app.dispatcher import DEFAULT_RATE_HZ, UIDispatcher
+from app.widgets import DEFAULT_MAX_LINES, RingLog
+
+logger = logging.getLogger(__name__)
+
+MIN_CONFIDENCE = 0.05 # Lowest value of the confidence slider
 
 class WeedDetectorGUI:
     """Graphical User Interface for the Weed Detection System."""
-    def __init__(self):
-        """Initialize the Weed Detector GUI."""
+    def __init__(self, log_lines=DEFAULT_MAX_LINES, ui_rate=DEFAULT_RATE_HZ,
+                 camera_sources=None):
+        """Initialize the Weed Detector GUI.
+
+        log_lines is the number of lines kept in the results and robot action panels,
+        ui_rate the rate in Hz at which updates from worker threads are shown and
+        camera_sources the device indices or video URLs of the cameras (default: 0).
+        """
         self.root = tk.Tk()
+        self.log_lines = log_lines
+        # Widgets may only be touched by this thread; workers post to the dispatcher
+        self._tk_thread = threading.get_ident()
+        self.dispatcher = UIDispatcher(self.root, ui_rate)
         self.cap = None
+        self.camera_sources = list(camera_sources) if camera_sources else [0]
         self.camera_running = False
+        self.multi_camera = False
         self.on_select_image = None
         self.on_detect = None
         self.on_start_robot = None
         self.on_stop_robot = None
         self.on_camera_frame = None
+        self.on_conf_change = None
         self.model_info_var = None
         self.select_btn = None
         self.camera_btn = None
         self.robot_btn = None
         self.conf_var = None
+        # Slider value as a plain float; worker threads read this instead of conf_var
+        self.confidence = 0.15
+        self.busy_bar = None
         self.canvas = None
         self.results_text = None
         self.robot_actions_text = None
         self._canvas_image_obj = None
         self._canvas_image_id = None
+        self._frame_key = None # (width, height, mode) of the PhotoImage reused for live frames
         self.camera_thread = None
+        self.stats = None # LatencyStats shared with the model, set by the controller
+        self.stats_var = None
+        self.input_size_var = None
 
         self.on_select_image = None # Callback for image selection
         self.on_detect = None # Callback for detection
         self.on_start_robot = None  # Callback for robot start
         self.on_stop_robot = None  # Callback for robot stop
         self.on_camera_frame = None # Callback for camera frame processing
+        self.on_conf_change = None # Callback for confidence slider changes
+        self.on_start_cameras = None # Callback to start reading several cameras
+        self.on_stop_cameras = None # Callback to stop reading several cameras
 
         self.root.title("Weed Detector")
         self.root.geometry("1200x900")
@@ -42,6 +74,8 @@ class WeedDetectorGUI:
 
         # Create main layout
         self.create_layout()
+        self.root.after(1000, self.refresh_stats)
+        self.dispatcher.start()
 
     def create_layout(self):
         """Create the main layout of the GUI."""
@@ -162,6 +196,36 @@ class WeedDetectorGUI:
         )
         model_info.pack(padx=10, pady=10)
 
+        self.input_size_var = tk.StringVar(value="Input size: model default")
+        input_size_info = tk.Label(
+            model_frame,
+            textvariable=self.input_size_var,
+            font=("Arial", 9),
+            bg="#34495e",
+            fg="#bdc3c7"
+        )
+        input_size_info.pack(padx=10, pady=(0, 5))
+
+        self.stats_var = tk.StringVar(value="No timing data yet")
+        stats_info = tk.Label(
+            model_frame,
+            textvariable=self.stats_var,
+            font=("Consolas", 8),
+            bg="#34495e",
+            fg="#bdc3c7",
+            justify=tk.LEFT,
+            wraplength=250
+        )
+        stats_info.pack(padx=10, pady=(0, 5), anchor="w")
+
+        export_stats_btn = tk.Button(
+            model_frame,
+            text="Export Stats CSV",
+            font=("Arial", 9),
+            command=self.export_stats
+        )
+        export_stats_btn.pack(padx=10, pady=(0, 10))
+
         settings_frame = tk.LabelFrame(
             control_frame,
             text="Detection Settings",
@@ -175,20 +239,25 @@ class WeedDetectorGUI:
 
         tk.Label(settings_frame, text="Confidence:", bg="#34495e",
                  fg="#bdc3c7").pack(anchor="w", padx=10)
-        self.conf_var = tk.DoubleVar(value=0.15)
+        self.conf_var = tk.DoubleVar(value=self.confidence)
         conf_scale = tk.Scale(
             settings_frame,
-            from_=0.05,
+            from_=MIN_CONFIDENCE,
             to=0.95,
             resolution=0.05,
             orient="horizontal",
             variable=self.conf_var,
+            command=self.conf_changed,
             bg="#34495e",
             fg="#ecf0f1",
             highlightbackground="#34495e"
         )
         conf_scale.pack(fill="x", padx=10, pady=5)
 
+        # Runs while a still image is detected in the background
+        self.busy_bar = ttk.Progressbar(settings_frame, mode="indeterminate")
+        self.busy_bar.pack(fill="x", padx=10, pady=(0, 10))
+
     def create_display_panel(self, parent):
         """Create the display panel for showing images and results."""
         display_frame = tk.Frame(parent, bg="#34495e")
@@ -247,15 +316,15 @@ class WeedDetectorGUI:
         results_frame = tk.Frame(status_frame, bg="#34495e")
         results_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
-        self.results_text = tk.Text(
+        self.results_text = RingLog(
             results_frame,
+            max_lines=self.log_lines,
             height=4,
             bg="#2c3e50",
             fg="#ecf0f1",
             font=("Consolas", 10),
             relief=tk.SUNKEN,
-            bd=2,
-            state=tk.DISABLED
+            bd=2
         )
         results_scrollbar = ttk.Scrollbar(results_frame, orient="vertical",
                                           command=self.results_text.yview)
@@ -283,15 +352,15 @@ class WeedDetectorGUI:
         robot_results_frame.pack(fill="both", expand=True, padx=10,
                                  pady=(0, 10))
 
-        self.robot_actions_text = tk.Text(
+        self.robot_actions_text = RingLog(
             robot_results_frame,
+            max_lines=self.log_lines,
             height=4,
             bg="#2c3e50",
             fg="#ecf0f1",
             font=("Consolas", 10),
             relief=tk.SUNKEN,
-            bd=2,
-            state=tk.DISABLED
+            bd=2
         )
         robot_status_scrollbar = ttk.Scrollbar(robot_results_frame,
                                                orient="vertical",
@@ -304,19 +373,71 @@ class WeedDetectorGUI:
 
     def update_results(self, message):
         """Update the results text area with a new message."""
-        self.results_text.config(state=tk.NORMAL)
-        self.results_text.insert(tk.END, message + "\n")
-        self.results_text.see(tk.END)
-        self.results_text.config(state=tk.DISABLED)
+        if not self._on_tk_thread():
+            self.dispatcher.post_line("results", self.results_text.append, message)
+            return
+        self.results_text.append(message)
 
     def clear_results(self):
         """Clear the results text area."""
-        self.results_text.config(state=tk.NORMAL)
-        self.results_text.delete(1.0, tk.END)
-        self.results_text.config(state=tk.DISABLED)
+        self.results_text.clear()
+
+    def call_soon(self, callback, *args):
+        """Run callback(*args) on the Tk thread; safe to call from worker threads."""
+        self.dispatcher.call(callback, *args)
+
+    def _on_tk_thread(self):
+        """True if called from the thread that owns the Tk widgets."""
+        return threading.get_ident() == self._tk_thread
+
+    def set_busy(self, busy):
+        """Show or hide the busy indicator while a detection runs in the background."""
+        if busy:
+            self.busy_bar.start(15)
+        else:
+            self.busy_bar.stop()
+        self.root.configure(cursor="watch" if busy else "")
+
+    def _timed(self, stage):
+        """Times a block for the given stage if statistics are attached."""
+        if self.stats is None:
+            return contextlib.nullcontext()
+        return self.stats.time(stage)
+
+    def refresh_stats(self):
+        """Show the current latency statistics and schedule the next refresh."""
+        if self.stats is not None:
+            self.stats_var.set(self.stats.format_summary())
+        self.root.after(1000, self.refresh_stats)
+
+    def export_stats(self):
+        """Ask for a file name and write the latency statistics to it as CSV."""
+        if self.stats is None:
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="Export Latency Statistics",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if file_path:
+            try:
+                self.stats.to_csv(file_path)
+            except OSError as e:
+                self.show_error_box(f"Fehler beim Speichern der Statistik: {e}")
 
     def display_image(self, cv_image):
-        """Display an OpenCV image in the Tkinter canvas."""
+        """Display an OpenCV image in the Tkinter canvas.
+
+        Called from a worker thread, only the newest image is shown at the next refresh.
+        """
+        if not self._on_tk_thread():
+            self.dispatcher.post_latest("image", self.display_image, cv_image)
+            return
+        with self._timed("display"):
+            self._display_image(cv_image)
+
+    def _display_image(self, cv_image):
+        """Convert, scale and draw the image onto the canvas."""
         try:
             if cv_image is None:
                 raise ValueError("Received None image for display.")
@@ -327,19 +448,12 @@ class WeedDetectorGUI:
 
             pil_image = Image.fromarray(rgb_image)
 
-            canvas_width = self.canvas.winfo_width()
-            canvas_height = self.canvas.winfo_height()
-            if canvas_width <= 1 or canvas_height <= 1:
-                canvas_width, canvas_height = 800, 600
-
-            img_width, img_height = pil_image.size
-            scale = min(canvas_width / img_width, canvas_height / img_height, 1.0)
-            new_width = int(img_width * scale)
-            new_height = int(img_height * scale)
+            new_width, new_height = self._fit_to_canvas(*pil_image.size)
             display_image = pil_image.resize((new_width, new_height),
                                                 Image.Resampling.LANCZOS)
 
             self._canvas_image_obj = ImageTk.PhotoImage(display_image)
+            self._frame_key = None
 
             self.canvas.delete("all")
             self.canvas.configure(scrollregion=(0, 0, new_width, new_height))
@@ -350,6 +464,62 @@ class WeedDetectorGUI:
         except (OSError, ValueError, RuntimeError) as e:
             self.show_error_box(f"Fehler beim Anzeigen des Bildes: {e}")
 
+    def display_frame(self, cv_image):
+        """Display a live video frame using the fast rendering path.
+
+        Called from a worker thread, only the newest frame is shown at the next refresh.
+        """
+        if not self._on_tk_thread():
+            self.dispatcher.post_latest("frame", self.display_frame, cv_image)
+            return
+        with self._timed("display"):
+            self._display_frame(cv_image)
+
+    def _display_frame(self, cv_image):
+        """Draw a frame by resizing it with OpenCV and reusing the canvas item.
+
+        The frame is shrunk before the colour conversion, and the PhotoImage is
+        updated in place with paste() as long as its size does not change.
+        """
+        try:
+            if cv_image is None:
+                raise ValueError("Received None image for display.")
+            img_height, img_width = cv_image.shape[:2]
+            new_width, new_height = self._fit_to_canvas(img_width, img_height)
+            if (new_width, new_height) != (img_width, img_height):
+                cv_image = cv2.resize(cv_image, (new_width, new_height),
+                                      interpolation=cv2.INTER_AREA)
+            if len(cv_image.shape) == 3:
+                cv_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)
+            pil_image = Image.fromarray(cv_image)
+
+            frame_key = (new_width, new_height, pil_image.mode)
+            if frame_key == self._frame_key and self._canvas_image_id is not None:
+                self._canvas_image_obj.paste(pil_image)
+                return
+
+            self._canvas_image_obj = ImageTk.PhotoImage(pil_image)
+            self._frame_key = frame_key
+            self.canvas.configure(scrollregion=(0, 0, new_width, new_height))
+            if self._canvas_image_id is None or not self.canvas.find_withtag(
+                    self._canvas_image_id):
+                self._canvas_image_id = self.canvas.create_image(
+                    new_width // 2, new_height // 2, image=self._canvas_image_obj)
+            else:
+                self.canvas.coords(self._canvas_image_id, new_width // 2, new_height // 2)
+                self.canvas.itemconfigure(self._canvas_image_id, image=self._canvas_image_obj)
+        except (OSError, ValueError, RuntimeError) as e:
+            logger.warning("Could not display frame: %s", e)
+
+    def _fit_to_canvas(self, img_width, img_height):
+        """Returns the size that fits the image into the canvas without enlarging it."""
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        if canvas_width <= 1 or canvas_height <= 1:
+            canvas_width, canvas_height = 800, 600
+        scale = min(canvas_width / img_width, canvas_height / img_height, 1.0)
+        return max(1, int(img_width * scale)), max(1, int(img_height * scale))
+
     def select_image(self):
         """Open a file dialog to select an image and process it."""
         file_path = filedialog.askopenfilename(
@@ -370,20 +540,39 @@ class WeedDetectorGUI:
         if callable(self.on_detect):
             self.on_detect(file_path)
 
-    def toggle_camera(self):
+    def conf_changed(self, value):
+        """Called by the confidence slider with its new value."""
+        self.confidence = float(value)
+        if callable(self.on_conf_change):
+            self.on_conf_change(self.confidence)
+
+    def toggle_camera(self, all_cameras=True):
         """Toggle the camera on or off."""
         if not self.camera_running:
-            self.start_camera()
+            self.start_camera(all_cameras)
         else:
             self.stop_camera()
 
-    def start_camera(self):
-        """Start the camera for real-time detection."""
+    def start_camera(self, all_cameras=True):
+        """Start the camera for real-time detection.
+
+        With several camera sources and all_cameras, they are read by the controller
+        and shown side by side; otherwise only the first source is used.
+        """
         try:
-            self.cap = cv2.VideoCapture(0)
-            if not self.cap.isOpened():
-                messagebox.showerror("Camera Error", "Could not open camera.")
-                return
+            self.multi_camera = (all_cameras and len(self.camera_sources) > 1
+                                 and callable(self.on_start_cameras))
+            if self.multi_camera:
+                if not self.on_start_cameras(self.camera_sources):
+                    self.multi_camera = False
+                    return
+            else:
+                cap = cv2.VideoCapture(self.camera_sources[0])
+                if not cap.isOpened():
+                    messagebox.showerror("Camera Error", "Could not open camera.")
+                    return
+                # Grab frames on a separate thread so detection always gets the newest one
+                self.cap = LatestFrameCapture(cap)
 
             self.camera_running = True
             self.camera_btn.config(text="⏹ Stop Camera", bg="#e74c3c")
@@ -392,9 +581,10 @@ class WeedDetectorGUI:
             self.clear_results()
             self.update_results("Camera started - Real-time detection active")
 
-            self.camera_thread = threading.Thread(target=self.camera_loop,
-                                                   daemon=True)
-            self.camera_thread.start()
+            if not self.multi_camera:
+                self.camera_thread = threading.Thread(target=self.camera_loop,
+                                                       daemon=True)
+                self.camera_thread.start()
 
         except (OSError, RuntimeError) as e:
             messagebox.showerror("Error", f"Failed to start camera: {str(e)}")
@@ -402,12 +592,21 @@ class WeedDetectorGUI:
     def stop_camera(self):
         """Stop the camera and release resources."""
         self.camera_running = False
-        if self.cap:
-            self.cap.release()
+        if self.multi_camera:
+            self.multi_camera = False
+            if callable(self.on_stop_cameras):
+                self.on_stop_cameras()
+            message = f"{len(self.camera_sources)} cameras stopped"
+        else:
+            dropped = 0
+            if self.cap:
+                self.cap.release()
+                dropped = getattr(self.cap, "dropped_frames", 0)
+            message = f"Camera stopped ({dropped} stale frame(s) dropped)"
 
         self.camera_btn.config(text="📷 Start Camera", bg="#27ae60")
         self.select_btn.config(state=tk.NORMAL)
-        self.update_results("Camera stopped")
+        self.update_results(message)
 
     def camera_loop(self):
         """Loop to read frames from the camera and process them."""
@@ -415,26 +614,29 @@ class WeedDetectorGUI:
             if self.cap is None:
                 break
 
-            ret, frame = self.cap.read()
+            with self._timed("capture"):
+                ret, frame = self.cap.read()
             if not ret:
                 break
 
             try:
                 if callable(self.on_camera_frame):
                     processed_frame, detected_centers = self.on_camera_frame(
-                        frame, self.conf_var.get())
+                        frame, self.confidence)
                 else:
                     processed_frame = frame
                     detected_centers = []
 
-                self.root.after(0, self.display_image, processed_frame)
+                self.display_frame(processed_frame)
+                if self.stats is not None:
+                    self.stats.record_frame()
 
                 if detected_centers:
                     result_msg = f"Live: {len(detected_centers)} object(s) detected"
-                    self.root.after(0, self.update_live_results, result_msg)
+                    self.update_live_results(result_msg)
 
             except (OSError, RuntimeError, ValueError) as e:
-                print(f"Error processing frame: {e}")
+                logger.warning("Error processing frame: %s", e)
 
         if self.cap:
             self.cap.release()
@@ -463,22 +665,28 @@ class WeedDetectorGUI:
 
     def log_robot_action(self, message):
         """Append a robot action to the robot actions panel."""
-        self.robot_actions_text.config(state=tk.NORMAL)
-        self.robot_actions_text.insert(tk.END, message + "\n")
-        self.robot_actions_text.see(tk.END)
-        self.robot_actions_text.config(state=tk.DISABLED)
+        if not self._on_tk_thread():
+            self.dispatcher.post_line("robot", self.robot_actions_text.append, message)
+            return
+        self.robot_actions_text.append(message)
 
     def update_live_results(self, message):
-        """Update the results text area with live detection results."""
+        """Update the results text area with live detection results.
+
+        The live result replaces the previous one instead of adding a line per frame.
+        """
+        if not self._on_tk_thread():
+            self.dispatcher.post_latest("live", self.update_live_results, message)
+            return
         if self.camera_running:
-            self.results_text.config(state=tk.NORMAL)
-            lines = self.results_text.get(1.0, tk.END).strip().split('\n')
-            if lines and 'Camera started' in lines[0]:
-                self.results_text.delete(1.0, tk.END)
-                self.results_text.insert(tk.END, lines[0] + "\n")
-            self.results_text.insert(tk.END, message + "\n")
-            self.results_text.see(tk.END)
-            self.results_text.config(state=tk.DISABLED)
+            self.results_text.set_status(message)
+
+    def show_input_size(self, imgsz):
+        """Show the inference input size chosen for the frame-time budget."""
+        if not self._on_tk_thread():
+            self.dispatcher.post_latest("input_size", self.show_input_size, imgsz)
+            return
+        self.input_size_var.set(f"Input size: {imgsz} px (adaptive)")
 
     def show_error_box(self, message):
         """Show an error message box."""
@@ -0,0 +1,69 @@
+"""Logging setup for the Weed Detector application.
+
+All modules log through logging.getLogger(__name__), i.e. below the "app"
+logger. configure_logging() sets the level of that hierarchy and can add a
+JSON-lines handler for production, where every record becomes one JSON
+object including any fields passed via extra={...}.
+
+Environment variables:
+    WEED_LOG_LEVEL  log level name, e.g. DEBUG or WARNING (default INFO)
+    WEED_LOG_JSON   file to append JSON lines to, or "-" for stdout
+"""
+import json
+import logging
+import os
+import sys
+
+LOGGER_NAME = "app"
+
+# Attributes every LogRecord has; anything else was passed via extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "taskName"}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as a single JSON object, including its extra fields."""
+    def format(self, record):
+        data = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+def configure_logging(level=None, json_path=None):
+    """Configures the application loggers and returns the root "app" logger.
+
+    level and json_path default to the WEED_LOG_LEVEL and WEED_LOG_JSON
+    environment variables. Calling this again replaces the previous handlers.
+    """
+    level = level or os.environ.get("WEED_LOG_LEVEL", "INFO")
+    json_path = json_path or os.environ.get("WEED_LOG_JSON")
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(console)
+
+    if json_path:
+        if json_path == "-":
+            json_handler = logging.StreamHandler(sys.stdout)
+        else:
+            json_handler = logging.FileHandler(json_path, encoding="utf-8")
+        json_handler.setFormatter(JsonLinesFormatter())
+        logger.addHandler(json_handler)
+
+    logger.propagate = False
+    return logger
@@ -1,19 +1,39 @@
 """ Entry point for the Weed Detector application. This initializes the GUI and loads the model. """
+import os
 from app.controller import WeedDetectorController
+from app.dispatcher import DEFAULT_RATE_HZ
 from app.model import WeedDetectorModel
 from app.gui import WeedDetectorGUI
+from app.log import configure_logging
+from app.multicam import parse_sources
 
 
 def main():
     """Main function to run the Weed Detector application."""
-    # Initialize the model
-    model = WeedDetectorModel()
+    # Log level and optional JSON-lines output come from WEED_LOG_LEVEL / WEED_LOG_JSON
+    configure_logging()
 
-    # Initialize the GUI with the model
-    gui = WeedDetectorGUI()
+    # Initialize the model, optionally on a CPU-optimized backend (onnx / openvino)
+    # and INT8 quantized (openvino only)
+    model = WeedDetectorModel(backend=os.environ.get("WEED_BACKEND", "pytorch"),
+                              int8=os.environ.get("WEED_INT8") == "1")
+    if os.environ.get("WEED_TILE_SIZE"):
+        # Tiled inference for high-resolution field images
+        model.configure_tiling(tile_size=int(os.environ["WEED_TILE_SIZE"]))
+
+    # Initialize the GUI with the model; WEED_UI_HZ sets how often worker updates are drawn
+    # and WEED_CAMERAS lists the cameras, e.g. "0,1,2,3" or "0,rtsp://boom-cam/stream"
+    gui = WeedDetectorGUI(ui_rate=float(os.environ.get("WEED_UI_HZ", DEFAULT_RATE_HZ)),
+                          camera_sources=parse_sources(os.environ.get("WEED_CAMERAS", "0")))
 
     # Create the controller to handle interactions between model and GUI
     controller = WeedDetectorController(model, gui)
+    if os.environ.get("WEED_FRAME_BUDGET_MS"):
+        # Live frames adapt their input size to this many milliseconds per frame
+        controller.configure_frame_budget(float(os.environ["WEED_FRAME_BUDGET_MS"]))
+    if os.environ.get("WEED_INFERENCE_PROCESS") == "1":
+        # Live frames are detected in a second process, fed through shared memory
+        controller.configure_inference_process()
 
     # Run the GUI application
     controller.run()
@@ -0,0 +1,109 @@
+"""Per-stage latency statistics for the Weed Detector application.
+
+This module contains the LatencyStats class that collects frame timings for
+the capture, preprocess, inference, postprocess, render and display stages
+and aggregates them into rolling percentiles.
+"""
+import collections
+import contextlib
+import csv
+import threading
+import time
+import numpy as np
+
+STAGES = ("capture", "preprocess", "inference", "postprocess", "render", "display")
+
+
+class LatencyStats:
+    """Rolling per-stage latency statistics in milliseconds.
+
+    Every stage keeps its last window samples. record() only appends to a deque,
+    so it can be called on every frame and from any thread.
+    """
+    def __init__(self, window=300):
+        self.window = window
+        self._samples = {stage: collections.deque(maxlen=window) for stage in STAGES}
+        self._frame_times = collections.deque(maxlen=window)
+        self._counters = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(self, stage, milliseconds):
+        """Add one timing sample for the given stage."""
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = collections.deque(maxlen=self.window)
+            self._samples[stage].append(milliseconds)
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        """Context manager that records the duration of its block for the given stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000.0)
+
+    def increment(self, name, count=1):
+        """Add count to the event counter name, e.g. for skipped inferences."""
+        with self._lock:
+            self._counters[name] += count
+
+    def counters(self):
+        """Returns a copy of the event counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def record_frame(self):
+        """Mark the completion of one frame, used for the FPS estimate."""
+        with self._lock:
+            self._frame_times.append(time.perf_counter())
+
+    def fps(self):
+        """Frames per second over the rolling window, 0.0 if unknown."""
+        with self._lock:
+            if len(self._frame_times) < 2:
+                return 0.0
+            elapsed = self._frame_times[-1] - self._frame_times[0]
+            count = len(self._frame_times) - 1
+        return count / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        """Returns {stage: {"count", "p50", "p95", "p99"}} for all stages with samples."""
+        with self._lock:
+            snapshot = {stage: np.fromiter(samples, dtype=float)
+                        for stage, samples in self._samples.items() if samples}
+        result = {}
+        for stage, values in snapshot.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result[stage] = {"count": len(values), "p50": p50, "p95": p95, "p99": p99}
+        return result
+
+    def format_summary(self):
+        """Formats the statistics as short text lines for the GUI."""
+        summary = self.summary()
+        if not summary:
+            return "No timing data yet"
+        lines = [f"FPS: {self.fps():.1f}"]
+        for stage, values in summary.items():
+            lines.append(f"{stage}: p50 {values['p50']:.1f} / p95 {values['p95']:.1f}"
+                         f" / p99 {values['p99']:.1f} ms")
+        for name, count in self.counters().items():
+            lines.append(f"{name}: {count}")
+        return "\n".join(lines)
+
+    def to_csv(self, path):
+        """Writes the per-stage percentiles to a CSV file."""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage", "count", "p50_ms", "p95_ms", "p99_ms"])
+            for stage, values in self.summary().items():
+                writer.writerow([stage, values["count"], f"{values['p50']:.3f}",
+                                 f"{values['p95']:.3f}", f"{values['p99']:.3f}"])
+
+    def reset(self):
+        """Drop all collected samples."""
+        with self._lock:
+            for samples in self._samples.values():
+                samples.clear()
+            self._frame_times.clear()
+            self._counters.clear()
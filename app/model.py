@@ -3,10 +3,58 @@
 This module contains the WeedDetectorModel class that provides functionality
 for loading YOLO models, detecting weeds in images, and formatting results.
 """
+import logging
 import os
-import traceback
+import time
 import cv2
+import numpy as np
 from ultralytics import YOLO
+from app.cache import ByteLRUCache, content_hash, file_key
+from app.capture import FramePrefetcher, iter_frames
+from app.detections import Detections
+from app.metrics import LatencyStats
+from app.tiling import MERGE_METHODS, merge_boxes, tile_origins
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pytorch", "onnx", "openvino")
+# Dataset whose images calibrate the INT8 quantization
+DEFAULT_CALIBRATION_DATA = "data/data.yaml"
+# Byte budgets of the decoded image and detection result caches
+IMAGE_CACHE_BYTES = 256 * 1024 * 1024
+RESULT_CACHE_BYTES = 16 * 1024 * 1024
+# Used when no model is given; trained weights are preferred, the pretrained model is the fallback
+TRAINED_MODEL_PATHS = (
+    "runs/detect_train/weights/best.pt",
+    "data/weights/best.pt",
+    "data/models/best.pt",
+    "models/best.pt",
+)
+DEFAULT_MODEL = "yolov8n.pt"
+
+
+def find_trained_model():
+    """Returns the first of TRAINED_MODEL_PATHS that exists, or None."""
+    for trained_path in TRAINED_MODEL_PATHS:
+        if os.path.exists(trained_path):
+            logger.info("Found trained weed detection model at %s", trained_path)
+            return trained_path
+    return None
+
+
+def exported_model_path(weights_path, backend, int8=False):
+    """Returns where the export of weights_path for the given backend is cached.
+
+    This is the location Ultralytics writes to: best.onnx, best_openvino_model/ or
+    best_int8_openvino_model/ next to best.pt.
+    """
+    stem, _ = os.path.splitext(weights_path)
+    if backend == "onnx" and not int8:
+        return f"{stem}.onnx"
+    if backend == "openvino":
+        return f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+    raise ValueError(f"Backend {backend} has no {'INT8 ' if int8 else ''}exported model")
+
 
 class WeedDetectorModel:
     """YOLO-based weed detection model for image processing and analysis. 
@@ -14,170 +62,396 @@ class WeedDetectorModel:
     This class provides functionality to load YOLO models, detect weeds in images,
     and format detection results for display in the GUI.
     """
-    def __init__(self, model_path="yolov8n.pt"):
+    def __init__(self, model_path=None, backend="pytorch", int8=False,
+                 calibration_data=DEFAULT_CALIBRATION_DATA):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend}, expected one of {', '.join(BACKENDS)}")
+        if int8 and backend != "openvino":
+            raise ValueError("INT8 quantization is only available with the openvino backend")
         self.model_path = model_path
-        possible_trained_models = [
-            "runs/detect_train/weights/best.pt",
-            "data/weights/best.pt",
-            "data/models/best.pt",
-            "models/best.pt",
-        ]
+        self.backend = "pytorch"
+        self.precision = "fp32"
         self.detected_centers = []
-
-        trained_model_found = False
-        for trained_path in possible_trained_models:
-            if os.path.exists(trained_path):
-                self.model_path = trained_path
-                print(f"Found trained weed detection model at {trained_path}")
-                trained_model_found = True
-                break
-
-        if not trained_model_found:
-            print(f"No trained weed detection model found, using default model: {model_path}")
+        self.stats = LatencyStats()
+        # Tiled inference is off until configure_tiling() sets a tile size
+        self.tile_size = None
+        self.tile_overlap = 0.2
+        self.tile_batch_size = 8
+        self.tile_merge = "nms"
+        # Operators reopen the same sample images, so still images are cached
+        self.image_cache = ByteLRUCache(IMAGE_CACHE_BYTES)
+        self.result_cache = ByteLRUCache(RESULT_CACHE_BYTES)
+
+        # Trained weights are only searched for when no model was given explicitly
+        if model_path is None:
+            self.model_path = find_trained_model()
+            if self.model_path is None:
+                logger.info("No trained weed detection model found, using default model: %s",
+                            DEFAULT_MODEL)
+                self.model_path = DEFAULT_MODEL
 
         try:
             self.model = YOLO(self.model_path)
-            print(f"Model class names: {self.model.names}")
+            logger.debug("Model class names: %s", self.model.names)
         except (OSError, RuntimeError, ValueError) as e:
-            print(f"Error loading model {self.model_path}: {e}")
-            print(f"Falling back to default model {model_path}")
-            self.model_path = model_path
-            self.model = YOLO(model_path)
-            print(f"Default model class names: {self.model.names}")
+            logger.warning("Error loading model %s: %s", self.model_path, e)
+            logger.warning("Falling back to default model %s", DEFAULT_MODEL)
+            self.model_path = DEFAULT_MODEL
+            self.model = YOLO(DEFAULT_MODEL)
+            logger.debug("Default model class names: %s", self.model.names)
 
         if self.model is None:
             raise ValueError("Model not found or invalid model path.")
-        self.model.fuse()
+        if backend != "pytorch":
+            self._load_exported_model(backend, int8, calibration_data)
+        else:
+            self.model.fuse()
         self.model.conf = 0.15
         self.model.iou = 0.45
-        print(f"Loaded detection model: {self.model_path}")
+        logger.info("Loaded detection model: %s (%s backend, %s)", self.model_path,
+                    self.backend, self.precision,
+                    extra={"model_path": self.model_path, "backend": self.backend,
+                           "precision": self.precision})
+
+    def _load_exported_model(self, backend, int8=False, calibration_data=None):
+        """Switches inference to an ONNX Runtime or OpenVINO export of the loaded weights.
+
+        The export is created once and reused as long as it is newer than the weights.
+        With int8, the weights are quantized after training, calibrated on the images
+        of calibration_data. If exporting or loading fails, the PyTorch model stays in use.
+        """
+        export_path = exported_model_path(self.model_path, backend, int8)
+        try:
+            if (not os.path.exists(export_path)
+                    or os.path.getmtime(export_path) < os.path.getmtime(self.model_path)):
+                logger.info("Exporting %s to %s%s, this is only done once", self.model_path,
+                            backend, " (INT8)" if int8 else "")
+                # dynamic=True keeps the batch dimension open for predict_batch
+                export_args = {"format": backend, "dynamic": True}
+                if int8:
+                    export_args.update(int8=True, data=calibration_data)
+                export_path = self.model.export(**export_args)
+            exported = YOLO(export_path, task="detect")
+        except (ImportError, OSError, RuntimeError, ValueError) as e:
+            logger.warning("Could not use the %s backend (%s), staying on PyTorch", backend, e)
+            self.model.fuse()
+            return
+        self.model = exported
+        self.backend = backend
+        self.precision = "int8" if int8 else "fp32"
 
     def load_image(self, image_path):
-        """Loads an image from the given path."""
+        """Loads an image from the given path.
+
+        Decoded images are cached by path and modification time and returned read-only.
+        """
         if not os.path.isfile(image_path):
             raise ValueError(f"Image file does not exist: {os.path.abspath(image_path)}")
+        key = file_key(image_path)
+        image = self.image_cache.get(key)
+        if image is not None:
+            return image
         image = cv2.imread(image_path)
         if image is None:
             raise ValueError(f"Failed to load image (possibly invalid or corrupted): \
                              {os.path.abspath(image_path)}")
+        image.flags.writeable = False
+        self.image_cache.put(key, image)
         return image
 
-    def detect_weeds(self, image):
+    def detect_weeds(self, image, render=True, imgsz=None):
         """Detects weeds in the given image using the YOLO model."""
-        processed_image = self.predict(image)
+        processed_image = self.predict(image, render=render, imgsz=imgsz)
         result_text = self._format_detection_results()
         return processed_image, result_text
 
     def _format_detection_results(self):
         """Formats the detection results into a readable string."""
-        if not hasattr(self, 'detected_centers') or not self.detected_centers:
+        return self.format_detections(getattr(self, "detected_centers", None))
+
+    @staticmethod
+    def format_detections(detections):
+        """Formats the given detections into a readable string."""
+        if not detections:
             return "No weeds detected"
 
         lines = []
-        for i, (x, y, class_name, conf) in enumerate(self.detected_centers, 1):
+        for i, (x, y, class_name, conf) in enumerate(detections, 1):
             lines.append(f"{i}. {class_name} at ({x},{y}) - Confidence: {conf:.2f}")
         return "\n".join(lines)
 
-    def predict(self, image):
-        """Predict and detect objects in the given image using YOLO model."""
-        image_source = image
-        is_path = isinstance(image, str)
-
-        if is_path:
-            print(f"Loading image from path: {image}")
-            image = cv2.imread(image)
-            if image is None:
-                raise ValueError(f"Image not found or invalid image path: {image_source}")
-
-        processed_image = image.copy()
-
-        print(f"Image shape: {processed_image.shape}")
-        print(f"Using confidence threshold: {self.model.conf}")
+    def configure_tiling(self, tile_size=640, overlap=0.2, batch_size=8, merge="nms"):
+        """Enable tiled inference for images larger than tile_size, or disable it with None.
+
+        overlap is the fraction of a tile shared with its neighbours, batch_size the number
+        of tiles per model call and merge the method for duplicates along the seams.
+        """
+        if tile_size is not None and tile_size < 32:
+            raise ValueError(f"tile_size must be at least 32, got {tile_size}")
+        if not 0 <= overlap < 1:
+            raise ValueError(f"overlap must be in [0, 1), got {overlap}")
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        if merge not in MERGE_METHODS:
+            raise ValueError(f"Unknown merge method {merge}, "
+                             f"expected one of {', '.join(MERGE_METHODS)}")
+        self.tile_size = tile_size
+        self.tile_overlap = overlap
+        self.tile_batch_size = batch_size
+        self.tile_merge = merge
+
+    def detect(self, image, use_cache=False, imgsz=None, conf=None):
+        """Run inference only and return the Detections, without drawing anything.
+
+        imgsz overrides the model input size, e.g. to trade accuracy for speed on live
+        frames, and conf the model's confidence threshold for this call only. With
+        use_cache, results are reused for images with the same content, as long as the
+        model and its settings are unchanged.
+        """
+        image = self._read_image(image)
+        if conf is None:
+            conf = self.model.conf
+        if use_cache:
+            key = self._result_key(image, imgsz, conf)
+            detections = self.result_cache.get(key)
+            if detections is None:
+                detections = self.detect(image, imgsz=imgsz, conf=conf)
+                self.result_cache.put(key, detections)
+            self.detected_centers = detections
+            return detections
+        if self._use_tiling(image):
+            self.detected_centers = self._detect_tiled(image, conf)
+            return self.detected_centers
+        size_args = {"imgsz": imgsz} if imgsz else {}
+        results = self.model.predict(image, conf=conf, verbose=False, **size_args)
+        start = time.perf_counter()
+        self.detected_centers = self._to_detections(results, image.shape)
+        if results:
+            self._record_speed(results[0], (time.perf_counter() - start) * 1000.0)
+        return self.detected_centers
+
+    def _result_key(self, image, imgsz, conf):
+        """Cache key of the detections of image under the current model and settings."""
+        return (content_hash(image), self.model_path, self.backend, self.precision,
+                conf, self.model.iou, imgsz, self.tile_size, self.tile_overlap,
+                self.tile_merge)
+
+    def predict(self, image, render=True, imgsz=None):
+        """Predict and detect objects in the given image using YOLO model.
+
+        Returns the annotated image, or the unchanged input image if render is False.
+        imgsz overrides the model input size.
+        """
+        image = self._read_image(image)
 
         try:
-            # Use the model's current confidence setting
-            results = self.model.predict(image, conf=self.model.conf, verbose=False)
-
-            print(f"Detection results: {len(results)} items")
-            detections_found = False
-
-            # Reset detected centers for new prediction
-            self.detected_centers = []
-
-            for i, r in enumerate(results):
-                print(f"Result {i}: has boxes: {hasattr(r, 'boxes')}")
-                if hasattr(r, 'boxes') and r.boxes is not None:
-                    num_boxes = len(r.boxes)
-                    print(f"Number of boxes detected: {num_boxes}")
-
-                    if num_boxes > 0:
-                        detections_found = True
-
-                    for box in r.boxes:
-                        b = box.xyxy[0].cpu().numpy().astype(int)
-                        c = int(box.cls[0])
-                        conf = float(box.conf[0])
-                        class_name = self.model.names[c]
-
-                        b[0] = max(0, b[0])
-                        b[1] = max(0, b[1])
-                        b[2] = min(processed_image.shape[1] - 1, b[2])
-                        b[3] = min(processed_image.shape[0] - 1, b[3])
-
-                        center_x = int((b[0] + b[2]) / 2)
-                        center_y = int((b[1] + b[3]) / 2)
-
-                        self.detected_centers.append((center_x, center_y, class_name, conf))
-
-                        print(f"Box: {b}, Center: ({center_x}, {center_y}), "
-                              f"Class: {class_name}, Confidence: {conf:.2f}")
-
-                        cv2.rectangle(processed_image, (b[0], b[1]), (b[2], b[3]),
-                                      (0, 0, 255), 2)
-
-                        cross_size = 5
-                        cv2.line(processed_image,
-                               (center_x - cross_size, center_y),
-                               (center_x + cross_size, center_y),
-                               (0, 0, 255), 2)
-                        cv2.line(processed_image,
-                               (center_x, center_y - cross_size),
-                               (center_x, center_y + cross_size),
-                               (0, 0, 255), 2)
-
-                        label = f"{class_name} ({center_x},{center_y}) {conf:.2f}"
-                        cv2.putText(
-                            processed_image,
-                            label,
-                            (b[0], max(b[1] - 10, 20)),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.6,
-                            (0, 0, 255),
-                            2
-                        )
-
-            if not detections_found:
-                print("No detections found in this image")
-                text = f"No objects detected (conf>{self.model.conf:.2f})"
-                text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)[0]
-                text_x = (processed_image.shape[1] - text_size[0]) // 2
-                text_y = (processed_image.shape[0] + text_size[1]) // 2
-                cv2.putText(
-                    processed_image,
-                    text,
-                    (text_x, text_y),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1.0,
-                    (0, 0, 255),
-                    2
-                )
-
+            detections = self.detect(image, imgsz=imgsz)
         except (RuntimeError, OSError, ValueError) as e:
-            print(f"Error during prediction: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Error during prediction: %s", e)
             return image
 
-        return processed_image
+        # Debug records are only built when debug logging is actually enabled
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Detected %d object(s) in %s image at confidence %.2f",
+                         len(detections), image.shape, self.model.conf,
+                         extra={"detections": len(detections), "conf": self.model.conf})
+            for b, (center_x, center_y, class_name, conf) in zip(detections.boxes.tolist(),
+                                                                 detections):
+                logger.debug("Box: %s, Center: (%d, %d), Class: %s, Confidence: %.2f",
+                             b, center_x, center_y, class_name, conf)
+
+        if not render:
+            return image
+        return self.render_overlay(image, detections)
+
+    def predict_batch(self, images_or_paths, batch_size=8, render=False):
+        """Predict on several images, sending up to batch_size of them through YOLO at once.
+
+        Returns one (image, detections) tuple per input, in input order. The image is
+        annotated if render is True and the unchanged input otherwise. Unlike predict,
+        this does not touch self.detected_centers.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+        items = list(images_or_paths)
+        logger.debug("Batch detection on %d image(s), batch size %d, confidence threshold %.2f",
+                     len(items), batch_size, self.model.conf)
+
+        outputs = []
+        for start in range(0, len(items), batch_size):
+            images = [self._read_image(item) for item in items[start:start + batch_size]]
+            if any(self._use_tiling(image) for image in images):
+                # Large images are already split into a batch of tiles each
+                for image in images:
+                    detections = self._detect_tiled(image)
+                    if render:
+                        image = self.render_overlay(image, detections)
+                    outputs.append((image, detections))
+                continue
+            results = self.model.predict(images, conf=self.model.conf, verbose=False)
+            for image, r in zip(images, results):
+                extract_start = time.perf_counter()
+                detections = Detections.from_yolo(r, image.shape, self.model.names)
+                self._record_speed(r, (time.perf_counter() - extract_start) * 1000.0)
+                if render:
+                    image = self.render_overlay(image, detections)
+                outputs.append((image, detections))
+        return outputs
+
+    def predict_stream(self, source, batch_size=1, max_prefetch=2, render=False):
+        """Yield (frame_index, image, detections) for every frame of a source.
+
+        The source can be a video file, an image directory or a glob pattern. The next
+        frames are decoded on a background thread while the current ones are inferred,
+        and at most max_prefetch + batch_size frames are held in memory at once.
+        """
+        frames = FramePrefetcher(iter_frames(source), max_prefetch=max_prefetch)
+        try:
+            batch = []
+            for item in frames:
+                batch.append(item)
+                if len(batch) == batch_size:
+                    yield from self._predict_indexed(batch, render)
+                    batch = []
+            if batch:
+                yield from self._predict_indexed(batch, render)
+        finally:
+            frames.stop()
+
+    def _predict_indexed(self, batch, render):
+        """Runs predict_batch on (frame_index, frame) pairs and yields indexed results."""
+        outputs = self.predict_batch([frame for _, frame in batch], batch_size=len(batch),
+                                     render=render)
+        for (index, _), (image, detections) in zip(batch, outputs):
+            yield index, image, detections
+
+    def _read_image(self, image):
+        """Returns the image itself, or reads it from disk if a path is given."""
+        if image is None:
+            raise ValueError("No image given for prediction.")
+        if not isinstance(image, str):
+            return image
+        logger.debug("Loading image from path: %s", image)
+        loaded = cv2.imread(image)
+        if loaded is None:
+            raise ValueError(f"Image not found or invalid image path: {image}")
+        return loaded
+
+    def _use_tiling(self, image):
+        """Whether the image is large enough to be split into tiles."""
+        return self.tile_size is not None and max(image.shape[:2]) > self.tile_size
+
+    def _detect_tiled(self, image, conf=None):
+        """Runs inference on overlapping tiles of the image and merges the boxes.
+
+        Tiles are views into the image and inferred at their native resolution in
+        batches of tile_batch_size, so small plants are not lost to downscaling and only
+        one batch of tiles is converted to model input at a time. conf defaults to the
+        model's confidence threshold.
+        """
+        if conf is None:
+            conf = self.model.conf
+        height, width = image.shape[:2]
+        tile = self.tile_size
+        origins = tile_origins(width, height, tile, self.tile_overlap)
+        parts = []
+        part_origins = []
+        with self.stats.time("inference"):
+            for start in range(0, len(origins), self.tile_batch_size):
+                batch_origins = origins[start:start + self.tile_batch_size]
+                tiles = [image[y:y + tile, x:x + tile] for x, y in batch_origins]
+                results = self.model.predict(tiles, conf=conf,
+                                             verbose=False, imgsz=tile)
+                for (x, y), r in zip(batch_origins, results):
+                    boxes = getattr(r, "boxes", None)
+                    if boxes is None or len(boxes) == 0:
+                        continue
+                    # Rows are (x1, y1, x2, y2, conf, cls) in tile coordinates
+                    data = boxes.data.cpu().numpy().astype(np.float32)
+                    data[:, [0, 2]] += x
+                    data[:, [1, 3]] += y
+                    parts.append(data)
+                    part_origins.append(np.tile([x, y], (len(data), 1)))
+
+        if not parts:
+            return Detections.empty(self.model.names)
+        with self.stats.time("postprocess"):
+            data = np.concatenate(parts)
+            boxes, scores, class_ids = merge_boxes(data[:, :4], data[:, 4],
+                                                   data[:, 5].astype(np.int32),
+                                                   self.tile_merge, self.model.iou,
+                                                   np.concatenate(part_origins), tile,
+                                                   (width, height))
+            boxes = np.clip(boxes.astype(np.int32), 0,
+                            [width - 1, height - 1, width - 1, height - 1])
+            return Detections(boxes, class_ids, scores, self.model.names)
+
+    def _to_detections(self, results, image_shape):
+        """Returns the Detections of a single-image YOLO prediction."""
+        if not results:
+            return Detections.empty(self.model.names)
+        return Detections.from_yolo(results[0], image_shape, self.model.names)
+
+    def _record_speed(self, result, extraction_ms):
+        """Records the stage timings YOLO measured for one result."""
+        speed = getattr(result, "speed", None)
+        if not isinstance(speed, dict):
+            return
+        self.stats.record("preprocess", speed.get("preprocess") or 0.0)
+        self.stats.record("inference", speed.get("inference") or 0.0)
+        self.stats.record("postprocess", (speed.get("postprocess") or 0.0) + extraction_ms)
+
+    def render_overlay(self, image, detections, threshold=None):
+        """Returns a copy of the image with boxes, center crosses and labels drawn on it.
+
+        threshold is the confidence shown when nothing was detected, the model's by default.
+        """
+        start = time.perf_counter()
+        image = image.copy()
+        for b, (center_x, center_y, class_name, conf) in zip(detections.boxes.tolist(),
+                                                             detections):
+            cv2.rectangle(image, (b[0], b[1]), (b[2], b[3]), (0, 0, 255), 2)
+
+            cross_size = 5
+            cv2.line(image,
+                   (center_x - cross_size, center_y),
+                   (center_x + cross_size, center_y),
+                   (0, 0, 255), 2)
+            cv2.line(image,
+                   (center_x, center_y - cross_size),
+                   (center_x, center_y + cross_size),
+                   (0, 0, 255), 2)
+
+            label = f"{class_name} ({center_x},{center_y}) {conf:.2f}"
+            cv2.putText(
+                image,
+                label,
+                (b[0], max(b[1] - 10, 20)),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.6,
+                (0, 0, 255),
+                2
+            )
+
+        if not detections:
+            if threshold is None:
+                threshold = self.model.conf
+            text = f"No objects detected (conf>{threshold:.2f})"
+            text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)[0]
+            text_x = (image.shape[1] - text_size[0]) // 2
+            text_y = (image.shape[0] + text_size[1]) // 2
+            cv2.putText(
+                image,
+                text,
+                (text_x, text_y),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                1.0,
+                (0, 0, 255),
+                2
+            )
+        self.stats.record("render", (time.perf_counter() - start) * 1000.0)
+        return image
 
     def train(self, train_data_path, epochs=50):
         """Train the YOLO model with provided training data."""
@@ -0,0 +1,51 @@
+"""Cheap change detection in front of the detection model.
+
+This module contains the MotionGate class, which compares small grayscale
+thumbnails of the camera frames so that inference can be skipped while the
+scene does not change, e.g. when the robot stands still over bare soil.
+"""
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decides whether a frame changed enough since the last inferred frame.
+
+    Frames are reduced to a size thumbnail in grayscale and compared with the
+    thumbnail of the last frame that was let through by their mean absolute
+    difference in grey levels. Comparing with that frame instead of the previous
+    one also catches slow drifts. After max_skips skipped frames in a row a
+    frame is always let through.
+    """
+    def __init__(self, threshold=4.0, size=(64, 48), max_skips=30):
+        if threshold < 0:
+            raise ValueError(f"threshold must not be negative, got {threshold}")
+        self.threshold = threshold
+        self.size = size
+        self.max_skips = max_skips
+        self.skipped = 0
+        self._reference = None
+        self._skips_in_row = 0
+
+    def thumbnail(self, frame):
+        """Returns the small grayscale version of a frame used for the comparison."""
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+
+    def changed(self, frame):
+        """True if the frame needs inference; it then becomes the new reference."""
+        thumbnail = self.thumbnail(frame)
+        if (self._reference is not None and self._skips_in_row < self.max_skips
+                and float(np.mean(cv2.absdiff(thumbnail, self._reference))) <= self.threshold):
+            self._skips_in_row += 1
+            self.skipped += 1
+            return False
+        self._reference = thumbnail
+        self._skips_in_row = 0
+        return True
+
+    def reset(self):
+        """Forgets the reference frame, so the next frame is always let through."""
+        self._reference = None
+        self._skips_in_row = 0
@@ -0,0 +1,203 @@
+"""Multi-camera ingestion feeding one shared detection model.
+
+This module contains the MultiCameraScheduler class. Every capture source
+(a device index, a video file or a stream URL) is read on its own thread,
+and a single scheduler thread collects the newest frame of each camera in
+round-robin order and runs them through the model as one batch, so all
+cameras share one copy of the weights. Per-camera frame rate and lag are
+tracked in CameraStats.
+"""
+import collections
+import logging
+import math
+import threading
+import time
+import cv2
+import numpy as np
+from app.capture import LatestFrameCapture
+
+logger = logging.getLogger(__name__)
+
+# How long the scheduler sleeps when no camera has a new frame
+POLL_INTERVAL = 0.005
+
+
+def parse_sources(spec):
+    """Splits a comma-separated source list; plain numbers become device indices."""
+    sources = []
+    for item in spec.split(","):
+        item = item.strip()
+        if item:
+            sources.append(int(item) if item.isdigit() else item)
+    if not sources:
+        raise ValueError(f"No camera sources in {spec!r}")
+    return sources
+
+
+def open_source(source):
+    """Opens a capture source and reads it on its own thread as a LatestFrameCapture."""
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        cap.release()
+        raise ValueError(f"Could not open camera source: {source}")
+    return LatestFrameCapture(cap)
+
+
+def tile_frames(frames, size=None):
+    """Arranges frames in a near-square grid of equal cells; None leaves a cell black.
+
+    size is the (width, height) of the whole mosaic and defaults to the size of the
+    first frame, so the mosaic costs about as much to display as a single camera.
+    """
+    present = [frame for frame in frames if frame is not None]
+    if not present:
+        raise ValueError("No frames to tile")
+    columns = math.ceil(math.sqrt(len(frames)))
+    rows = math.ceil(len(frames) / columns)
+    width, height = size or (present[0].shape[1], present[0].shape[0])
+    cell_width, cell_height = width // columns, height // rows
+    mosaic = np.zeros((cell_height * rows, cell_width * columns, 3), dtype=np.uint8)
+    for index, frame in enumerate(frames):
+        if frame is None:
+            continue
+        row, column = divmod(index, columns)
+        mosaic[row * cell_height:(row + 1) * cell_height,
+               column * cell_width:(column + 1) * cell_width] = cv2.resize(
+                   frame, (cell_width, cell_height), interpolation=cv2.INTER_AREA)
+    return mosaic
+
+
+class CameraStats:
+    """Frame rate and lag of the frames of one camera that went through the model.
+
+    Lag is the time from grabbing a frame to having its detections. Both are
+    computed over the last window frames.
+    """
+    def __init__(self, source, window=30):
+        self.source = source
+        self.frames = 0
+        self._done_times = collections.deque(maxlen=window)
+        self._lags = collections.deque(maxlen=window)
+
+    def record(self, grabbed_at, done_at):
+        """Adds a frame grabbed at grabbed_at whose detections were ready at done_at."""
+        self.frames += 1
+        self._done_times.append(done_at)
+        self._lags.append(done_at - grabbed_at)
+
+    @property
+    def fps(self):
+        """Detected frames per second."""
+        if len(self._done_times) < 2:
+            return 0.0
+        elapsed = self._done_times[-1] - self._done_times[0]
+        return (len(self._done_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def lag_ms(self):
+        """Mean lag in milliseconds."""
+        return 1000.0 * sum(self._lags) / len(self._lags) if self._lags else 0.0
+
+
+class MultiCameraScheduler:
+    """Runs the frames of several cameras through one model in shared batches.
+
+    captures are opened sources with the LatestFrameCapture interface. Each round the
+    scheduler takes the newest unread frame of up to batch_size cameras, starting one
+    camera later than the previous round so that no camera is starved when there are
+    more cameras than batch slots, and calls on_results with a list of
+    (camera_index, frame, detections) for the batch. Stale frames are dropped by the
+    captures, so a slow model lowers the frame rate but never builds up lag.
+    """
+    def __init__(self, model, captures, sources=None, batch_size=None, on_results=None):
+        if not captures:
+            raise ValueError("At least one camera is needed")
+        self.model = model
+        self.captures = list(captures)
+        sources = sources if sources is not None else range(len(self.captures))
+        self.stats = [CameraStats(source) for source in sources]
+        self.batch_size = batch_size or len(self.captures)
+        if self.batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {self.batch_size}")
+        self.on_results = on_results
+        self.running = False
+        self._next = 0
+        self._thread = None
+
+    @classmethod
+    def open(cls, model, sources, batch_size=None, on_results=None):
+        """Opens every source and returns a scheduler over them."""
+        captures = []
+        try:
+            for source in sources:
+                captures.append(open_source(source))
+        except ValueError:
+            for capture in captures:
+                capture.release()
+            raise
+        return cls(model, captures, sources, batch_size, on_results)
+
+    def start(self):
+        """Starts the scheduler thread."""
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="multicam", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops scheduling and releases all cameras."""
+        self.running = False
+        if (self._thread is not None and self._thread.is_alive()
+                and threading.current_thread() != self._thread):
+            self._thread.join()
+        for capture in self.captures:
+            capture.release()
+        logger.info("Cameras stopped: %s", self.format_stats())
+
+    def next_batch(self):
+        """Returns (camera_index, frame, grabbed_at) for the cameras that have a new frame.
+
+        Cameras are visited round-robin; each contributes at most one frame.
+        """
+        count = len(self.captures)
+        batch = []
+        for offset in range(count):
+            index = (self._next + offset) % count
+            ret, frame = self.captures[index].read(timeout=0)
+            if ret:
+                batch.append((index, frame, self.captures[index].frame_time))
+                if len(batch) == self.batch_size:
+                    break
+        self._next = (self._next + 1) % count
+        return batch
+
+    def _run(self):
+        """Scheduler loop; ends when stopped or when every source has ended."""
+        while self.running:
+            batch = self.next_batch()
+            if not batch:
+                if not any(capture.isOpened() for capture in self.captures):
+                    logger.info("All camera sources ended")
+                    break
+                time.sleep(POLL_INTERVAL)
+                continue
+            try:
+                outputs = self.model.predict_batch([frame for _, frame, _ in batch],
+                                                   batch_size=len(batch), render=False)
+            except (RuntimeError, OSError, ValueError) as e:
+                logger.warning("Error processing camera frames: %s", e)
+                continue
+            done_at = time.monotonic()
+            results = []
+            for (index, frame, grabbed_at), (_, detections) in zip(batch, outputs):
+                self.stats[index].record(grabbed_at, done_at)
+                results.append((index, frame, detections))
+            if self.on_results is not None:
+                self.on_results(results)
+        self.running = False
+
+    def format_stats(self):
+        """One line per camera with its frame rate, lag and dropped frames."""
+        return "\n".join(
+            f"Camera {stats.source}: {stats.fps:.1f} fps, lag {stats.lag_ms:.0f} ms, "
+            f"{capture.dropped_frames} dropped"
+            for stats, capture in zip(self.stats, self.captures))
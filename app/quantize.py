@@ -0,0 +1,134 @@
+"""Accuracy and latency check for the INT8 quantized weed detection model.
+
+Exports the trained weights to an INT8 OpenVINO model, calibrated on the
+images of the dataset, and reports its mAP and per-image latency next to
+the FP32 models, so it can be decided whether the quantized model is good
+enough for the embedded boards.
+
+Usage:
+    python -m app.quantize [--data data/data.yaml] [--weights PATH] [--images N]
+"""
+import argparse
+import logging
+import sys
+import time
+import numpy as np
+from ultralytics.data.utils import check_det_dataset
+from app.capture import iter_frames
+from app.log import configure_logging
+from app.model import DEFAULT_CALIBRATION_DATA, WeedDetectorModel
+
+logger = logging.getLogger(__name__)
+
+# (label, backend, int8)
+VARIANTS = (
+    ("FP32 PyTorch", "pytorch", False),
+    ("FP32 OpenVINO", "openvino", False),
+    ("INT8 OpenVINO", "openvino", True),
+)
+
+
+def load_sample_images(data, num_images):
+    """Returns up to num_images images of the dataset's validation split."""
+    dataset = check_det_dataset(data)
+    images = []
+    for _, frame in iter_frames(str(dataset["val"])):
+        images.append(frame)
+        if len(images) >= num_images:
+            break
+    if not images:
+        raise ValueError(f"No validation images found for {data}")
+    return images
+
+
+def measure_latency(model, images, warmup=2):
+    """Returns the median single-image detection latency in milliseconds."""
+    for image in images[:warmup]:
+        model.detect(image)
+    timings = []
+    for image in images:
+        start = time.perf_counter()
+        model.detect(image)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.median(timings))
+
+
+def evaluate_variant(label, backend, int8, data, images, model_path=None):
+    """Evaluates one model variant; returns None if it could not be loaded."""
+    kwargs = {"backend": backend, "int8": int8, "calibration_data": data}
+    if model_path:
+        kwargs["model_path"] = model_path
+    model = WeedDetectorModel(**kwargs)
+    precision = "int8" if int8 else "fp32"
+    if (model.backend, model.precision) != (backend, precision):
+        logger.warning("Skipping %s, the model fell back to %s %s", label, model.backend,
+                       model.precision)
+        return None
+
+    metrics = model.evaluate(data)
+    return {
+        "variant": label,
+        "map50": float(metrics.box.map50),
+        "map50_95": float(metrics.box.map),
+        "latency_ms": measure_latency(model, images),
+    }
+
+
+def compare_precisions(data=DEFAULT_CALIBRATION_DATA, model_path=None, num_images=50):
+    """Evaluates all VARIANTS on the dataset and returns one result dict per variant."""
+    images = load_sample_images(data, num_images)
+    rows = []
+    for label, backend, int8 in VARIANTS:
+        row = evaluate_variant(label, backend, int8, data, images, model_path)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def format_report(rows):
+    """Formats the comparison as a table with the INT8 deltas against each FP32 variant."""
+    lines = [f"{'Variant':<16}{'mAP50':>8}{'mAP50-95':>10}{'Latency':>12}"]
+    for row in rows:
+        lines.append(f"{row['variant']:<16}{row['map50']:>8.3f}{row['map50_95']:>10.3f}"
+                     f"{row['latency_ms']:>9.1f} ms")
+
+    int8_rows = [row for row in rows if row["variant"].startswith("INT8")]
+    for int8_row in int8_rows:
+        for row in rows:
+            if row is int8_row:
+                continue
+            speedup = row["latency_ms"] / int8_row["latency_ms"]
+            lines.append(f"{int8_row['variant']} vs {row['variant']}: "
+                         f"mAP50-95 {int8_row['map50_95'] - row['map50_95']:+.3f}, "
+                         f"{speedup:.2f}x speed")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    """Parses the command line arguments of the quantization check."""
+    parser = argparse.ArgumentParser(
+        description="Compare the INT8 quantized model against the FP32 model.")
+    parser.add_argument("--data", default=DEFAULT_CALIBRATION_DATA,
+                        help="Dataset YAML used for calibration and validation")
+    parser.add_argument("--weights", default=None,
+                        help="Trained .pt weights, found automatically by default")
+    parser.add_argument("--images", type=int, default=50,
+                        help="Number of validation images used for the latency measurement")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Entry point of the quantization check."""
+    args = parse_args(argv)
+    configure_logging()
+    try:
+        rows = compare_precisions(args.data, args.weights, args.images)
+    except (ValueError, OSError, RuntimeError) as e:
+        logger.error("Quantization check failed: %s", e)
+        return 1
+    print(format_report(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,64 +1,194 @@
 """ Controller for a automation robot or that can be controlled via the gui."""
+import logging
+import queue
 import threading
 import time
+from app.motion import MotionGate
+from app.route import HOME_POSITION, ArmMotion, plan_route, route_length
+from app.tracking import WeedTracker
+
+logger = logging.getLogger(__name__)
 
 class Robot:
-    """Controller for the automation robot that can be controlled via the GUI."""
-    def __init__(self, gui, model):
+    """Controller for the automation robot that can be controlled via the GUI.
+
+    Driving runs as a two-stage pipeline: the drive thread keeps capturing and
+    detecting frames while the arm thread eliminates the weeds of an earlier frame.
+    Weeds are tracked across frames and every track is treated only once; with
+    detect_every > 1 only every n-th frame is run through the model.
+    """
+    def __init__(self, gui, model, drive_interval=0.5, detect_every=1, resolution=None):
+        if detect_every < 1:
+            raise ValueError(f"detect_every must be at least 1, got {detect_every}")
         self.gui = gui
         self.model = model
+        self.drive_interval = drive_interval # seconds between frames while driving
+        self.detect_every = detect_every
+        self.tracker = WeedTracker()
+        self.motion_gate = MotionGate()
+        self.resolution = resolution # optional ResolutionController for the frame budget
         self.is_running = False
         self.thread = None
+        self.arm_thread = None
+        # Holds at most the newest target list; None tells the arm thread to stop
+        self._targets = queue.Queue(maxsize=1)
+        # The drive thread and stop_robot both hand over; the swap must not interleave
+        self._hand_over_lock = threading.Lock()
+        self.eliminated = 0
+        self.motion = ArmMotion()
+        self.arm_position = HOME_POSITION
+
+    def _log(self, message):
+        """Write a robot action to the application log and the GUI's robot panel."""
+        self.gui.log_robot_action(message)
+        logger.info("%s", message, extra={"component": "robot"})
 
     def start_robot(self):
         """Start the robot."""
         self.is_running = True
-        self.gui.toggle_camera()
-        self.gui.log_robot_action("Robot started")
+        # The robot drives with the first camera
+        self.gui.toggle_camera(all_cameras=False)
+        self._log("Robot started")
+        self.tracker.reset()
+        self.motion_gate.reset()
+        self._targets = queue.Queue(maxsize=1)
+        self.arm_thread = threading.Thread(target=self.arm_loop, daemon=True)
+        self.arm_thread.start()
         self.thread = threading.Thread(target=self.drive_loop, daemon=True)
         self.thread.start()
 
     def stop_robot(self):
         """Stop the robot."""
         self.is_running = False
-        # only join the thread if it is alive and not the current thread
-        if self.thread and self.thread.is_alive() and threading.current_thread() != self.thread:
-            self.thread.join()
-        self.gui.toggle_camera()
-        self.gui.log_robot_action("Robot stopped")
+        self._hand_over(None)
+        # only join the threads if they are alive and not the current thread
+        for thread in (self.thread, self.arm_thread):
+            if thread and thread.is_alive() and threading.current_thread() != thread:
+                thread.join()
+        # The drive thread stops the robot itself when the camera fails, so the camera
+        # is switched off on the Tk thread
+        self.gui.call_soon(self._stop_camera)
+        self._log("Robot stopped")
+
+    def _stop_camera(self):
+        """Switches the camera off if it is still running; runs on the Tk thread."""
+        if self.gui.camera_running:
+            self.gui.toggle_camera()
 
     def drive_loop(self):
-        """Main loop for driving the robot."""
+        """Main loop for driving the robot.
+
+        Confirmed, untreated weed tracks are handed to the arm thread and the robot keeps
+        driving, so the next frame is captured and detected while the arm is still moving.
+        """
+        frame_index = 0
+        handed_over = set()
+        detections = None
         while self.is_running:
             # Simulate driving logic
-            self.gui.log_robot_action("Robot is driving forward...")
+            self._log("Robot is driving forward...")
             ret, frame = self.gui.cap.read()
             if not ret:
-                self.gui.log_robot_action("Failed to read from camera")
+                self._log("Failed to read from camera")
                 self.stop_robot()
                 break
 
-            # Simulate processing the frame
-            processed_image, result, weed_coords = self.model.detect_weeds(frame)
-            self.gui.display_image(processed_image)
-            self.gui.update_results(result)
+            if frame_index % self.detect_every != 0:
+                # Frames between detections only move the tracks along their motion
+                self.tracker.predict()
+                self.gui.display_frame(frame)
+            elif not self.motion_gate.changed(frame) and detections is not None:
+                # The scene did not change, so the last detections still hold
+                self.model.stats.increment("skipped_inference")
+                self.tracker.update(detections)
+                self.gui.display_frame(self.model.render_overlay(frame, detections))
+            else:
+                # Simulate processing the frame; a failed detection is retried next frame
+                detections = self._detect(frame)
+                if detections is None:
+                    self.gui.display_frame(frame)
+                else:
+                    self.gui.display_frame(self.model.render_overlay(frame, detections))
+                    self.gui.update_results(self.model.format_detections(detections))
+                    self.tracker.update(detections)
+            frame_index += 1
+
+            targets = self.tracker.untreated_targets()
+            track_ids = {track_id for track_id, _, _ in targets}
+            if targets and track_ids != handed_over:
+                self._log(f"{len(targets)} weed(s) detected, handing them to the arm...")
+                self._hand_over(targets)
+                handed_over = track_ids
+            time.sleep(self.drive_interval)
 
-            if "weed" in result.lower() and weed_coords:
-                self.gui.log_robot_action("Weed detected, wait for robot to eliminate weeds...")
-                for x, y in weed_coords:
-                    self.eliminate_weeds(x, y)
+    def arm_loop(self):
+        """Arm stage of the pipeline: eliminates the newest (track_id, x, y) list it is given."""
+        while True:
+            targets = self._targets.get()
+            if targets is None:
                 break
-            time.sleep(0.5)
+            # Tracks treated while this list was waiting are skipped
+            targets = [t for t in targets if not self.tracker.is_treated(t[0])]
+            if targets:
+                self.eliminate_all([(x, y) for _, x, y in targets],
+                                   [track_id for track_id, _, _ in targets])
+
+    def _detect(self, frame):
+        """Returns the Detections of the frame, or None if the model failed.
+
+        Uses the input size of the frame-time budget if there is one. The returned
+        Detections belong to this frame only, unlike model.detected_centers, which
+        every caller of the shared model overwrites.
+        """
+        try:
+            if self.resolution is None:
+                return self.model.detect(frame)
+            return self.resolution.measure(self.model.detect, frame)
+        except (RuntimeError, OSError, ValueError) as e:
+            logger.warning("Error detecting weeds while driving: %s", e)
+            return None
+
+    def _hand_over(self, weed_coords):
+        """Passes targets to the arm thread, replacing targets it has not started on.
+
+        Targets still waiting are from an older frame and lie behind the moving robot.
+        The arm thread only takes from the queue, so under the lock the put always fits.
+        """
+        with self._hand_over_lock:
+            try:
+                self._targets.get_nowait()
+            except queue.Empty:
+                pass
+            self._targets.put_nowait(weed_coords)
+
+    def eliminate_all(self, weed_coords, track_ids=None):
+        """Eliminate all given weeds, visiting them in the order with the shortest travel.
+
+        Stops after the current weed when the robot is stopped. If track_ids are given,
+        every eliminated weed's track is marked as treated.
+        """
+        targets = list(weed_coords)
+        order = plan_route(targets, self.arm_position)
+        self._log(f"Planned route over {len(targets)} weed(s): "
+                  f"{route_length(targets, order, self.arm_position):.0f} px")
+        for index in order:
+            if not self.is_running:
+                break
+            self.eliminate_weeds(*targets[index])
+            if track_ids is not None:
+                self.tracker.mark_treated(track_ids[index])
 
     def eliminate_weeds(self, x_coord=None, y_coord=None):
         """Eliminate detected weeds."""
         if x_coord is not None and y_coord is not None:
-            self.gui.log_robot_action(f"Roboter arm is moving to ({x_coord}, {y_coord})")
-            time.sleep(1) # Simulate moving to the weed coordinates
-            self.gui.log_robot_action("Eliminating weed...")
+            self._log(f"Roboter arm is moving to ({x_coord}, {y_coord})")
+            distance = ((x_coord - self.arm_position[0]) ** 2
+                        + (y_coord - self.arm_position[1]) ** 2) ** 0.5
+            time.sleep(self.motion.move_time(distance)) # Simulate moving to the weed coordinates
+            self.arm_position = (x_coord, y_coord)
+            self._log("Eliminating weed...")
             time.sleep(1)
-            self.gui.log_robot_action("Weed eliminated.")
+            self.eliminated += 1
+            self._log("Weed eliminated.")
         else:
-            self.gui.log_robot_action("No weed coordinates provided, cannot eliminate weeds.")
-
-
+            self._log("No weed coordinates provided, cannot eliminate weeds.")
@@ -0,0 +1,97 @@
+"""Route planning for the weed elimination arm.
+
+This module orders the detected weed positions so that the arm travels as
+little as possible (nearest neighbour followed by 2-opt on a NumPy distance
+matrix) and contains the ArmMotion travel-time model.
+"""
+import math
+import numpy as np
+
+# Where the arm waits between runs, in image coordinates
+HOME_POSITION = (0, 0)
+
+
+class ArmMotion:
+    """Travel-time model of the arm with a speed limit and constant acceleration.
+
+    Short moves never reach max_speed (triangular velocity profile), longer ones
+    cruise at max_speed in between (trapezoidal profile). Distances are in pixels.
+    """
+    def __init__(self, max_speed=400.0, acceleration=1600.0):
+        if max_speed <= 0 or acceleration <= 0:
+            raise ValueError("max_speed and acceleration must be positive")
+        self.max_speed = max_speed
+        self.acceleration = acceleration
+
+    def move_time(self, distance):
+        """Seconds needed to move the given distance from standstill to standstill."""
+        if distance <= 0:
+            return 0.0
+        ramp_distance = self.max_speed ** 2 / self.acceleration
+        if distance < ramp_distance:
+            return 2.0 * math.sqrt(distance / self.acceleration)
+        return distance / self.max_speed + self.max_speed / self.acceleration
+
+
+def distance_matrix(points):
+    """Returns the (N, N) matrix of Euclidean distances between the rows of points."""
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    return np.linalg.norm(points[:, None, :] - points[None, :, :], axis=-1)
+
+
+def nearest_neighbour(distances):
+    """Greedy open route over a distance matrix that starts at index 0."""
+    count = len(distances)
+    visited = np.zeros(count, dtype=bool)
+    route = [0]
+    visited[0] = True
+    for _ in range(count - 1):
+        candidates = np.where(visited, np.inf, distances[route[-1]])
+        route.append(int(np.argmin(candidates)))
+        visited[route[-1]] = True
+    return np.array(route)
+
+
+def two_opt(route, distances, max_rounds=100):
+    """Improves an open route that starts at route[0] by reversing segments.
+
+    Reversing route[i:j + 1] replaces the edges (a, b) = (route[i - 1], route[i]) and
+    (c, d) = (route[j], route[j + 1]) by (a, c) and (b, d); the gain of all j for one
+    i is computed at once. The last stop has no outgoing edge.
+    """
+    route = np.array(route)
+    count = len(route)
+    for _ in range(max_rounds):
+        improved = False
+        for i in range(1, count - 1):
+            a, b = route[i - 1], route[i]
+            cs = route[i + 1:]
+            ds = np.append(route[i + 2:], -1)
+            old = distances[a, b] + np.where(ds >= 0, distances[cs, ds], 0.0)
+            new = distances[a, cs] + np.where(ds >= 0, distances[b, ds], 0.0)
+            gains = old - new
+            best = int(np.argmax(gains))
+            if gains[best] > 1e-9:
+                j = i + 1 + best
+                route[i:j + 1] = route[i:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return route
+
+
+def plan_route(targets, start=HOME_POSITION):
+    """Returns the indices of targets in the order the arm should visit them from start."""
+    targets = np.asarray(targets, dtype=float).reshape(-1, 2)
+    if len(targets) < 2:
+        return list(range(len(targets)))
+    distances = distance_matrix(np.vstack([start, targets]))
+    route = two_opt(nearest_neighbour(distances), distances)
+    return [int(index) - 1 for index in route[1:]]
+
+
+def route_length(targets, order, start=HOME_POSITION):
+    """Total travel distance when visiting targets in the given order from start."""
+    targets = np.asarray(targets, dtype=float).reshape(-1, 2)
+    path = np.vstack([start, targets[list(order)]])
+    return float(np.linalg.norm(np.diff(path, axis=0), axis=1).sum())
@@ -0,0 +1,271 @@
+"""HTTP inference service with dynamic micro-batching.
+
+Loads WeedDetectorModel once and serves detections over local HTTP, so
+cameras and tools can share one copy of the weights. Images from concurrent
+requests are gathered into micro-batches of up to --max-batch images, waiting
+at most --max-wait-ms for the batch to fill, and each batch is sent through
+the model in a single call.
+
+Usage:
+    python -m app.server [--host HOST] [--port PORT] [--max-batch N] [--max-wait-ms MS]
+
+POST /detect takes a raw image body (e.g. image/jpeg) or a multipart/form-data
+upload and returns {"width", "height", "detections": [{"class", "x", "y",
+"confidence"}]}. GET /health returns the request and batch counters.
+"""
+import argparse
+import email.parser
+import email.policy
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+from app.batch import detection_records
+from app.log import configure_logging
+from app.model import BACKENDS, WeedDetectorModel
+
+logger = logging.getLogger(__name__)
+
+# Largest accepted upload
+MAX_UPLOAD_BYTES = 32 * 1024 * 1024
+# How long a request waits for its batch before giving up
+REQUEST_TIMEOUT = 30.0
+
+
+class MicroBatcher:
+    """Gathers images submitted from many threads into batches for one model.
+
+    A batch is closed when it holds max_batch_size images or when max_wait_ms
+    passed since its first image arrived, whichever comes first. All batches run
+    on one worker thread, so the model is never called concurrently.
+    """
+    _STOP = object()
+
+    def __init__(self, model, max_batch_size=8, max_wait_ms=10.0):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        if max_wait_ms < 0:
+            raise ValueError(f"max_wait_ms must not be negative, got {max_wait_ms}")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        """Starts the worker thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="micro-batcher",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops the worker thread after the images already submitted."""
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, image):
+        """Queues an image; returns a Future that resolves to its Detections."""
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def _next_batch(self):
+        """Blocks for the first image, then gathers more until the batch is closed."""
+        first = self._queue.get()
+        if first is self._STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                # Finish this batch, then stop
+                self._queue.put(item)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        """Worker loop: runs each batch through the model and resolves its futures."""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            futures = [future for _, future in batch]
+            try:
+                outputs = self.model.predict_batch([image for image, _ in batch],
+                                                   batch_size=len(batch), render=False)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # The waiting requests get the error; the worker keeps serving
+                logger.exception("Batch of %d image(s) failed: %s", len(batch), e)
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            logger.debug("Ran a batch of %d image(s)", len(batch), extra={"batch": len(batch)})
+            for future, (_, detections) in zip(futures, outputs):
+                future.set_result(detections)
+
+
+def decode_upload(content_type, body):
+    """Returns the decoded image of a raw or multipart/form-data request body.
+
+    Raises ValueError if the body holds no decodable image.
+    """
+    if content_type.startswith("multipart/form-data"):
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body)
+        parts = [part for part in message.iter_parts() if part.get_filename()]
+        if not parts:
+            raise ValueError("Multipart request contains no file")
+        body = parts[0].get_payload(decode=True)
+    image = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Request body is not a decodable image")
+    return image
+
+
+class DetectionHandler(BaseHTTPRequestHandler):
+    """Handles the requests of one connection; the batcher is set on the server."""
+    server_version = "WeedDetector/1.0"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serves the health check."""
+        if self.path != "/health":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        batcher = self.server.batcher
+        self._send_json(200, {"status": "ok", "requests": batcher.requests,
+                              "batches": batcher.batches})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Detects weeds in the uploaded image."""
+        if self.path != "/detect":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        length = self._content_length()
+        if length is None:
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self._send_json(413, {"error": f"Upload larger than {MAX_UPLOAD_BYTES} bytes"})
+            return
+        try:
+            image = decode_upload(self.headers.get("Content-Type", ""), self.rfile.read(length))
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        try:
+            detections = self.server.batcher.submit(image).result(timeout=REQUEST_TIMEOUT)
+        except TimeoutError:
+            self._send_json(503, {"error": "Detection timed out"})
+            return
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self._send_json(500, {"error": f"Detection failed: {e}"})
+            return
+        height, width = image.shape[:2]
+        self._send_json(200, {"width": width, "height": height,
+                              "detections": detection_records(detections)})
+
+    def _content_length(self):
+        """Returns the request's Content-Length, or None after answering a missing or bad one."""
+        header = self.headers.get("Content-Length")
+        if header is None:
+            self._send_json(411, {"error": "Content-Length required"})
+            return None
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": f"Invalid Content-Length {header!r}"})
+            return None
+        return length
+
+    def _send_json(self, status, payload):
+        """Writes a JSON response."""
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Sends the access log to the application log instead of stderr."""
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_server(model, host="127.0.0.1", port=8080, max_batch_size=8, max_wait_ms=10.0):
+    """Returns an HTTP server whose requests share one MicroBatcher over model.
+
+    The batcher is started here and available as server.batcher.
+    """
+    server = ThreadingHTTPServer((host, port), DetectionHandler)
+    server.daemon_threads = True
+    server.batcher = MicroBatcher(model, max_batch_size, max_wait_ms)
+    server.batcher.start()
+    return server
+
+
+def parse_args(argv=None):
+    """Parses the command line arguments of the server command."""
+    parser = argparse.ArgumentParser(description="Serve weed detections over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--max-batch", type=int, default=8,
+                        help="Most images sent through the model at once")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0,
+                        help="Longest time a batch waits to fill up")
+    parser.add_argument("--conf", type=float, default=0.15, help="Confidence threshold")
+    parser.add_argument("--backend", choices=BACKENDS, default="pytorch",
+                        help="Inference backend, onnx and openvino are faster on CPUs")
+    parser.add_argument("--int8", action="store_true",
+                        help="Use the INT8 quantized model (requires --backend openvino)")
+    args = parser.parse_args(argv)
+    if args.max_batch < 1 or args.max_wait_ms < 0:
+        parser.error("--max-batch must be at least 1 and --max-wait-ms not negative")
+    if args.int8 and args.backend != "openvino":
+        parser.error("--int8 requires --backend openvino")
+    return args
+
+
+def main(argv=None):
+    """Entry point of the detection server."""
+    args = parse_args(argv)
+    configure_logging()
+    model = WeedDetectorModel(backend=args.backend, int8=args.int8)
+    model.model.conf = args.conf
+    try:
+        server = create_server(model, args.host, args.port, args.max_batch, args.max_wait_ms)
+    except OSError as e:
+        logger.error("Could not listen on %s:%d: %s", args.host, args.port, e)
+        return 1
+    logger.info("Serving detections on http://%s:%d (batches of up to %d, %.0f ms wait)",
+                args.host, server.server_address[1], args.max_batch, args.max_wait_ms)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""Shared-memory frame transport to a separate inference process.
+
+Capture, drawing and Tk display stay in the GUI process while the model
+runs in its own process, so they no longer compete for one GIL. Frames are
+copied into a ring of preallocated multiprocessing.shared_memory slots;
+only small (slot, shape, settings) messages and the detection arrays are
+pickled, never the frames themselves.
+"""
+import itertools
+import logging
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from app.model import WeedDetectorModel
+
+logger = logging.getLogger(__name__)
+
+# Room for one 1080p BGR frame per slot
+DEFAULT_SLOT_BYTES = 1920 * 1080 * 3
+# Frames in flight before the camera thread waits for a result
+PIPELINE_DEPTH = 2
+# How long to wait for the model to load, and for a frame's result
+START_TIMEOUT = 120.0
+RESULT_TIMEOUT = 30.0
+
+
+class FrameRing:
+    """Fixed slots of slot_bytes each in one shared memory block.
+
+    The creating process owns the block and unlinks it; other processes attach
+    to it by name. Which slots are free is tracked by the owner.
+    """
+    def __init__(self, slots, slot_bytes=DEFAULT_SLOT_BYTES, name=None):
+        if slots < 1 or slot_bytes < 1:
+            raise ValueError("slots and slot_bytes must be at least 1")
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner,
+                                                 size=slots * slot_bytes)
+
+    @property
+    def name(self):
+        """Name other processes attach with."""
+        return self.memory.name
+
+    def view(self, slot, shape, dtype=np.uint8):
+        """Returns a NumPy array of the given shape on top of a slot, without copying."""
+        dtype = np.dtype(dtype)
+        if int(np.prod(shape)) * dtype.itemsize > self.slot_bytes:
+            raise ValueError(f"Frame of shape {shape} does not fit into "
+                             f"{self.slot_bytes} byte slots")
+        return np.ndarray(shape, dtype=dtype, buffer=self.memory.buf,
+                          offset=slot * self.slot_bytes)
+
+    def write(self, slot, frame):
+        """Copies a frame into a slot."""
+        self.view(slot, frame.shape, frame.dtype)[...] = frame
+
+    def close(self):
+        """Detaches from the block; the owner also frees it."""
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def _inference_worker(ring_name, slots, slot_bytes, requests, results, model_factory,
+                      model_args, tiling):
+    """Process main: loads the model once and detects the frames announced on requests.
+
+    Requests are (seq, slot, shape, dtype, conf, imgsz), ("resize", ring_name, slot_bytes)
+    to attach to a larger ring, or None to stop. Every frame request is answered with
+    (seq, detections, inference_ms, error) on results.
+    """
+    ring = FrameRing(slots, slot_bytes, name=ring_name)
+    try:
+        model = model_factory(**model_args)
+        if tiling:
+            model.configure_tiling(**tiling)
+    except (OSError, RuntimeError, ValueError) as e:
+        results.put(("error", str(e)))
+        ring.memory.close()
+        return
+    results.put(("ready", None))
+    try:
+        for request in iter(requests.get, None):
+            if request[0] == "resize":
+                # Requests are handled in order, so no frame of the old ring is left
+                ring.memory.close()
+                ring = FrameRing(slots, request[2], name=request[1])
+                continue
+            seq, slot, shape, dtype, conf, imgsz = request
+            start = time.perf_counter()
+            try:
+                model.model.conf = conf
+                detections = model.detect(ring.view(slot, shape, dtype), imgsz=imgsz)
+            except (OSError, RuntimeError, ValueError) as e:
+                results.put((seq, None, 0.0, str(e)))
+                continue
+            results.put((seq, detections, (time.perf_counter() - start) * 1000.0, None))
+    finally:
+        ring.memory.close()
+
+
+class InferenceProcess:
+    """Runs the detection model in a child process fed through a FrameRing.
+
+    submit() copies a frame into a free slot and returns at once; result() returns
+    the frames in submission order together with their Detections. If all slots are
+    in flight, new frames are dropped and counted in dropped_frames. A frame larger than
+    slot_bytes grows the ring to its size once the frames in flight are done; until then
+    it is dropped as well. The child builds
+    its model as model_factory(**model_args) and passes tiling to configure_tiling().
+    """
+    def __init__(self, slots=4, slot_bytes=DEFAULT_SLOT_BYTES, model_args=None, tiling=None,
+                 model_factory=WeedDetectorModel):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.model_factory = model_factory
+        self.model_args = model_args or {}
+        self.tiling = tiling
+        self.dropped_frames = 0
+        self.ring = None
+        self.process = None
+        self._requests = None
+        self._results = None
+        self._free = []
+        self._in_flight = {}  # seq -> (slot, shape, dtype)
+        self._seq = itertools.count()
+
+    @property
+    def pending(self):
+        """Number of submitted frames without a result yet."""
+        return len(self._in_flight)
+
+    def start(self):
+        """Starts the child process and waits until its model is loaded."""
+        ctx = multiprocessing.get_context("spawn")
+        self.ring = FrameRing(self.slots, self.slot_bytes)
+        self._free = list(range(self.slots))
+        self._requests = ctx.Queue()
+        self._results = ctx.Queue()
+        self.process = ctx.Process(
+            target=_inference_worker, name="inference", daemon=True,
+            args=(self.ring.name, self.slots, self.slot_bytes, self._requests, self._results,
+                  self.model_factory, self.model_args, self.tiling))
+        self.process.start()
+        try:
+            status, error = self._results.get(timeout=START_TIMEOUT)
+        except queue.Empty:
+            status, error = "error", "timed out loading the model"
+        if status != "ready":
+            self.stop()
+            raise RuntimeError(f"Inference process failed to start: {error}")
+        logger.info("Inference process %d started with %d shared frame slots",
+                    self.process.pid, self.slots)
+
+    def submit(self, frame, conf, imgsz=None):
+        """Hands a frame to the child process; returns its sequence number or None if dropped."""
+        if frame.nbytes > self.slot_bytes:
+            if self._in_flight:
+                # The child may still be reading the old slots
+                self.dropped_frames += 1
+                return None
+            self._grow_ring(frame.nbytes)
+        if not self._free:
+            self.dropped_frames += 1
+            return None
+        slot = self._free.pop()
+        self.ring.write(slot, frame)
+        seq = next(self._seq)
+        self._in_flight[seq] = (slot, frame.shape, frame.dtype.str)
+        self._requests.put((seq, slot, frame.shape, frame.dtype.str, conf, imgsz))
+        return seq
+
+    def _grow_ring(self, slot_bytes):
+        """Replaces the ring with one of slot_bytes slots; nothing may be in flight."""
+        old_ring = self.ring
+        self.ring = FrameRing(self.slots, slot_bytes)
+        self.slot_bytes = slot_bytes
+        self._free = list(range(self.slots))
+        self._requests.put(("resize", self.ring.name, slot_bytes))
+        old_ring.close()
+        logger.info("Shared frame slots grown to %d bytes", slot_bytes)
+
+    def result(self, timeout=RESULT_TIMEOUT):
+        """Returns (frame, detections, inference_ms) of the oldest submitted frame.
+
+        Returns None if nothing is in flight or no result arrived within timeout
+        (0 polls). Raises RuntimeError if the frame could not be detected.
+        """
+        if not self._in_flight:
+            return None
+        try:
+            seq, detections, inference_ms, error = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        slot, shape, dtype = self._in_flight.pop(seq)
+        frame = self.ring.view(slot, shape, dtype).copy()
+        self._free.append(slot)
+        if error is not None:
+            raise RuntimeError(f"Inference failed: {error}")
+        return frame, detections, inference_ms
+
+    def stop(self):
+        """Stops the child process and frees the shared memory."""
+        if self.process is not None:
+            if self.process.is_alive():
+                self._requests.put(None)
+                self.process.join(timeout=5)
+                if self.process.is_alive():
+                    self.process.terminate()
+            self.process = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        self._in_flight.clear()
@@ -0,0 +1,173 @@
+"""Helpers for tiled (sliced) inference on high-resolution images.
+
+This module cuts large images into overlapping tiles and merges the boxes
+found in neighbouring tiles again, either with non-maximum suppression
+(NMS) or with weighted box fusion (WBF). All box operations work on whole
+NumPy arrays.
+"""
+import numpy as np
+
+MERGE_METHODS = ("nms", "wbf")
+# Distance in pixels within which a box counts as cut off by its tile edge
+EDGE_MARGIN = 2
+
+
+def tile_starts(length, tile_size, overlap):
+    """Returns the tile start offsets along one axis of the given length.
+
+    Neighbouring tiles overlap by the fraction overlap of tile_size, and the last
+    tile is aligned with the end so that every tile has the full size.
+    """
+    if not 0 <= overlap < 1:
+        raise ValueError(f"overlap must be in [0, 1), got {overlap}")
+    if length <= tile_size:
+        return [0]
+    stride = max(1, int(tile_size * (1 - overlap)))
+    starts = list(range(0, length - tile_size, stride))
+    starts.append(length - tile_size)
+    return starts
+
+
+def tile_origins(width, height, tile_size, overlap):
+    """Returns an (N, 2) array with the (x, y) origins of all tiles of an image."""
+    xs = tile_starts(width, tile_size, overlap)
+    ys = tile_starts(height, tile_size, overlap)
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    return np.stack([grid_x.ravel(), grid_y.ravel()], axis=1)
+
+
+def _intersection_and_areas(box, boxes):
+    """Intersection areas of one xyxy box with each row of boxes, and both box areas."""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection, area, areas
+
+
+def box_iou(box, boxes):
+    """IoU of one xyxy box with each row of an (N, 4) array of boxes."""
+    intersection, area, areas = _intersection_and_areas(box, boxes)
+    return intersection / np.maximum(area + areas - intersection, 1e-9)
+
+
+def box_ios(box, boxes):
+    """Intersection over the smaller area of one xyxy box with each row of boxes.
+
+    A plant cut off by a tile edge gives a truncated box that lies almost entirely
+    inside the full box of the neighbouring tile: its IoU with that box can be low,
+    but its IoS is close to 1.
+    """
+    intersection, area, areas = _intersection_and_areas(box, boxes)
+    return intersection / np.maximum(np.minimum(area, areas), 1e-9)
+
+
+def _clusters(boxes, scores, class_ids, iou_threshold):
+    """Greedily groups boxes of the same class that overlap the best remaining box.
+
+    Returns a list of index arrays, the first index of each being the highest score.
+    """
+    order = np.argsort(-scores, kind="stable")
+    clusters = []
+    while order.size:
+        best = order[0]
+        rest = order[1:]
+        overlapping = ((box_iou(boxes[best], boxes[rest]) > iou_threshold)
+                       & (class_ids[rest] == class_ids[best]))
+        clusters.append(np.concatenate([[best], rest[overlapping]]))
+        order = rest[~overlapping]
+    return clusters
+
+
+def nms(boxes, scores, class_ids, iou_threshold=0.5):
+    """Class-aware non-maximum suppression; returns the indices of the kept boxes."""
+    if len(boxes) == 0:
+        return np.empty(0, dtype=int)
+    clusters = _clusters(boxes, scores, class_ids, iou_threshold)
+    return np.array([cluster[0] for cluster in clusters], dtype=int)
+
+
+def weighted_box_fusion(boxes, scores, class_ids, iou_threshold=0.5):
+    """Fuses overlapping boxes of the same class into their score-weighted average.
+
+    Returns (boxes, scores, class_ids) of the fused boxes; the score of a fused box is
+    the best score of its cluster.
+    """
+    if len(boxes) == 0:
+        return boxes, scores, class_ids
+    clusters = _clusters(boxes, scores, class_ids, iou_threshold)
+    fused_boxes = np.array([
+        np.average(boxes[cluster], axis=0, weights=scores[cluster]) for cluster in clusters
+    ])
+    best = np.array([cluster[0] for cluster in clusters], dtype=int)
+    return fused_boxes, scores[best], class_ids[best]
+
+
+def seam_truncated(boxes, origins, tile_size, width, height, margin=EDGE_MARGIN):
+    """Mask of the boxes that end at an edge of their tile lying inside the image.
+
+    origins holds the (x, y) tile origin of each box. Such a box may be the visible
+    part of a plant that continues in the neighbouring tile.
+    """
+    left = (origins[:, 0] > 0) & (boxes[:, 0] <= origins[:, 0] + margin)
+    top = (origins[:, 1] > 0) & (boxes[:, 1] <= origins[:, 1] + margin)
+    right = ((origins[:, 0] + tile_size < width)
+             & (boxes[:, 2] >= origins[:, 0] + tile_size - margin))
+    bottom = ((origins[:, 1] + tile_size < height)
+              & (boxes[:, 3] >= origins[:, 1] + tile_size - margin))
+    return left | top | right | bottom
+
+
+def _join_seam_boxes(boxes, scores, class_ids, origins, truncated, threshold):
+    """Merges each truncated box into the same-class box of another tile that contains it.
+
+    The containing box is the one with the highest intersection over the smaller area,
+    if that is above threshold; it grows to enclose both and keeps the better score.
+    Smaller truncated boxes are joined first. Returns (boxes, scores, class_ids).
+    """
+    boxes = boxes.copy()
+    scores = scores.copy()
+    keep = np.ones(len(boxes), dtype=bool)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    for index in np.flatnonzero(truncated)[np.argsort(areas[truncated], kind="stable")]:
+        keep[index] = False
+        candidates = np.flatnonzero(keep & (class_ids == class_ids[index])
+                                    & np.any(origins != origins[index], axis=1))
+        if candidates.size:
+            ios = box_ios(boxes[index], boxes[candidates])
+            if ios.max() > threshold:
+                target = candidates[np.argmax(ios)]
+                boxes[target, :2] = np.minimum(boxes[target, :2], boxes[index, :2])
+                boxes[target, 2:] = np.maximum(boxes[target, 2:], boxes[index, 2:])
+                scores[target] = max(scores[target], scores[index])
+                continue
+        keep[index] = True
+    return boxes[keep], scores[keep], class_ids[keep]
+
+
+def merge_boxes(boxes, scores, class_ids, method="nms", threshold=0.5, origins=None,
+                tile_size=None, image_size=None):
+    """Merges duplicate boxes along tile seams with the given method.
+
+    With origins (the tile origin of each box), tile_size and the (width, height)
+    image_size, a box cut off by an inner tile edge is first joined with the box of
+    another tile that contains it by intersection over the smaller area, since the
+    IoU of a truncated box with the full box can be low. All boxes are then merged by
+    IoU: nms keeps the best box of each group, wbf averages them.
+    """
+    if method not in MERGE_METHODS:
+        raise ValueError(f"Unknown merge method {method}, "
+                         f"expected one of {', '.join(MERGE_METHODS)}")
+    if len(boxes) == 0:
+        return boxes, scores, class_ids
+    if origins is not None:
+        truncated = seam_truncated(boxes, origins, tile_size, *image_size)
+        boxes, scores, class_ids = _join_seam_boxes(boxes, scores, class_ids, origins,
+                                                    truncated, threshold)
+    if method == "nms":
+        keep = nms(boxes, scores, class_ids, threshold)
+        return boxes[keep], scores[keep], class_ids[keep]
+    return weighted_box_fusion(boxes, scores, class_ids, threshold)
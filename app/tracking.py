@@ -0,0 +1,205 @@
+"""Multi-object tracking of detected weeds across frames.
+
+This module contains the WeedTracker class, a lightweight ByteTrack-style
+tracker: every track has a constant-velocity Kalman filter on its box, and
+detections are matched to the predicted boxes by IoU, first the confident
+detections and then the weak ones. Tracks keep their ID across frames, so a
+weed seen in many frames is treated only once.
+"""
+import threading
+import numpy as np
+
+# State is (cx, cy, w, h, vx, vy, vw, vh); only the box part is measured
+_STATE_SIZE = 8
+_TRANSITION = np.eye(_STATE_SIZE)
+_TRANSITION[:4, 4:] = np.eye(4)
+_MEASUREMENT = np.eye(4, _STATE_SIZE)
+# Noise relative to the box height, as in SORT / ByteTrack
+_POSITION_WEIGHT = 1.0 / 20
+_VELOCITY_WEIGHT = 1.0 / 160
+
+
+def xyxy_to_cxcywh(boxes):
+    """Converts (N, 4) xyxy boxes to center, width and height."""
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    size = boxes[:, 2:] - boxes[:, :2]
+    return np.hstack([boxes[:, :2] + size / 2, size])
+
+
+def cxcywh_to_xyxy(boxes):
+    """Converts (N, 4) center, width and height boxes to xyxy."""
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    half = boxes[:, 2:] / 2
+    return np.hstack([boxes[:, :2] - half, boxes[:, :2] + half])
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Returns the (N, M) IoU matrix of two sets of xyxy boxes."""
+    a = np.asarray(boxes_a, dtype=float).reshape(-1, 1, 4)
+    b = np.asarray(boxes_b, dtype=float).reshape(1, -1, 4)
+    size = np.clip(np.minimum(a[..., 2:], b[..., 2:]) - np.maximum(a[..., :2], b[..., :2]),
+                   0, None)
+    intersection = size[..., 0] * size[..., 1]
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return intersection / np.maximum(area_a + area_b - intersection, 1e-9)
+
+
+def greedy_match(iou, threshold):
+    """Matches rows to columns by descending IoU; returns a list of (row, column) pairs."""
+    if iou.size == 0:
+        return []
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    used_rows, used_cols, matches = set(), set(), []
+    for row, col in zip(rows[order].tolist(), cols[order].tolist()):
+        if row not in used_rows and col not in used_cols:
+            used_rows.add(row)
+            used_cols.add(col)
+            matches.append((row, col))
+    return matches
+
+
+class Track:
+    """One tracked object with its Kalman state.
+
+    hits counts the matched frames and misses the frames since the last match.
+    """
+    def __init__(self, track_id, box, class_id, confidence):
+        self.track_id = track_id
+        self.class_id = class_id
+        self.confidence = confidence
+        self.hits = 1
+        self.misses = 0
+        measurement = xyxy_to_cxcywh(box)[0]
+        self.mean = np.concatenate([measurement, np.zeros(4)])
+        height = measurement[3]
+        std = np.array([2 * _POSITION_WEIGHT * height] * 4
+                       + [10 * _VELOCITY_WEIGHT * height] * 4)
+        self.covariance = np.diag(np.square(std))
+
+    @property
+    def box(self):
+        """Current xyxy box estimate."""
+        return cxcywh_to_xyxy(self.mean[:4])[0]
+
+    @property
+    def center(self):
+        """Current (x, y) center estimate in whole pixels."""
+        return int(round(self.mean[0])), int(round(self.mean[1]))
+
+    def predict(self):
+        """Advances the state by one frame."""
+        height = self.mean[3]
+        std = np.array([_POSITION_WEIGHT * height] * 4 + [_VELOCITY_WEIGHT * height] * 4)
+        self.mean = _TRANSITION @ self.mean
+        self.covariance = _TRANSITION @ self.covariance @ _TRANSITION.T + np.diag(np.square(std))
+        self.misses += 1
+
+    def update(self, box, confidence):
+        """Corrects the state with a matched detection box."""
+        measurement = xyxy_to_cxcywh(box)[0]
+        std = np.full(4, _POSITION_WEIGHT * self.mean[3])
+        projected_cov = (_MEASUREMENT @ self.covariance @ _MEASUREMENT.T
+                         + np.diag(np.square(std)))
+        gain = np.linalg.solve(projected_cov, _MEASUREMENT @ self.covariance).T
+        self.mean = self.mean + gain @ (measurement - _MEASUREMENT @ self.mean)
+        self.covariance = self.covariance - gain @ projected_cov @ gain.T
+        self.confidence = confidence
+        self.hits += 1
+        self.misses = 0
+
+
+class WeedTracker:
+    """ByteTrack-style tracker over the Detections of consecutive frames.
+
+    Detections with a confidence of at least high_threshold are matched first and
+    may start new tracks; weaker ones are only used to keep existing tracks alive.
+    A track is confirmed after min_hits matches and dropped after max_misses frames
+    without one. All methods are thread-safe.
+    """
+    def __init__(self, high_threshold=0.4, iou_threshold=0.3, min_hits=3, max_misses=30):
+        self.high_threshold = high_threshold
+        self.iou_threshold = iou_threshold
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.tracks = []
+        self._next_id = 1
+        self._treated = set()
+        self._lock = threading.Lock()
+
+    def update(self, detections):
+        """Adds the Detections of the next frame; returns the tracks matched in it."""
+        with self._lock:
+            for track in self.tracks:
+                track.predict()
+
+            confident = detections.confidences >= self.high_threshold
+            matched = []
+            remaining, new = self._associate(list(range(len(self.tracks))), detections,
+                                             np.flatnonzero(confident), matched)
+            self._associate(remaining, detections, np.flatnonzero(~confident), matched)
+
+            for detection in new:
+                track = Track(self._next_id, detections.boxes[detection],
+                              int(detections.class_ids[detection]),
+                              float(detections.confidences[detection]))
+                self._next_id += 1
+                self.tracks.append(track)
+                matched.append(track)
+
+            self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+            return matched
+
+    def _associate(self, track_indices, detections, detection_indices, matched):
+        """Matches detections to tracks by IoU and updates the matched tracks.
+
+        Appends the updated tracks to matched and returns the indices of the tracks
+        and of the detections that were left unmatched.
+        """
+        candidates = [self.tracks[i] for i in track_indices]
+        iou = iou_matrix([t.box for t in candidates], detections.boxes[detection_indices])
+        pairs = greedy_match(iou, self.iou_threshold)
+        for row, col in pairs:
+            detection = detection_indices[col]
+            candidates[row].update(detections.boxes[detection],
+                                   float(detections.confidences[detection]))
+            matched.append(candidates[row])
+        used_rows = {row for row, _ in pairs}
+        used_cols = {col for _, col in pairs}
+        return ([i for row, i in enumerate(track_indices) if row not in used_rows],
+                [int(d) for col, d in enumerate(detection_indices) if col not in used_cols])
+
+    def predict(self):
+        """Advances all tracks by one frame without detections.
+
+        Used on frames that are not run through the model; returns the tracks with
+        their motion-compensated boxes.
+        """
+        with self._lock:
+            for track in self.tracks:
+                track.predict()
+            self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+            return list(self.tracks)
+
+    def untreated_targets(self):
+        """Returns (track_id, x, y) of every confirmed track that was not treated yet."""
+        with self._lock:
+            return [(t.track_id, *t.center) for t in self.tracks
+                    if t.hits >= self.min_hits and t.track_id not in self._treated]
+
+    def mark_treated(self, track_id):
+        """Records that the weed of the given track was eliminated."""
+        with self._lock:
+            self._treated.add(track_id)
+
+    def is_treated(self, track_id):
+        """True if the weed of the given track was already eliminated."""
+        with self._lock:
+            return track_id in self._treated
+
+    def reset(self):
+        """Drops all tracks and the treated IDs."""
+        with self._lock:
+            self.tracks = []
+            self._treated.clear()
@@ -0,0 +1,67 @@
+"""Tkinter widgets for the Weed Detector GUI.
+
+This module contains the RingLog text widget, a read-only log panel that
+keeps only its newest lines so that it can run for a whole day.
+"""
+import tkinter as tk
+
+DEFAULT_MAX_LINES = 500
+
+
+class RingLog(tk.Text):  # pylint: disable=too-many-ancestors
+    """Read-only text panel that keeps at most max_lines lines.
+
+    New lines are appended at the end and the oldest lines are removed from the
+    top, so every update costs the same no matter how long the panel has run. A
+    single status line at the end can be replaced in place with set_status().
+    """
+    def __init__(self, master=None, max_lines=DEFAULT_MAX_LINES, **kwargs):
+        if max_lines < 1:
+            raise ValueError(f"max_lines must be at least 1, got {max_lines}")
+        kwargs.setdefault("state", tk.DISABLED)
+        super().__init__(master, **kwargs)
+        self.max_lines = max_lines
+        self._has_status = False
+
+    def line_count(self):
+        """Number of complete lines in the panel."""
+        return int(self.index("end-1c").split(".", maxsplit=1)[0]) - 1
+
+    def append(self, *lines):
+        """Appends the lines with a single insert and trims the oldest lines."""
+        if not lines:
+            return
+        self.config(state=tk.NORMAL)
+        if self._has_status:
+            self.tag_remove("status", "1.0", tk.END)
+            self._has_status = False
+        self.insert(tk.END, "\n".join(lines) + "\n")
+        self._trim()
+        self.see(tk.END)
+        self.config(state=tk.DISABLED)
+
+    def set_status(self, line):
+        """Shows line as the last line, replacing the previous status line if any."""
+        self.config(state=tk.NORMAL)
+        if self._has_status:
+            ranges = self.tag_ranges("status")
+            if ranges:
+                self.delete(ranges[0], ranges[-1])
+        self.insert(tk.END, line + "\n", "status")
+        self._has_status = True
+        self._trim()
+        self.see(tk.END)
+        self.config(state=tk.DISABLED)
+
+    def clear(self):
+        """Removes all lines."""
+        self.config(state=tk.NORMAL)
+        self.delete("1.0", tk.END)
+        self._has_status = False
+        self.config(state=tk.DISABLED)
+
+    def _trim(self):
+        """Deletes the oldest lines beyond max_lines; the widget must be editable."""
+        excess = self.line_count() - self.max_lines
+        if excess > 0:
+            self.delete("1.0", f"{excess + 1}.0")
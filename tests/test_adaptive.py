@@ -0,0 +1,78 @@
+"""Unit tests for the ResolutionController class."""
+import unittest
+from unittest.mock import MagicMock
+from app.adaptive import ResolutionController
+
+class TestResolutionController(unittest.TestCase):
+    """Test cases for the ResolutionController class."""
+    def setUp(self):
+        self.on_change = MagicMock()
+        self.controller = ResolutionController(target_ms=100, window=3, up_ratio=0.6,
+                                               on_change=self.on_change)
+
+    def _record(self, frame_ms, count):
+        """Records the same frame time count times and returns the last imgsz."""
+        imgsz = None
+        for _ in range(count):
+            imgsz = self.controller.record(frame_ms)
+        return imgsz
+
+    def test_starts_at_largest_size(self):
+        """Test that the controller starts at the top of the ladder."""
+        self.assertEqual(self.controller.imgsz, 640)
+
+    def test_steps_down_when_over_budget(self):
+        """Test that a full window over the budget steps down one size."""
+        self.assertEqual(self._record(150, 2), 640)
+        self.assertEqual(self._record(150, 1), 512)
+        self.on_change.assert_called_once_with(640, 512)
+
+    def test_needs_a_new_window_after_each_step(self):
+        """Test that samples of the old size do not count after a step."""
+        self._record(150, 3)
+        self.assertEqual(self._record(150, 2), 512)
+        self.assertEqual(self._record(150, 1), 416)
+
+    def test_does_not_go_below_smallest_size(self):
+        """Test that the ladder bottom is kept when even it is too slow."""
+        self.assertEqual(self._record(500, 30), 320)
+        self.assertEqual(self.on_change.call_count, 3)
+
+    def test_hysteresis_keeps_size_in_between(self):
+        """Test that times between up_ratio * target and target keep the size."""
+        self._record(150, 3)
+        self.assertEqual(self._record(80, 20), 512)
+        self.assertEqual(self._record(50, 3), 640)
+
+    def test_median_ignores_single_spikes(self):
+        """Test that one slow frame in the window does not step down."""
+        for frame_ms in (80, 400, 80):
+            self.controller.record(frame_ms)
+        self.assertEqual(self.controller.imgsz, 640)
+
+    def test_measure_times_detection_with_the_injected_clock(self):
+        """Test that measure runs at the current size and records the clock difference."""
+        controller = ResolutionController(target_ms=100, window=1,
+                                          clock=iter([1.0, 1.25]).__next__)
+        detect = MagicMock(return_value="detections")
+        self.assertEqual(controller.measure(detect, "frame"), "detections")
+        detect.assert_called_once_with("frame", imgsz=640)
+        self.assertEqual(controller.imgsz, 512)
+
+    def test_reset(self):
+        """Test that reset returns to the largest size."""
+        self._record(150, 3)
+        self.controller.reset()
+        self.assertEqual(self.controller.imgsz, 640)
+
+    def test_invalid_arguments(self):
+        """Test that invalid settings raise ValueError."""
+        with self.assertRaises(ValueError):
+            ResolutionController(target_ms=0)
+        with self.assertRaises(ValueError):
+            ResolutionController(ladder=(640, 320))
+        with self.assertRaises(ValueError):
+            ResolutionController(up_ratio=1.5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Unit tests for the headless batch detection command."""
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+import cv2
+from app import batch
+
+class TestBatch(unittest.TestCase):
+    """Test cases for the batch module."""
+    def setUp(self):
+        """Create a temporary folder with a few images."""
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.input_dir = os.path.join(self.tmp.name, "input")
+        os.makedirs(os.path.join(self.input_dir, "sub"))
+        image = np.zeros((50, 60, 3), dtype=np.uint8)
+        cv2.imwrite(os.path.join(self.input_dir, "a.jpg"), image)
+        cv2.imwrite(os.path.join(self.input_dir, "sub", "b.png"), image)
+        with open(os.path.join(self.input_dir, "notes.txt"), "w", encoding="utf-8") as f:
+            f.write("not an image")
+
+        self.mock_model = MagicMock()
+        self.mock_model.predict_batch.side_effect = lambda images, batch_size, render: [
+            (img, [(10, 20, "weed", 0.9)]) for img in images
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_find_images(self):
+        """Test that only image files are found, recursively and sorted."""
+        paths = batch.find_images(self.input_dir)
+        self.assertEqual([os.path.relpath(p, self.input_dir) for p in paths],
+                         ["a.jpg", os.path.join("sub", "b.png")])
+
+    def test_find_images_missing_dir(self):
+        """Test that a missing input directory raises a ValueError."""
+        with self.assertRaises(ValueError):
+            batch.find_images(os.path.join(self.tmp.name, "missing"))
+
+    def test_run_batch_jsonl_with_annotated_images(self):
+        """Test a single-process run writing JSONL and annotated images."""
+        output = os.path.join(self.tmp.name, "out.jsonl")
+        annotated = os.path.join(self.tmp.name, "annotated")
+        with patch("app.batch.WeedDetectorModel", return_value=self.mock_model):
+            count = batch.run_batch(self.input_dir, output, workers=1, batch_size=1,
+                                    annotated_dir=annotated)
+        self.assertEqual(count, 2)
+        with open(output, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[0]["image"], "a.jpg")
+        self.assertEqual(records[0]["detections"],
+                         [{"class": "weed", "x": 10, "y": 20, "confidence": 0.9}])
+        self.assertTrue(os.path.exists(os.path.join(annotated, "sub", "b.png")))
+        self.assertEqual(self.mock_model.predict_batch.call_count, 2)
+        self.assertTrue(self.mock_model.predict_batch.call_args.kwargs["render"])
+
+    def test_run_batch_csv_reports_unreadable_images(self):
+        """Test CSV output and that broken images are reported instead of aborting."""
+        with open(os.path.join(self.input_dir, "broken.jpg"), "wb") as f:
+            f.write(b"no jpeg")
+        output = os.path.join(self.tmp.name, "out.csv")
+        with patch("app.batch.WeedDetectorModel", return_value=self.mock_model):
+            batch.run_batch(self.input_dir, output, workers=1, batch_size=8)
+        with open(output, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertFalse(self.mock_model.predict_batch.call_args.kwargs["render"])
+        by_image = {row["image"]: row for row in rows}
+        self.assertEqual(by_image["broken.jpg"]["error"], "Failed to load image")
+        self.assertEqual(by_image["a.jpg"]["class"], "weed")
+
+    def test_parse_args_rejects_zero_workers(self):
+        """Test that invalid worker counts are rejected."""
+        with self.assertRaises(SystemExit):
+            batch.parse_args([self.input_dir, "--workers", "0"])
+
+if __name__ == "__main__":
+    unittest.main()
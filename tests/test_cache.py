@@ -0,0 +1,87 @@
+"""Unit tests for the ByteLRUCache class and the cache key helpers."""
+import os
+import tempfile
+import threading
+import unittest
+import numpy as np
+from app.cache import ByteLRUCache, content_hash, file_key
+
+class TestByteLRUCache(unittest.TestCase):
+    """Test cases for the ByteLRUCache class."""
+    def test_evicts_least_recently_used_when_over_budget(self):
+        """Test that the oldest unused entries are evicted to stay within max_bytes."""
+        cache = ByteLRUCache(max_bytes=300)
+        for key in "abc":
+            cache.put(key, np.zeros(100, dtype=np.uint8))
+        cache.get("a")
+        cache.put("d", np.zeros(100, dtype=np.uint8))
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.nbytes, 300)
+
+    def test_hits_and_misses(self):
+        """Test that get returns the default on a miss and counts hits and misses."""
+        cache = ByteLRUCache(max_bytes=10)
+        self.assertIsNone(cache.get("x"))
+        cache.put("x", "value", nbytes=1)
+        self.assertEqual(cache.get("x"), "value")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_oversized_value_is_not_stored(self):
+        """Test that a value larger than the whole budget is skipped."""
+        cache = ByteLRUCache(max_bytes=10)
+        cache.put("small", np.zeros(5, dtype=np.uint8))
+        cache.put("big", np.zeros(50, dtype=np.uint8))
+        self.assertNotIn("big", cache)
+        self.assertIn("small", cache)
+
+    def test_replacing_a_key_updates_the_size(self):
+        """Test that storing a key again does not count its old value."""
+        cache = ByteLRUCache(max_bytes=100)
+        cache.put("a", np.zeros(40, dtype=np.uint8))
+        cache.put("a", np.zeros(10, dtype=np.uint8))
+        self.assertEqual(cache.nbytes, 10)
+        cache.clear()
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+
+    def test_concurrent_puts_stay_within_budget(self):
+        """Test that puts from several threads keep the byte accounting consistent."""
+        cache = ByteLRUCache(max_bytes=1000)
+
+        def fill(offset):
+            for i in range(200):
+                cache.put(offset + i, np.zeros(10, dtype=np.uint8))
+
+        threads = [threading.Thread(target=fill, args=(n * 1000,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.nbytes, 1000)
+        self.assertEqual(len(cache), 100)
+
+class TestCacheKeys(unittest.TestCase):
+    """Test cases for content_hash and file_key."""
+    def test_content_hash_depends_on_pixels_and_shape(self):
+        """Test that equal images hash equally and any change gives another hash."""
+        image = np.zeros((4, 6, 3), dtype=np.uint8)
+        self.assertEqual(content_hash(image), content_hash(image.copy()))
+        changed = image.copy()
+        changed[0, 0, 0] = 1
+        self.assertNotEqual(content_hash(image), content_hash(changed))
+        self.assertNotEqual(content_hash(image), content_hash(image.reshape(6, 4, 3)))
+        self.assertEqual(content_hash(image[:, ::2]), content_hash(image[:, ::2].copy()))
+
+    def test_file_key_changes_with_modification_time(self):
+        """Test that rewriting a file gives a new key."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "image.jpg")
+            with open(path, "wb") as f:
+                f.write(b"a")
+            key = file_key(path)
+            os.utime(path, ns=(0, 0))
+            self.assertNotEqual(file_key(path), key)
+
+if __name__ == "__main__":
+    unittest.main()
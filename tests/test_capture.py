@@ -0,0 +1,157 @@
+"""Unit tests for the capture module."""
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+import cv2
+from app.capture import FramePrefetcher, LatestFrameCapture, iter_frames
+
+def write_test_video(path, num_frames, size=(64, 48)):
+    """Writes a small MJPG video where frame i is filled with the value 10 * i."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, size)
+    for i in range(num_frames):
+        writer.write(np.full((size[1], size[0], 3), i * 10, dtype=np.uint8))
+    writer.release()
+
+class TestIterFrames(unittest.TestCase):
+    """Test cases for iter_frames."""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        for name in ("b.jpg", "a.png"):
+            cv2.imwrite(os.path.join(self.tmp.name, name), np.zeros((20, 30, 3), np.uint8))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_image_directory(self):
+        """Test that a directory yields its images in sorted order."""
+        frames = list(iter_frames(self.tmp.name))
+        self.assertEqual([index for index, _ in frames], [0, 1])
+        self.assertEqual(frames[0][1].shape, (20, 30, 3))
+
+    def test_glob_pattern(self):
+        """Test that a glob only yields the matching images."""
+        frames = list(iter_frames(os.path.join(self.tmp.name, "*.jpg")))
+        self.assertEqual(len(frames), 1)
+
+    def test_video_file(self):
+        """Test that a video file yields all of its frames."""
+        path = os.path.join(self.tmp.name, "clip.avi")
+        write_test_video(path, 5)
+        frames = list(iter_frames(path))
+        self.assertEqual(len(frames), 5)
+        self.assertEqual(frames[0][1].shape, (48, 64, 3))
+
+    def test_missing_video_raises(self):
+        """Test that an unopenable video source raises a ValueError."""
+        with self.assertRaises(ValueError):
+            list(iter_frames(os.path.join(self.tmp.name, "missing.avi")))
+
+class TestFramePrefetcher(unittest.TestCase):
+    """Test cases for FramePrefetcher."""
+    def test_yields_all_items_in_order(self):
+        """Test that every item is passed through in order."""
+        with FramePrefetcher(iter(range(10)), max_prefetch=2) as frames:
+            self.assertEqual(list(frames), list(range(10)))
+
+    def test_prefetch_is_bounded(self):
+        """Test that the reader never runs more than max_prefetch items ahead."""
+        produced = []
+
+        def source():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        frames = FramePrefetcher(source(), max_prefetch=3)
+        iterator = iter(frames)
+        next(iterator)
+        time.sleep(0.3)
+        # 1 consumed + 3 queued + 1 waiting to be queued
+        self.assertLessEqual(len(produced), 5)
+        frames.stop()
+
+    def test_errors_are_raised_in_consumer(self):
+        """Test that an error while decoding is raised to the consumer."""
+        def source():
+            yield 1
+            raise ValueError("decode failed")
+
+        frames = FramePrefetcher(source())
+        with self.assertRaises(ValueError):
+            list(frames)
+        frames.stop()
+
+class FakeCamera:
+    """Mimics cv2.VideoCapture, delivering num_frames numbered frames."""
+    def __init__(self, num_frames, delay=0.0):
+        self.num_frames = num_frames
+        self.delay = delay
+        self.count = 0
+        self.released = False
+
+    def read(self):
+        """Return the next frame number, or (False, None) when exhausted."""
+        time.sleep(self.delay)
+        if self.count >= self.num_frames:
+            return False, None
+        self.count += 1
+        return True, self.count
+
+    def isOpened(self):  # pylint: disable=invalid-name
+        """The fake camera is open until released."""
+        return not self.released
+
+    def release(self):
+        """Mark the camera as released."""
+        self.released = True
+
+class TestLatestFrameCapture(unittest.TestCase):
+    """Test cases for LatestFrameCapture."""
+    def test_slow_consumer_gets_newest_frame_and_drops_stale_ones(self):
+        """Test that a slow reader skips stale frames and they are counted."""
+        capture = LatestFrameCapture(FakeCamera(20))
+        time.sleep(0.2)
+        ret, frame = capture.read()
+        self.assertTrue(ret)
+        self.assertEqual(frame, 20)
+        self.assertEqual(capture.dropped_frames, 19)
+        self.assertEqual(capture.read(), (False, None))
+        capture.release()
+
+    def test_each_frame_is_returned_once(self):
+        """Test that read waits for a new frame instead of repeating the last one."""
+        capture = LatestFrameCapture(FakeCamera(3, delay=0.05))
+        frames = []
+        while True:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames.append(frame)
+        self.assertEqual(len(frames), len(set(frames)))
+        self.assertEqual(frames[-1], 3)
+        capture.release()
+
+    def test_frame_time_is_grab_time_of_returned_frame(self):
+        """Test that frame_time tells when the returned frame was grabbed."""
+        capture = LatestFrameCapture(FakeCamera(1))
+        before = time.monotonic()
+        self.assertIsNone(capture.frame_time)
+        ret, _ = capture.read()
+        self.assertTrue(ret)
+        self.assertLessEqual(capture.frame_time, time.monotonic())
+        self.assertGreater(capture.frame_time, before - 1.0)
+        capture.release()
+
+    def test_release_stops_thread_and_camera(self):
+        """Test that release can be called twice and releases the device."""
+        camera = FakeCamera(1000, delay=0.01)
+        capture = LatestFrameCapture(camera)
+        capture.release()
+        capture.release()
+        self.assertTrue(camera.released)
+        self.assertFalse(capture.isOpened())
+
+if __name__ == "__main__":
+    unittest.main()
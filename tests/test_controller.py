@@ -1,8 +1,28 @@
 """Unit tests for the WeedDetectorController class."""
 
+import threading
 import unittest
-from unittest.mock import MagicMock
+from concurrent.futures import wait
+from unittest.mock import MagicMock, patch
+import numpy as np
 from app.controller import WeedDetectorController
+from app.detections import Detections
+from app.shm import InferenceProcess
+
+
+def wait_for_detection(controller):
+    """Blocks until the controller's latest still-image detection has posted its result."""
+    if controller._pending is not None:  # pylint: disable=protected-access
+        wait([controller._pending])  # pylint: disable=protected-access
+
+class FrameSizeModel:
+    """Stands in for the model of the inference process; detects the whole frame."""
+    def __init__(self):
+        self.model = MagicMock(conf=0.15)
+
+    def detect(self, image, imgsz=None):  # pylint: disable=unused-argument
+        """Returns one box covering the frame."""
+        return Detections([[0, 0, image.shape[1], image.shape[0]]], [0], [0.9], {0: "weed"})
 
 class TestWeedDetectorController(unittest.TestCase):
     """Test cases for the WeedDetectorController class."""
@@ -10,8 +30,14 @@ class TestWeedDetectorController(unittest.TestCase):
         self.mock_model = MagicMock() # Mock WeedDetectorModel
         self.mock_gui = MagicMock() # Mock WeedDetectorGUI
         self.mock_gui.conf_var.get.return_value = 0.15
+        # Run results posted back to the Tk thread right away
+        self.mock_gui.call_soon.side_effect = lambda callback, *args: callback(*args)
         self.controller = WeedDetectorController(self.mock_model, self.mock_gui)
 
+    def test_gui_shares_model_stats(self):
+        """Tests that the GUI records its timings into the model's statistics."""
+        self.assertIs(self.mock_gui.stats, self.mock_model.stats)
+
     def test_handle_select_image_success(self):
         """Tests the handle_select_image method for successful image loading."""
         # model.load_image retunts a dummy image
@@ -20,8 +46,10 @@ class TestWeedDetectorController(unittest.TestCase):
 
         # handle_select_image sollte display_image aufrufen
         self.controller.handle_select_image("test.jpg")
+        wait_for_detection(self.controller)
         self.mock_model.load_image.assert_called_with("test.jpg")
-        self.mock_gui.display_image.assert_called_with(dummy_image)
+        # The loaded image is shown first, then replaced by the detection overlay
+        self.mock_gui.display_image.assert_any_call(dummy_image)
 
     def test_handle_select_image_failure(self):
         """Tests the handle_select_image method for failure cases."""
@@ -36,15 +64,105 @@ class TestWeedDetectorController(unittest.TestCase):
         image_path = "unkraut1.jpg"
         # model is loading the real image
         self.mock_model.load_image.return_value = image_path
-        dummy_processed = "processed"
-        dummy_result = "result"
-        self.mock_model.detect_weeds.return_value = (dummy_processed, dummy_result)
+        detections = self._raw_detections()
+        self.mock_model.detect.return_value = detections
+        self.mock_model.render_overlay.return_value = "processed"
+        self.mock_model.format_detections.return_value = "result"
         self.controller.handle_detect(image_path)
+        wait_for_detection(self.controller)
         self.mock_model.load_image.assert_called_with(image_path)
-        self.mock_model.detect_weeds.assert_called_with(image_path)
-        self.mock_gui.display_image.assert_called_with(dummy_processed)
-        self.mock_gui.update_results.assert_called_with(f"Detection with confidence 0.15: \
-                                                        {dummy_result}")
+        self.mock_model.detect.assert_called_once_with(image_path, use_cache=True, conf=0.05)
+        # The shared model's own threshold is left alone for camera and robot
+        self.assertNotEqual(self.mock_model.model.conf, 0.05)
+        shown = self.mock_model.render_overlay.call_args[0][1]
+        self.assertEqual(len(shown), 1)
+        self.mock_gui.display_image.assert_called_with("processed")
+        self.mock_gui.update_results.assert_called_with("Detection with confidence 0.15: result")
+
+    def test_handle_select_image_detects_loaded_image(self):
+        """Tests that selecting an image does not load it from disk a second time."""
+        self.mock_model.load_image.return_value = "image"
+        self.mock_model.detect.return_value = self._raw_detections()
+        self.controller.handle_select_image("test.jpg")
+        wait_for_detection(self.controller)
+        self.mock_model.load_image.assert_called_once_with("test.jpg")
+        self.mock_model.detect.assert_called_once_with("image", use_cache=True, conf=0.05)
+
+    def test_handle_conf_change_filters_without_inference(self):
+        """Tests that moving the slider re-filters the kept detections instead of re-running."""
+        self.mock_model.load_image.return_value = "image"
+        self.mock_model.detect.return_value = self._raw_detections()
+        self.controller.handle_detect("test.jpg")
+        wait_for_detection(self.controller)
+        self.mock_gui.camera_running = False
+
+        self.controller.handle_conf_change(0.05)
+        self.mock_model.detect.assert_called_once()
+        image, shown, confidence = self.mock_model.render_overlay.call_args[0]
+        self.assertEqual((image, len(shown), confidence), ("image", 2, 0.05))
+
+        self.controller.handle_conf_change(0.95)
+        self.assertEqual(len(self.mock_model.render_overlay.call_args[0][1]), 0)
+        self.mock_model.detect.assert_called_once()
+
+    def test_handle_conf_change_without_image(self):
+        """Tests that slider changes before any detection are ignored."""
+        self.controller.handle_conf_change(0.5)
+        self.mock_model.render_overlay.assert_not_called()
+        self.mock_gui.display_image.assert_not_called()
+
+    def test_handle_detect_shows_busy_indicator(self):
+        """Tests that the busy indicator is shown while the detection runs."""
+        self.mock_model.load_image.return_value = "image"
+        self.mock_model.detect.return_value = self._raw_detections()
+        self.controller.handle_detect("test.jpg")
+        wait_for_detection(self.controller)
+        self.assertEqual([c.args for c in self.mock_gui.set_busy.call_args_list],
+                         [(True,), (False,)])
+
+    def test_handle_detect_drops_superseded_requests(self):
+        """Tests that only the latest of several quick detection requests is shown."""
+        started = threading.Event()
+        release = threading.Event()
+        first, latest = self._raw_detections(), Detections.empty({0: "weed"})
+
+        def detect(image, use_cache=False, conf=None):  # pylint: disable=unused-argument
+            if image == "first":
+                started.set()
+                release.wait(5)
+                return first
+            return latest
+
+        self.mock_model.detect.side_effect = detect
+        self.mock_model.load_image.side_effect = lambda path: path
+        self.controller.handle_detect("first")
+        started.wait(5)
+        self.controller.handle_detect("skipped")
+        self.controller.handle_detect("latest")
+        release.set()
+        wait_for_detection(self.controller)
+
+        called = [c.args[0] for c in self.mock_model.detect.call_args_list]
+        self.assertEqual(called, ["first", "latest"])
+        self.mock_model.render_overlay.assert_called_once()
+        self.assertIs(self.mock_model.render_overlay.call_args[0][1].names, latest.names)
+        self.assertEqual(self.mock_model.render_overlay.call_args[0][0], "latest")
+
+    def test_handle_detect_reports_errors_from_worker(self):
+        """Tests that an error raised during background detection is shown."""
+        self.mock_model.load_image.return_value = "image"
+        self.mock_model.detect.side_effect = RuntimeError("Fehler")
+        self.controller.handle_detect("test.jpg")
+        wait_for_detection(self.controller)
+        self.assertTrue(self.mock_gui.show_error_box.call_args[0][0]
+                        .startswith("Fehler bei der Erkennung:"))
+        self.mock_gui.set_busy.assert_called_with(False)
+
+    @staticmethod
+    def _raw_detections():
+        """Two detections with the confidences 0.1 and 0.6."""
+        return Detections(np.array([[0, 0, 10, 10], [20, 20, 40, 40]]), [0, 0], [0.1, 0.6],
+                          {0: "weed"})
 
     def test_handle_detect_failure(self):
         """Tests the handle_detect method for failure cases."""
@@ -66,21 +184,147 @@ class TestWeedDetectorController(unittest.TestCase):
 
     def test_handle_camera_frame(self):
         """Tests the handle_camera_frame method."""
-        dummy_frame = "frame"
+        dummy_frame = np.zeros((48, 64, 3), dtype=np.uint8)
         confidence = 0.15
-        self.mock_model.predict.return_value = "processed_frame"
+        detections = Detections.empty({0: "weed"})
+        self.mock_model.detect.return_value = detections
+        self.mock_model.render_overlay.return_value = "processed_frame"
         processed_frame, centers = self.controller.handle_camera_frame(dummy_frame, confidence)
-        self.mock_model.predict.assert_called_with(dummy_frame)
+        self.mock_model.detect.assert_called_with(dummy_frame)
+        self.mock_model.render_overlay.assert_called_with(dummy_frame, detections)
         self.assertEqual(processed_frame, "processed_frame")
-        self.assertEqual(centers, [])
+        self.assertIs(centers, detections)
 
     def test_handle_camera_frame_exception(self):
-        """Tests handle_camera_frame when model.predict raises an exception."""
-        dummy_frame = "frame"
+        """Tests handle_camera_frame when model.detect raises an exception."""
+        dummy_frame = np.zeros((48, 64, 3), dtype=np.uint8)
         confidence = 0.15
-        self.mock_model.predict.side_effect = RuntimeError("Prediction failed")
+        self.mock_model.detect.side_effect = RuntimeError("Prediction failed")
         with self.assertRaises(RuntimeError):
             self.controller.handle_camera_frame(dummy_frame, confidence)
 
+    def test_handle_camera_frame_detects_again_after_failure(self):
+        """Tests that an unchanged frame after a failed inference is detected, not redrawn."""
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        detections = Detections([[0, 0, 10, 10]], [0], [0.9], {0: "weed"})
+        self.mock_model.detect.side_effect = [RuntimeError("Prediction failed"), detections]
+        self.mock_model.render_overlay.return_value = "processed_frame"
+        with self.assertRaises(RuntimeError):
+            self.controller.handle_camera_frame(frame, 0.15)
+        processed, centers = self.controller.handle_camera_frame(frame.copy(), 0.15)
+        self.assertEqual(self.mock_model.detect.call_count, 2)
+        self.mock_model.stats.increment.assert_not_called()
+        self.mock_model.render_overlay.assert_called_once()
+        self.assertIs(self.mock_model.render_overlay.call_args[0][1], detections)
+        self.assertEqual(processed, "processed_frame")
+        self.assertIs(centers, detections)
+
+    def test_handle_camera_frame_skips_unchanged_frames(self):
+        """Tests that a still scene reuses the last detections until something changes."""
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        self.mock_model.detect.return_value = Detections.empty({0: "weed"})
+        self.mock_model.render_overlay.return_value = "redrawn_frame"
+        self.controller.handle_camera_frame(frame, 0.15)
+        processed, _ = self.controller.handle_camera_frame(frame.copy(), 0.15)
+        self.assertEqual(processed, "redrawn_frame")
+        self.assertEqual(self.mock_model.detect.call_count, 1)
+        self.mock_model.stats.increment.assert_called_once_with("skipped_inference")
+
+        self.controller.handle_camera_frame(frame, 0.5)
+        self.controller.handle_camera_frame(np.full_like(frame, 255), 0.5)
+        self.assertEqual(self.mock_model.detect.call_count, 3)
+
+    def test_handle_camera_frame_adapts_input_size(self):
+        """Tests that slow live frames lower the input size and show it in the GUI."""
+        controller = WeedDetectorController(self.mock_model, self.mock_gui)
+        controller.configure_frame_budget(100)
+        self.mock_gui.show_input_size.reset_mock()
+        controller.motion_gate = MagicMock()
+        controller.motion_gate.changed.return_value = True
+        # Every inference takes 0.2 s
+        controller.resolution.clock = iter([t * 0.2 for t in range(40)]).__next__
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        for _ in range(controller.resolution.window):
+            controller.handle_camera_frame(frame, 0.15)
+        self.mock_model.detect.assert_called_with(frame, imgsz=640)
+        controller.handle_camera_frame(frame, 0.15)
+        self.mock_model.detect.assert_called_with(frame, imgsz=512)
+        self.mock_gui.show_input_size.assert_called_once_with(512)
+        self.assertEqual(controller.robot.resolution, controller.resolution)
+
+    @patch("app.controller.MultiCameraScheduler")
+    def test_multiple_cameras_are_shown_as_mosaic(self, scheduler_class):
+        """Tests that camera batches are drawn into one mosaic with per-camera stats."""
+        scheduler = scheduler_class.open.return_value
+        scheduler.format_stats.return_value = "Camera 0: 10.0 fps"
+        self.assertTrue(self.controller.handle_start_cameras([0, 1]))
+        scheduler.start.assert_called_once()
+        self.mock_model.render_overlay.side_effect = lambda frame, detections: frame
+
+        frame = np.full((48, 64, 3), 50, dtype=np.uint8)
+        self.controller.handle_camera_batch([(1, frame, [])])
+        mosaic = self.mock_gui.display_frame.call_args[0][0]
+        self.assertEqual(mosaic.shape, (48, 64, 3))
+        self.assertEqual(mosaic[0, 0, 0], 0)
+        self.assertEqual(mosaic[0, 63, 0], 50)
+        self.mock_gui.update_live_results.assert_called_with("Camera 0: 10.0 fps")
+
+        self.controller.handle_conf_change(0.6)
+        self.assertEqual(self.mock_model.model.conf, 0.6)
+        self.controller.handle_stop_cameras()
+        scheduler.stop.assert_called_once()
+        self.assertIsNone(self.controller.cameras)
+
+    @patch("app.controller.MultiCameraScheduler")
+    def test_start_cameras_failure(self, scheduler_class):
+        """Tests that a camera that cannot be opened is reported."""
+        scheduler_class.open.side_effect = ValueError("Could not open camera source: 3")
+        self.assertFalse(self.controller.handle_start_cameras([0, 3]))
+        self.mock_gui.show_error_box.assert_called_once()
+
+    def test_handle_camera_frame_in_inference_process(self):
+        """Tests that live frames are pipelined through the inference process."""
+        self.controller.inference = MagicMock()
+        self.controller.motion_gate = MagicMock()
+        self.controller.motion_gate.changed.return_value = True
+        self.mock_model.render_overlay.return_value = "overlay"
+        first, second = (np.full((48, 64, 3), v, dtype=np.uint8) for v in (1, 2))
+        detections = Detections([[0, 0, 10, 10]], [0], [0.9], {0: "weed"})
+
+        # The first frame only fills the pipeline
+        self.controller.inference.pending = 1
+        self.controller.inference.result.return_value = None
+        processed, centers = self.controller.handle_camera_frame(first, 0.3)
+        self.assertIs(processed, first)
+        self.assertEqual(centers, [])
+        self.controller.inference.result.assert_called_with(timeout=0)
+
+        # Then each frame returns the result of the previous one
+        self.controller.inference.pending = 2
+        self.controller.inference.result.return_value = (first, detections, 12.0)
+        processed, centers = self.controller.handle_camera_frame(second, 0.3)
+        self.controller.inference.submit.assert_called_with(second, 0.3, None)
+        self.mock_model.render_overlay.assert_called_with(first, detections)
+        self.assertEqual(processed, "overlay")
+        self.assertIs(centers, detections)
+        self.mock_model.detect.assert_not_called()
+
+    def test_frames_larger_than_the_shared_slots_are_detected(self):
+        """Tests that a camera with larger frames than the slots still gets detections."""
+        self.controller.inference = InferenceProcess(slots=2, slot_bytes=48 * 64 * 3,
+                                                     model_factory=FrameSizeModel)
+        self.controller.inference.start()
+        self.controller.motion_gate = MagicMock()
+        self.controller.motion_gate.changed.return_value = True
+        self.mock_model.render_overlay.side_effect = lambda frame, detections: frame
+        frame = np.zeros((1200, 2000, 3), dtype=np.uint8)
+        try:
+            centers = []
+            for _ in range(3):
+                _, centers = self.controller.handle_camera_frame(frame, 0.3)
+        finally:
+            self.controller.inference.stop()
+        self.assertEqual(centers.boxes.tolist(), [[0, 0, 2000, 1200]])
+
 if __name__ == "__main__":
     unittest.main()
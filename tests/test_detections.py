@@ -0,0 +1,66 @@
+"""Unit tests for the Detections class."""
+import json
+import unittest
+import numpy as np
+import torch
+from app.detections import Detections
+
+class DummyBoxes:
+    """Mock of the YOLO boxes object holding an (N, 6) data tensor."""
+    def __init__(self, rows):
+        self.data = torch.tensor(rows, dtype=torch.float32).reshape(-1, 6)
+
+    def __len__(self):
+        return len(self.data)
+
+class DummyResult:
+    """Mock of a YOLO result."""
+    def __init__(self, rows):
+        self.boxes = DummyBoxes(rows)
+
+class TestDetections(unittest.TestCase):
+    """Test cases for the Detections class."""
+    names = {0: "weed", 1: "ribwort"}
+
+    def test_from_yolo_clips_boxes_and_computes_centers(self):
+        """Test that boxes are clipped to the image and centers computed per row."""
+        result = DummyResult([[10.7, 20.2, 30.9, 40.1, 0.9, 0],
+                              [-4.0, -8.0, 250.0, 90.0, 0.3, 1]])
+        detections = Detections.from_yolo(result, (100, 200, 3), self.names)
+        np.testing.assert_array_equal(detections.boxes, [[10, 20, 30, 40], [0, 0, 199, 90]])
+        np.testing.assert_array_equal(detections.centers, [[20, 30], [99, 45]])
+        np.testing.assert_array_equal(detections.class_ids, [0, 1])
+        self.assertEqual(detections.class_names, ["weed", "ribwort"])
+        self.assertEqual(len(detections), 2)
+
+    def test_iteration_yields_plain_python_tuples(self):
+        """Test that iterating gives detected_centers tuples that can be serialised."""
+        detections = Detections([[0, 0, 10, 10]], [1], [0.5], self.names)
+        items = list(detections)
+        self.assertEqual(items, [(5, 5, "ribwort", 0.5)])
+        self.assertEqual(detections[0], (5, 5, "ribwort", 0.5))
+        json.dumps(items)
+
+    def test_empty_results(self):
+        """Test that missing or empty boxes give empty detections."""
+        class NoBoxes:
+            """Result without boxes."""
+            boxes = None
+
+        for result in (NoBoxes(), DummyResult([])):
+            detections = Detections.from_yolo(result, (10, 10, 3), self.names)
+            self.assertFalse(detections)
+            self.assertEqual(detections.boxes.shape, (0, 4))
+            self.assertEqual(list(detections), [])
+    def test_filter_by_confidence(self):
+        """Test that filter keeps only the detections at or above the threshold."""
+        detections = Detections([[0, 0, 10, 10], [0, 0, 20, 20], [0, 0, 30, 30]], [0, 1, 0],
+                                [0.05, 0.15, 0.6], self.names)
+        kept = detections.filter(0.15)
+        np.testing.assert_array_equal(kept.boxes, [[0, 0, 20, 20], [0, 0, 30, 30]])
+        self.assertEqual(kept.class_names, ["ribwort", "weed"])
+        self.assertEqual(len(detections.filter(0.9)), 0)
+        self.assertEqual(len(detections), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""Unit tests for the UIDispatcher class."""
+import threading
+import unittest
+from unittest.mock import MagicMock
+from app.dispatcher import UIDispatcher
+
+class FakeRoot:
+    """Stands in for the Tk root and records scheduled callbacks."""
+    def __init__(self):
+        self.scheduled = []
+        self.cancelled = []
+
+    def after(self, delay, callback):
+        """Records the callback and returns an id like Tk does."""
+        self.scheduled.append((delay, callback))
+        return f"after#{len(self.scheduled)}"
+
+    def after_cancel(self, after_id):
+        """Records the cancelled id."""
+        self.cancelled.append(after_id)
+
+class TestUIDispatcher(unittest.TestCase):
+    """Test cases for the UIDispatcher class."""
+    def setUp(self):
+        self.root = FakeRoot()
+        self.dispatcher = UIDispatcher(self.root, rate_hz=30)
+
+    def test_latest_update_per_key_wins(self):
+        """Test that only the newest frame is shown and older ones are counted."""
+        show = MagicMock()
+        for frame in range(5):
+            self.dispatcher.post_latest("frame", show, frame)
+        self.dispatcher.flush()
+        show.assert_called_once_with(4)
+        self.assertEqual(self.dispatcher.coalesced, 4)
+
+    def test_lines_are_batched_into_one_call(self):
+        """Test that all queued lines of a key arrive in a single call, in order."""
+        append = MagicMock()
+        for i in range(3):
+            self.dispatcher.post_line("robot", append, f"line {i}")
+        self.dispatcher.flush()
+        append.assert_called_once_with("line 0", "line 1", "line 2")
+        self.dispatcher.flush()
+        append.assert_called_once()
+
+    def test_calls_run_once_in_order(self):
+        """Test that one-off calls are neither coalesced nor reordered."""
+        order = []
+        self.dispatcher.call(order.append, 1)
+        self.dispatcher.call(order.append, 2)
+        self.dispatcher.flush()
+        self.assertEqual(order, [1, 2])
+
+    def test_failing_update_does_not_stop_flush(self):
+        """Test that an exception in one update is logged and the others still run."""
+        show = MagicMock()
+        self.dispatcher.call(MagicMock(side_effect=RuntimeError("boom")))
+        self.dispatcher.post_latest("frame", show, "frame")
+        with self.assertLogs("app.dispatcher", level="ERROR"):
+            self.dispatcher.flush()
+        show.assert_called_once_with("frame")
+
+    def test_tick_reschedules_at_the_configured_rate(self):
+        """Test that start schedules one tick and every tick schedules the next."""
+        self.dispatcher.start()
+        self.dispatcher.start()
+        self.assertEqual(len(self.root.scheduled), 1)
+        delay, tick = self.root.scheduled[0]
+        self.assertEqual(delay, 33)
+        tick()
+        self.assertEqual(len(self.root.scheduled), 2)
+        self.dispatcher.stop()
+        self.assertEqual(self.root.cancelled, ["after#2"])
+
+    def test_posting_from_many_threads(self):
+        """Test that lines posted concurrently are all delivered."""
+        received = []
+        def post(offset):
+            for i in range(100):
+                self.dispatcher.post_line("results", lambda *lines: received.extend(lines),
+                                          offset + i)
+        threads = [threading.Thread(target=post, args=(n * 100,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.dispatcher.flush()
+        self.assertEqual(sorted(received), list(range(400)))
+
+    def test_invalid_rate(self):
+        """Test that a non-positive refresh rate is rejected."""
+        with self.assertRaises(ValueError):
+            UIDispatcher(self.root, rate_hz=0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 """ Unit tests for the GUI module. """
 import os
+import threading
 import unittest
 from unittest.mock import MagicMock, patch
 import tkinter as tk
 import cv2
+import numpy as np
 from app.gui import WeedDetectorGUI
 
 class TestWeedDetectorGUI(unittest.TestCase):
@@ -60,6 +62,20 @@ class TestWeedDetectorGUI(unittest.TestCase):
         items = self.gui.canvas.find_all()
         self.assertGreater(len(items), 0)
 
+    def test_display_frame_reuses_canvas_item_and_photo(self):
+        """Test if live frames update the same canvas item and PhotoImage."""
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        self.gui.canvas.config(width=400, height=300)
+        self.gui.canvas.update()
+        self.gui.display_frame(frame)
+        item, photo = self.gui._canvas_image_id, self.gui._canvas_image_obj
+        frame[:] = 255
+        self.gui.display_frame(frame)
+        self.root.update()
+        self.assertEqual(self.gui.canvas.find_all(), (item,))
+        self.assertIs(self.gui._canvas_image_obj, photo)
+        self.assertLessEqual(photo.width(), 400)
+
     def test_update_results(self):
         """Test if results are updated correctly."""
         result = "Detected weeds: 5"
@@ -100,6 +116,20 @@ class TestWeedDetectorGUI(unittest.TestCase):
             self.assertFalse(self.gui.camera_running)
             self.assertEqual(self.gui.camera_btn['text'], "📷 Start Camera")
 
+    def test_toggle_multiple_cameras(self):
+        """Test that several camera sources are handed to the start and stop callbacks."""
+        self.gui.camera_sources = [0, 1]
+        self.gui.on_start_cameras = MagicMock(return_value=True)
+        self.gui.on_stop_cameras = MagicMock()
+        with patch('cv2.VideoCapture') as mock_cap:
+            self.gui.toggle_camera()
+            mock_cap.assert_not_called()
+        self.gui.on_start_cameras.assert_called_once_with([0, 1])
+        self.assertTrue(self.gui.multi_camera)
+        self.gui.toggle_camera()
+        self.gui.on_stop_cameras.assert_called_once()
+        self.assertFalse(self.gui.camera_running)
+
     def test_start_robot(self):
         """Test starting the robot."""
         with patch('app.robot.Robot.start_robot'):
@@ -120,5 +150,29 @@ class TestWeedDetectorGUI(unittest.TestCase):
         content = self.gui.robot_actions_text.get("1.0", tk.END)
         self.assertIn("Robot stopped", content)
 
+    def test_worker_thread_updates_go_through_dispatcher(self):
+        """Test that updates from worker threads wait for the dispatcher's flush."""
+        worker = threading.Thread(target=self.gui.log_robot_action, args=("From worker",))
+        worker.start()
+        worker.join()
+        self.assertNotIn("From worker", self.gui.robot_actions_text.get("1.0", tk.END))
+        self.gui.dispatcher.flush()
+        self.assertIn("From worker", self.gui.robot_actions_text.get("1.0", tk.END))
+
+    def test_conf_changed_caches_value_for_worker_threads(self):
+        """Test that the slider value is kept as a float the camera thread can read."""
+        self.gui.on_conf_change = MagicMock()
+        self.gui.conf_changed("0.4")
+        self.assertEqual(self.gui.confidence, 0.4)
+        self.gui.on_conf_change.assert_called_once_with(0.4)
+
+    def test_show_input_size(self):
+        """Test that the adaptive input size is shown, also when set from a worker thread."""
+        worker = threading.Thread(target=self.gui.show_input_size, args=(416,))
+        worker.start()
+        worker.join()
+        self.gui.dispatcher.flush()
+        self.assertEqual(self.gui.input_size_var.get(), "Input size: 416 px (adaptive)")
+
 if __name__ == "__main__":
     unittest.main()
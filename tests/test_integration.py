@@ -1,13 +1,21 @@
 """Integration tests for the Weed Detector application."""
 import unittest
+from concurrent.futures import wait
 from unittest.mock import MagicMock, patch
 import os
 import numpy as np
 import cv2
+from app.detections import Detections
 from app.model import WeedDetectorModel
 from app.gui import WeedDetectorGUI
 from app.controller import WeedDetectorController
 
+
+def wait_for_detection(controller):
+    """Blocks until the controller's latest still-image detection has posted its result."""
+    if controller._pending is not None:  # pylint: disable=protected-access
+        wait([controller._pending])  # pylint: disable=protected-access
+
 class TestIntegration(unittest.TestCase):
     """Integration tests for the Weed Detector application."""
     def setUp(self):
@@ -17,12 +25,16 @@ class TestIntegration(unittest.TestCase):
     def test_controller_detect_flow(self):
         """Test: controller detects weeds using model and updates GUI."""
         gui = MagicMock()
+        gui.conf_var.get.return_value = 0.15
+        gui.call_soon.side_effect = lambda callback, *args: callback(*args)
         controller = WeedDetectorController(self.model, gui)
         with patch.object(self.model, "load_image", return_value=self.dummy_image):
-            with patch.object(self.model, "detect_weeds",
-                               return_value=("processed", "result")) as mock_detect:
+            with patch.object(self.model, "detect",
+                              return_value=Detections.empty()) as mock_detect, \
+                 patch.object(self.model, "render_overlay", return_value="processed"):
                 controller.handle_detect("dummy.jpg")
-                mock_detect.assert_called_with(self.dummy_image)
+                wait_for_detection(controller)
+                mock_detect.assert_called_with(self.dummy_image, use_cache=True, conf=0.05)
                 gui.display_image.assert_called_with("processed")
                 gui.update_results.assert_called()
 
@@ -59,11 +71,13 @@ class TestIntegration(unittest.TestCase):
     def test_controller_handles_detect_failure(self):
         """Test: controller shows error if weed detection fails."""
         gui = MagicMock()
+        gui.call_soon.side_effect = lambda callback, *args: callback(*args)
         controller = WeedDetectorController(self.model, gui)
         with patch.object(self.model, "load_image", return_value=self.dummy_image):
-            with patch.object(self.model, "detect_weeds",
+            with patch.object(self.model, "detect",
                                side_effect=ValueError("Detection failed")):
                 controller.handle_detect("dummy.jpg")
+                wait_for_detection(controller)
                 gui.show_error_box.assert_called()
                 self.assertIn("Detection failed", gui.show_error_box.call_args[0][0])
 
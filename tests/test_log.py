@@ -0,0 +1,54 @@
+"""Unit tests for the logging setup."""
+import json
+import logging
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from app.log import JsonLinesFormatter, configure_logging
+
+class TestLogging(unittest.TestCase):
+    """Test cases for configure_logging and the JSON-lines formatter."""
+    def tearDown(self):
+        configure_logging(level="WARNING")
+
+    def test_json_lines_formatter_includes_extra_fields(self):
+        """Test that a record is formatted as JSON with its extra fields."""
+        record = logging.LogRecord("app.model", logging.INFO, __file__, 1,
+                                   "Detected %d object(s)", (3,), None)
+        record.detections = 3
+        data = json.loads(JsonLinesFormatter().format(record))
+        self.assertEqual(data["message"], "Detected 3 object(s)")
+        self.assertEqual(data["level"], "INFO")
+        self.assertEqual(data["logger"], "app.model")
+        self.assertEqual(data["detections"], 3)
+        self.assertNotIn("args", data)
+
+    def test_configure_logging_writes_json_file(self):
+        """Test that the JSON handler writes one line per record of the app loggers."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "log.jsonl")
+            configure_logging(level="INFO", json_path=path)
+            logging.getLogger("app.robot").info("Robot started", extra={"component": "robot"})
+            logging.getLogger("app.robot").debug("not written")
+            configure_logging(level="WARNING")
+            with open(path, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["component"], "robot")
+
+    def test_debug_disabled_by_default(self):
+        """Test that the default level skips debug records."""
+        with patch.dict(os.environ, {}, clear=True):
+            logger = configure_logging()
+        self.assertEqual(logger.level, logging.INFO)
+        self.assertFalse(logging.getLogger("app.model").isEnabledFor(logging.DEBUG))
+
+    def test_level_from_environment(self):
+        """Test that WEED_LOG_LEVEL sets the level."""
+        with patch.dict(os.environ, {"WEED_LOG_LEVEL": "debug"}):
+            logger = configure_logging()
+        self.assertEqual(logger.level, logging.DEBUG)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Unit tests for the LatencyStats class."""
+import csv
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from app.metrics import LatencyStats
+
+class TestLatencyStats(unittest.TestCase):
+    """Test cases for the LatencyStats class."""
+    def setUp(self):
+        self.stats = LatencyStats(window=100)
+
+    def test_percentiles(self):
+        """Test that p50/p95/p99 are computed over the recorded samples."""
+        for ms in range(1, 101):
+            self.stats.record("inference", float(ms))
+        summary = self.stats.summary()["inference"]
+        self.assertEqual(summary["count"], 100)
+        self.assertAlmostEqual(summary["p50"], 50.5)
+        self.assertAlmostEqual(summary["p95"], 95.05)
+        self.assertAlmostEqual(summary["p99"], 99.01)
+
+    def test_window_keeps_only_latest_samples(self):
+        """Test that old samples fall out of the rolling window."""
+        stats = LatencyStats(window=3)
+        for ms in (100.0, 1.0, 2.0, 3.0):
+            stats.record("render", ms)
+        self.assertEqual(stats.summary()["render"]["count"], 3)
+        self.assertAlmostEqual(stats.summary()["render"]["p99"], 2.98)
+
+    def test_time_context_manager_records_duration(self):
+        """Test that the time() block records its duration in milliseconds."""
+        with patch("app.metrics.time.perf_counter", side_effect=[1.0, 1.25]):
+            with self.stats.time("display"):
+                pass
+        self.assertAlmostEqual(self.stats.summary()["display"]["p50"], 250.0)
+
+    def test_fps(self):
+        """Test the FPS estimate from frame completion times."""
+        with patch("app.metrics.time.perf_counter", side_effect=[0.0, 0.1, 0.2, 0.3]):
+            for _ in range(4):
+                self.stats.record_frame()
+        self.assertAlmostEqual(self.stats.fps(), 10.0)
+
+    def test_format_summary_and_reset(self):
+        """Test the GUI text and that reset drops all samples."""
+        self.assertEqual(self.stats.format_summary(), "No timing data yet")
+        self.stats.record("capture", 4.0)
+        self.assertIn("capture: p50 4.0", self.stats.format_summary())
+        self.stats.reset()
+        self.assertEqual(self.stats.summary(), {})
+
+    def test_counters(self):
+        """Test that event counters are summed, shown in the summary and reset."""
+        self.stats.increment("skipped_inference")
+        self.stats.increment("skipped_inference", 2)
+        self.stats.record("inference", 5.0)
+        self.assertEqual(self.stats.counters(), {"skipped_inference": 3})
+        self.assertIn("skipped_inference: 3", self.stats.format_summary())
+        self.stats.reset()
+        self.assertEqual(self.stats.counters(), {})
+
+    def test_to_csv(self):
+        """Test that the statistics are written as one CSV row per stage."""
+        self.stats.record("inference", 10.0)
+        self.stats.record("render", 2.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stats.csv")
+            self.stats.to_csv(path)
+            with open(path, encoding="utf-8", newline="") as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual([row["stage"] for row in rows], ["inference", "render"])
+        self.assertEqual(rows[0]["p50_ms"], "10.000")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,13 @@
 """Unit tests for the WeedDetectorModel class."""
 import os
+import tempfile
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 import numpy as np
 import cv2
-from app.model import WeedDetectorModel
+import torch
+from app.detections import Detections
+from app.model import WeedDetectorModel, exported_model_path
 
 class TestWeedDetectorModel(unittest.TestCase):
     """Test cases for the WeedDetectorModel class."""
@@ -20,6 +23,42 @@ class TestWeedDetectorModel(unittest.TestCase):
         self.assertIsNotNone(image)
         self.assertEqual(image.shape, self.dummy_image.shape)
 
+    def test_load_image_is_cached_until_file_changes(self):
+        """Test that a reopened image is not decoded again unless the file changed."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "image.png")
+            cv2.imwrite(path, self.dummy_image)
+            first = self.model.load_image(path)
+            self.assertIs(self.model.load_image(path), first)
+            self.assertFalse(first.flags.writeable)
+
+            cv2.imwrite(path, np.full_like(self.dummy_image, 255))
+            os.utime(path, ns=(1, 1))
+            self.assertTrue(self.model.load_image(path).all())
+
+    def test_detect_with_cache_reuses_results(self):
+        """Test that cached detection only runs the model again when the settings change."""
+        dummy_model = MagicMock()
+        dummy_model.conf = 0.15
+        dummy_model.iou = 0.45
+        dummy_model.names = {0: "weed"}
+        dummy_model.predict.return_value = []
+        self.model.model = dummy_model
+
+        first = self.model.detect(self.dummy_image, use_cache=True)
+        self.assertIs(self.model.detect(self.dummy_image.copy(), use_cache=True), first)
+        self.assertEqual(dummy_model.predict.call_count, 1)
+
+        dummy_model.conf = 0.5
+        self.model.detect(self.dummy_image, use_cache=True)
+        self.assertEqual(dummy_model.predict.call_count, 2)
+
+        # A per-call threshold is part of the key and does not change the model's own
+        self.model.detect(self.dummy_image, use_cache=True, conf=0.05)
+        self.assertEqual(dummy_model.predict.call_count, 3)
+        self.assertEqual(dummy_model.predict.call_args.kwargs["conf"], 0.05)
+        self.assertEqual(dummy_model.conf, 0.5)
+
     def test_load_image_failure(self):
         """Test if loading a non-existing image raises an error."""
         with self.assertRaises(ValueError):
@@ -61,6 +100,18 @@ class TestWeedDetectorModel(unittest.TestCase):
         self.assertIsNotNone(model.model)
         self.assertTrue(hasattr(model, "model_path"))
 
+    @patch("app.model.os.path.exists", return_value=True)
+    @patch("app.model.YOLO")
+    def test_explicit_model_path_wins_over_trained_model(self, mock_yolo, _):
+        """Test that a given model path is used even if trained weights exist."""
+        model = WeedDetectorModel(model_path="other.pt")
+        mock_yolo.assert_called_once_with("other.pt")
+        self.assertEqual(model.model_path, "other.pt")
+        mock_yolo.reset_mock()
+        model = WeedDetectorModel()
+        mock_yolo.assert_called_once_with("runs/detect_train/weights/best.pt")
+        self.assertEqual(model.model_path, "runs/detect_train/weights/best.pt")
+
     def test_model_init_with_invalid_path(self):
         """Test model initialization with an invalid path falls back to default."""
         try:
@@ -133,5 +184,211 @@ class TestWeedDetectorModel(unittest.TestCase):
 
         self.assertIsInstance(processed, np.ndarray)
 
+    def test_predict_batch_returns_one_result_per_input(self):
+        """Test predict_batch keeps input order and chunks the inputs by batch_size."""
+        images = [self.dummy_image, self.dummy_image.copy(), self.dummy_image.copy()]
+        with patch.object(self.model.model, "predict",
+                                        wraps=self.model.model.predict) as mock_predict:
+            outputs = self.model.predict_batch(images, batch_size=2)
+        self.assertEqual(len(outputs), 3)
+        self.assertEqual(mock_predict.call_count, 2)
+        self.assertEqual(len(mock_predict.call_args_list[0][0][0]), 2)
+        for processed, detections in outputs:
+            self.assertEqual(processed.shape, self.dummy_image.shape)
+            self.assertIsInstance(detections, Detections)
+
+    def test_predict_batch_accepts_paths(self):
+        """Test predict_batch loads images given as file paths."""
+        cv2.imwrite("dummy.jpg", self.dummy_image)
+        outputs = self.model.predict_batch(["dummy.jpg"], batch_size=4)
+        self.assertEqual(len(outputs), 1)
+        self.assertEqual(outputs[0][0].shape, self.dummy_image.shape)
+
+    def test_predict_batch_invalid_batch_size(self):
+        """Test predict_batch rejects a batch size below one."""
+        with self.assertRaises(ValueError):
+            self.model.predict_batch([self.dummy_image], batch_size=0)
+
+    def test_predict_stream_over_image_directory(self):
+        """Test predict_stream yields one indexed result per frame of the source."""
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("a.jpg", "b.jpg", "c.jpg"):
+                cv2.imwrite(os.path.join(tmp, name), self.dummy_image)
+            results = list(self.model.predict_stream(tmp, batch_size=2))
+        self.assertEqual([index for index, _, _ in results], [0, 1, 2])
+        for _, processed, detections in results:
+            self.assertEqual(processed.shape, self.dummy_image.shape)
+            self.assertIsInstance(detections, Detections)
+
+    def test_predict_fills_detected_centers_from_boxes(self):
+        """Test predict turns the YOLO boxes into clipped detected_centers."""
+        class DummyBoxes:
+            """Mock of the YOLO boxes object."""
+            data = torch.tensor([[10.0, 20.0, 30.0, 40.0, 0.8, 0.0],
+                                 [-5.0, 50.0, 150.0, 70.0, 0.4, 1.0]])
+
+            def __len__(self):
+                return 2
+
+        class DummyResult:
+            """Mock class to simulate YOLO detection results."""
+            boxes = DummyBoxes()
+
+        dummy_model = MagicMock()
+        dummy_model.conf = 0.15
+        dummy_model.names = {0: "weed", 1: "ribwort"}
+        dummy_model.predict.return_value = [DummyResult()]
+        self.model.model = dummy_model
+
+        processed = self.model.predict(self.dummy_image)
+
+        self.assertEqual(processed.shape, self.dummy_image.shape)
+        centers = [(x, y, name, round(conf, 2)) for x, y, name, conf in self.model.detected_centers]
+        self.assertEqual(centers, [(20, 30, "weed", 0.8), (49, 60, "ribwort", 0.4)])
+        self.assertIn("2. ribwort at (49,60)", self.model._format_detection_results())
+
+    def test_predict_without_render_returns_input_image(self):
+        """Test predict(render=False) skips drawing and returns the input unchanged."""
+        processed = self.model.predict(self.dummy_image, render=False)
+        self.assertIs(processed, self.dummy_image)
+        self.assertIsInstance(self.model.detected_centers, Detections)
+
+    def test_render_overlay_draws_on_a_copy(self):
+        """Test render_overlay draws the detections without modifying the input."""
+        detections = Detections([[10, 10, 60, 60]], [0], [0.9], {0: "weed"})
+        overlay = self.model.render_overlay(self.dummy_image, detections)
+        self.assertFalse(self.dummy_image.any())
+        self.assertTrue(overlay.any())
+
+    def test_predict_batch_renders_only_when_asked(self):
+        """Test predict_batch returns the input images unless render is True."""
+        plain = self.model.predict_batch([self.dummy_image])[0][0]
+        rendered = self.model.predict_batch([self.dummy_image], render=True)[0][0]
+        self.assertIs(plain, self.dummy_image)
+        self.assertTrue(rendered.any())
+
+    def test_detect_records_stage_timings(self):
+        """Test that detect and render_overlay record their latencies."""
+        detections = self.model.detect(self.dummy_image)
+        self.model.render_overlay(self.dummy_image, detections)
+        summary = self.model.stats.summary()
+        for stage in ("preprocess", "inference", "postprocess", "render"):
+            self.assertEqual(summary[stage]["count"], 1)
+
+    def test_exported_model_path(self):
+        """Test the cache locations of the exported models."""
+        self.assertEqual(exported_model_path("runs/w/best.pt", "onnx"), "runs/w/best.onnx")
+        self.assertEqual(exported_model_path("runs/w/best.pt", "openvino"),
+                         "runs/w/best_openvino_model")
+        with self.assertRaises(ValueError):
+            exported_model_path("best.pt", "pytorch")
+
+    def test_unknown_backend_raises(self):
+        """Test that an unknown backend is rejected."""
+        with self.assertRaises(ValueError):
+            WeedDetectorModel(backend="tensorrt")
+
+    @patch("app.model.YOLO")
+    def test_backend_exports_once_and_reuses_cache(self, mock_yolo):
+        """Test that the weights are only exported when no up-to-date export exists."""
+        with tempfile.TemporaryDirectory() as tmp:
+            weights = os.path.join(tmp, "weights.pt")
+            with open(weights, "wb") as f:
+                f.write(b"weights")
+            export_path = exported_model_path(weights, "onnx")
+            mock_yolo.return_value.export.return_value = export_path
+
+            model = WeedDetectorModel(model_path=weights, backend="onnx")
+            self.assertEqual(model.backend, "onnx")
+            mock_yolo.return_value.export.assert_called_once_with(format="onnx", dynamic=True)
+            mock_yolo.assert_called_with(export_path, task="detect")
+
+            with open(export_path, "wb") as f:
+                f.write(b"exported")
+            mock_yolo.reset_mock()
+            WeedDetectorModel(model_path=weights, backend="onnx")
+            mock_yolo.return_value.export.assert_not_called()
+
+    @patch("app.model.YOLO")
+    def test_backend_falls_back_to_pytorch(self, mock_yolo):
+        """Test that a failing export keeps the PyTorch model."""
+        mock_yolo.return_value.export.side_effect = ImportError("onnx missing")
+        with tempfile.TemporaryDirectory() as tmp:
+            weights = os.path.join(tmp, "weights.pt")
+            with open(weights, "wb") as f:
+                f.write(b"weights")
+            model = WeedDetectorModel(model_path=weights, backend="onnx")
+        self.assertEqual(model.backend, "pytorch")
+        mock_yolo.return_value.fuse.assert_called_once()
+
+    def test_int8_requires_openvino(self):
+        """Test that INT8 is rejected for backends without quantization support."""
+        with self.assertRaises(ValueError):
+            WeedDetectorModel(backend="onnx", int8=True)
+        self.assertEqual(exported_model_path("w/best.pt", "openvino", int8=True),
+                         "w/best_int8_openvino_model")
+
+    @patch("app.model.YOLO")
+    def test_int8_export_is_calibrated_on_dataset(self, mock_yolo):
+        """Test that the INT8 export gets the calibration dataset."""
+        with tempfile.TemporaryDirectory() as tmp:
+            weights = os.path.join(tmp, "weights.pt")
+            with open(weights, "wb") as f:
+                f.write(b"weights")
+            model = WeedDetectorModel(model_path=weights, backend="openvino", int8=True,
+                                      calibration_data="data/data.yaml")
+        mock_yolo.return_value.export.assert_called_once_with(
+            format="openvino", dynamic=True, int8=True, data="data/data.yaml")
+        self.assertEqual(model.precision, "int8")
+
+    def test_detect_tiled_merges_boxes_across_tile_seams(self):
+        """Test that tiles are batched and boxes mapped back and merged along seams."""
+        class DummyBoxes:
+            """Mock of the YOLO boxes object."""
+            def __init__(self, rows):
+                self.data = torch.tensor(rows, dtype=torch.float32).reshape(-1, 6)
+
+            def __len__(self):
+                return len(self.data)
+
+        class DummyResult:
+            """Mock class to simulate YOLO detection results."""
+            def __init__(self, rows):
+                self.boxes = DummyBoxes(rows)
+
+        def predict(tiles, **_):
+            # The plant at x=90..110 lies in the overlap of the first two tiles
+            results = []
+            for tile in tiles:
+                offset = int(tile[0, 0, 0])
+                rows = [[90 - offset, 10, 110 - offset, 30, 0.9, 0]] if offset < 100 else []
+                results.append(DummyResult(rows))
+            return results
+
+        image = np.zeros((100, 200, 3), dtype=np.uint8)
+        image[:, :, 0] = np.arange(200, dtype=np.uint8)
+        dummy_model = MagicMock()
+        dummy_model.conf = 0.15
+        dummy_model.iou = 0.45
+        dummy_model.names = {0: "weed"}
+        dummy_model.predict.side_effect = predict
+        self.model.model = dummy_model
+        self.model.configure_tiling(tile_size=120, overlap=0.5, batch_size=2)
+
+        detections = self.model.detect(image)
+
+        # Tiles start at x = 0, 60 and 80, inferred as batches of 2 and 1
+        self.assertEqual([len(c.args[0]) for c in dummy_model.predict.call_args_list], [2, 1])
+        self.assertEqual(len(detections), 1)
+        self.assertEqual(detections.boxes.tolist(), [[90, 10, 110, 30]])
+        self.assertIs(self.model.detected_centers, detections)
+
+    def test_configure_tiling_validates_arguments(self):
+        """Test that invalid tiling settings are rejected."""
+        with self.assertRaises(ValueError):
+            self.model.configure_tiling(tile_size=640, overlap=1.5)
+        with self.assertRaises(ValueError):
+            self.model.configure_tiling(tile_size=640, merge="mean")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,48 @@
+"""Unit tests for the MotionGate class."""
+import unittest
+import numpy as np
+from app.motion import MotionGate
+
+class TestMotionGate(unittest.TestCase):
+    """Test cases for the MotionGate class."""
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frame = rng.integers(0, 200, (480, 640, 3), dtype=np.uint8)
+        self.gate = MotionGate(threshold=4.0, max_skips=5)
+
+    def test_first_frame_always_passes(self):
+        """Test that the first frame is always inferred."""
+        self.assertTrue(self.gate.changed(self.frame))
+        self.assertEqual(self.gate.skipped, 0)
+
+    def test_unchanged_and_noisy_frames_are_skipped(self):
+        """Test that identical frames and slight sensor noise do not trigger inference."""
+        self.gate.changed(self.frame)
+        noise = np.random.default_rng(1).integers(0, 3, self.frame.shape, dtype=np.uint8)
+        self.assertFalse(self.gate.changed(self.frame.copy()))
+        self.assertFalse(self.gate.changed(self.frame + noise))
+        self.assertEqual(self.gate.skipped, 2)
+
+    def test_changed_scene_passes(self):
+        """Test that a different scene is let through and becomes the reference."""
+        self.gate.changed(self.frame)
+        shifted = np.roll(self.frame, 80, axis=1)
+        self.assertTrue(self.gate.changed(shifted))
+        self.assertFalse(self.gate.changed(shifted))
+
+    def test_max_skips_forces_inference(self):
+        """Test that a frame is let through after max_skips skipped frames."""
+        self.gate.changed(self.frame)
+        results = [self.gate.changed(self.frame) for _ in range(6)]
+        self.assertEqual(results, [False] * 5 + [True])
+
+    def test_grayscale_frames_and_reset(self):
+        """Test that single-channel frames work and reset forgets the reference."""
+        gray = self.frame[:, :, 0]
+        self.assertTrue(self.gate.changed(gray))
+        self.assertFalse(self.gate.changed(gray))
+        self.gate.reset()
+        self.assertTrue(self.gate.changed(gray))
+
+if __name__ == "__main__":
+    unittest.main()
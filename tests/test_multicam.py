@@ -0,0 +1,160 @@
+"""Unit tests for the multi-camera scheduler."""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+import cv2
+from app import multicam
+from app.capture import LatestFrameCapture
+
+class FakeCamera:
+    """Mimics cv2.VideoCapture, delivering num_frames frames filled with value."""
+    def __init__(self, value, num_frames, delay=0.01):
+        self.value = value
+        self.num_frames = num_frames
+        self.delay = delay
+        self.count = 0
+        self.released = False
+
+    def read(self):
+        """Return the next frame, or (False, None) when exhausted."""
+        time.sleep(self.delay)
+        if self.released or self.count >= self.num_frames:
+            return False, None
+        self.count += 1
+        return True, np.full((48, 64, 3), self.value, dtype=np.uint8)
+
+    def isOpened(self):  # pylint: disable=invalid-name
+        """The fake camera is open until released."""
+        return not self.released
+
+    def release(self):
+        """Mark the camera as released."""
+        self.released = True
+
+class StubCapture:
+    """LatestFrameCapture stand-in that always has a new frame."""
+    def __init__(self, value):
+        self.value = value
+        self.frame_time = 0.0
+        self.dropped_frames = 0
+
+    def read(self, timeout=None):  # pylint: disable=unused-argument
+        """Return a fresh frame."""
+        self.frame_time = time.monotonic()
+        return True, self.value
+
+    def isOpened(self):  # pylint: disable=invalid-name
+        """Always open."""
+        return True
+
+    def release(self):
+        """Nothing to release."""
+
+def fake_predict_batch(images, batch_size, render):  # pylint: disable=unused-argument
+    """Returns one detection per image whose confidence is the image's first pixel."""
+    return [(image, [(0, 0, "weed", float(np.asarray(image).flat[0]))]) for image in images]
+
+class TestHelpers(unittest.TestCase):
+    """Test cases for the module functions."""
+    def test_parse_sources(self):
+        """Test that numbers become device indices and everything else stays a string."""
+        self.assertEqual(multicam.parse_sources("0, 2,rtsp://cam/stream,clip.avi"),
+                         [0, 2, "rtsp://cam/stream", "clip.avi"])
+        with self.assertRaises(ValueError):
+            multicam.parse_sources(" , ")
+
+    def test_tile_frames(self):
+        """Test that frames are placed in a grid the size of the first frame."""
+        frames = [np.full((48, 64, 3), v, dtype=np.uint8) for v in (10, 20, 30)] + [None]
+        mosaic = multicam.tile_frames(frames)
+        self.assertEqual(mosaic.shape, (48, 64, 3))
+        self.assertEqual(mosaic[0, 0, 0], 10)
+        self.assertEqual(mosaic[0, 63, 0], 20)
+        self.assertEqual(mosaic[47, 0, 0], 30)
+        self.assertEqual(mosaic[47, 63, 0], 0)
+
+    def test_open_source_video_file(self):
+        """Test that a local video file can be used as a camera."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "clip.avi")
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+            writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+            writer.release()
+            capture = multicam.open_source(path)
+            ret, frame = capture.read(timeout=5)
+            capture.release()
+            self.assertTrue(ret)
+            self.assertEqual(frame.shape, (48, 64, 3))
+            with self.assertRaises(ValueError):
+                multicam.open_source(os.path.join(tmp, "missing.avi"))
+
+class TestMultiCameraScheduler(unittest.TestCase):
+    """Test cases for the MultiCameraScheduler class."""
+    def setUp(self):
+        self.mock_model = MagicMock()
+        self.mock_model.predict_batch.side_effect = fake_predict_batch
+
+    def test_round_robin_does_not_starve_cameras(self):
+        """Test that with fewer batch slots than cameras every camera gets its turn."""
+        captures = [StubCapture(i) for i in range(3)]
+        scheduler = multicam.MultiCameraScheduler(self.mock_model, captures, batch_size=2)
+        picked = [index for _ in range(3) for index, _, _ in scheduler.next_batch()]
+        self.assertEqual(picked, [0, 1, 1, 2, 2, 0])
+
+    def test_cameras_share_batches_and_report_stats(self):
+        """Test that frames of all cameras go through the model together and are counted."""
+        batches = []
+        done = threading.Event()
+
+        def on_results(results):
+            batches.append(results)
+            if len(batches) >= 5:
+                done.set()
+
+        captures = [LatestFrameCapture(FakeCamera(v, 200)) for v in (1, 2)]
+        scheduler = multicam.MultiCameraScheduler(self.mock_model, captures, sources=[0, "b"],
+                                                  on_results=on_results)
+        scheduler.start()
+        self.assertTrue(done.wait(5))
+        scheduler.stop()
+
+        self.assertTrue(all(len(results) <= 2 for results in batches))
+        self.assertTrue(any(len(results) == 2 for results in batches))
+        for results in batches:
+            for index, frame, detections in results:
+                self.assertEqual(detections[0][3], float(frame[0, 0, 0]))
+                self.assertEqual(frame[0, 0, 0], index + 1)
+        self.assertGreater(scheduler.stats[0].frames, 0)
+        self.assertGreaterEqual(scheduler.stats[1].lag_ms, 0)
+        self.assertIn("Camera b:", scheduler.format_stats())
+        self.assertFalse(captures[0].isOpened())
+
+    def test_stops_when_all_sources_end(self):
+        """Test that the scheduler ends by itself once every source is exhausted."""
+        captures = [LatestFrameCapture(FakeCamera(1, 3)), LatestFrameCapture(FakeCamera(2, 1))]
+        scheduler = multicam.MultiCameraScheduler(self.mock_model, captures)
+        scheduler.start()
+        scheduler._thread.join(5)  # pylint: disable=protected-access
+        self.assertFalse(scheduler.running)
+        scheduler.stop()
+
+    def test_camera_stats(self):
+        """Test the frame rate and lag computation."""
+        stats = multicam.CameraStats(0)
+        self.assertEqual((stats.fps, stats.lag_ms), (0.0, 0.0))
+        for i in range(5):
+            stats.record(grabbed_at=i * 0.1, done_at=i * 0.1 + 0.05)
+        self.assertAlmostEqual(stats.fps, 10.0)
+        self.assertAlmostEqual(stats.lag_ms, 50.0)
+
+    def test_open_releases_cameras_on_failure(self):
+        """Test that a source that cannot be opened raises ValueError."""
+        with self.assertRaises(ValueError):
+            multicam.MultiCameraScheduler.open(self.mock_model, ["missing_clip.avi"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Unit tests for the INT8 quantization check."""
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+from app import quantize
+
+def make_model(backend, precision, map50, map50_95):
+    """Returns a mocked WeedDetectorModel with the given validation metrics."""
+    model = MagicMock()
+    model.backend = backend
+    model.precision = precision
+    model.evaluate.return_value.box.map50 = map50
+    model.evaluate.return_value.box.map = map50_95
+    return model
+
+class TestQuantize(unittest.TestCase):
+    """Test cases for the quantize module."""
+    def setUp(self):
+        self.images = [np.zeros((32, 32, 3), dtype=np.uint8)] * 3
+
+    @patch("app.quantize.WeedDetectorModel")
+    def test_evaluate_variant_reports_map_and_latency(self, mock_model_cls):
+        """Test that a variant reports its mAP and latency."""
+        mock_model_cls.return_value = make_model("openvino", "int8", 0.8, 0.5)
+        row = quantize.evaluate_variant("INT8 OpenVINO", "openvino", True, "data.yaml",
+                                        self.images)
+        mock_model_cls.assert_called_with(backend="openvino", int8=True,
+                                          calibration_data="data.yaml")
+        self.assertEqual(row["map50"], 0.8)
+        self.assertEqual(row["map50_95"], 0.5)
+        self.assertGreaterEqual(row["latency_ms"], 0.0)
+
+    @patch("app.quantize.WeedDetectorModel")
+    def test_evaluate_variant_uses_given_weights(self, mock_model_cls):
+        """Test that --weights is passed on as the model path."""
+        mock_model_cls.return_value = make_model("pytorch", "fp32", 0.8, 0.5)
+        quantize.evaluate_variant("FP32 PyTorch", "pytorch", False, "data.yaml", self.images,
+                                  model_path="other.pt")
+        mock_model_cls.assert_called_with(backend="pytorch", int8=False,
+                                          calibration_data="data.yaml", model_path="other.pt")
+
+    @patch("app.quantize.WeedDetectorModel")
+    def test_evaluate_variant_skips_fallback(self, mock_model_cls):
+        """Test that a variant is skipped if the model fell back to PyTorch."""
+        mock_model_cls.return_value = make_model("pytorch", "fp32", 0.8, 0.5)
+        row = quantize.evaluate_variant("INT8 OpenVINO", "openvino", True, "data.yaml",
+                                        self.images)
+        self.assertIsNone(row)
+        mock_model_cls.return_value.evaluate.assert_not_called()
+
+    def test_format_report(self):
+        """Test that the report compares the INT8 model with the FP32 model."""
+        rows = [
+            {"variant": "FP32 PyTorch", "map50": 0.80, "map50_95": 0.55, "latency_ms": 90.0},
+            {"variant": "INT8 OpenVINO", "map50": 0.78, "map50_95": 0.53, "latency_ms": 30.0},
+        ]
+        report = quantize.format_report(rows)
+        self.assertIn("INT8 OpenVINO vs FP32 PyTorch: mAP50-95 -0.020, 3.00x speed", report)
+
+if __name__ == "__main__":
+    unittest.main()
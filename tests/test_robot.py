@@ -1,6 +1,11 @@
 """ Unit tests for the Robot class."""
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
+import numpy as np
+from app.adaptive import ResolutionController
+from app.detections import Detections
 from app.robot import Robot
 
 class TestRobot(unittest.TestCase):
@@ -9,13 +14,17 @@ class TestRobot(unittest.TestCase):
         """Set up the Robot instance with mocked GUI and model."""
         self.mock_gui = MagicMock()
         self.mock_model = MagicMock()
+        self.mock_model.render_overlay.return_value = "processed_image"
+        self.mock_model.format_detections.return_value = "weed detected"
         self.robot = Robot(self.mock_gui, self.mock_model)
 
-    def test_start_sets_running_and_logs_action(self):
+    @patch("app.robot.threading.Thread")
+    def test_start_sets_running_and_logs_action(self, mock_thread):
         """Tests the start method sets running to True and logs the action."""
         self.robot.is_running = False
         self.robot.start_robot()
         self.assertTrue(self.robot.is_running)
+        self.assertEqual(mock_thread.return_value.start.call_count, 2)
         self.mock_gui.log_robot_action.assert_any_call("Robot started")
         self.mock_gui.toggle_camera.assert_called_once()
 
@@ -26,21 +35,159 @@ class TestRobot(unittest.TestCase):
         self.assertFalse(self.robot.is_running)
         self.mock_gui.log_robot_action.assert_any_call("Robot stopped")
 
+    def test_stop_switches_camera_off_on_tk_thread(self):
+        """Tests that stopping posts the camera switch-off instead of touching Tk directly."""
+        self.robot.stop_robot()
+        self.mock_gui.toggle_camera.assert_not_called()
+        callback = self.mock_gui.call_soon.call_args[0][0]
+        self.mock_gui.camera_running = False
+        callback()
+        self.mock_gui.toggle_camera.assert_not_called()
+        self.mock_gui.camera_running = True
+        callback()
+        self.mock_gui.toggle_camera.assert_called_once_with()
+
     @patch("time.sleep", return_value=None)
-    def test_drive_loop_runs_until_weeds(self, _):
-        """Tests the drive_loop method runs until weeds are detected."""
+    def test_drive_loop_hands_weeds_to_arm_and_keeps_driving(self, _):
+        """Tests the drive_loop passes confirmed weeds to the arm and reads the next frame."""
         self.robot.is_running = True
-        self.mock_gui.cap.read.return_value = (True, "frame")
-        self.mock_model.detect_weeds.return_value = ("processed_image", "weed detected")
+        frames = self._frames(4)
+        self.mock_gui.cap.read.side_effect = [(True, f) for f in frames] + [(False, None)]
+        self.mock_model.detect.return_value = self._detections()
 
         self.robot.drive_loop()
         self.mock_gui.log_robot_action.assert_any_call("Robot is driving forward...")
-        self.mock_model.detect_weeds.assert_called_once_with("frame")
-        self.mock_gui.display_image.assert_called_with("processed_image")
+        self.assertIs(self.mock_model.detect.call_args[0][0], frames[-1])
+        # Live robot frames take the fast path shared with the camera loop
+        self.mock_gui.display_frame.assert_called_with("processed_image")
+        self.mock_gui.display_image.assert_not_called()
         self.mock_gui.update_results.assert_called_with("weed detected")
-        self.mock_gui.log_robot_action.assert_any_call("Weed detected, stopping robot.")
+        handed = [c for c in self.mock_gui.log_robot_action.call_args_list
+                  if c.args[0] == "2 weed(s) detected, handing them to the arm..."]
+        # Confirmed after three frames, and handed over once although seen again
+        self.assertEqual(len(handed), 1)
+        self.assertEqual(self.mock_gui.cap.read.call_count, 5)
         self.assertFalse(self.robot.is_running)
 
+    @patch("time.sleep", return_value=None)
+    def test_drive_loop_uses_its_own_detections(self, _):
+        """Tests that the tracker gets the detections of the frame, not the shared model state."""
+        self.robot.is_running = True
+        self.mock_gui.cap.read.side_effect = [(True, f) for f in self._frames(4)] + [(False, None)]
+        self.mock_model.detect.side_effect = [Detections.empty({0: "weed"})] + [
+            self._detections()] * 3
+        writing = threading.Event()
+        writing.set()
+
+        def overwrite_shared_state():
+            # Another user of the shared model, e.g. a still-image detection
+            while writing.is_set():
+                self.mock_model.detected_centers = []
+
+        writer = threading.Thread(target=overwrite_shared_state)
+        writer.start()
+        try:
+            self.robot.drive_loop()
+        finally:
+            writing.clear()
+            writer.join()
+        self.assertEqual(len(self.robot.tracker.tracks), 2)
+        self.assertEqual(self.robot.tracker.tracks[0].hits, 3)
+        first_overlay = self.mock_model.render_overlay.call_args_list[0].args[1]
+        self.assertEqual(len(first_overlay), 0)
+        self.mock_gui.update_results.assert_called_with("weed detected")
+
+    @patch("time.sleep", return_value=None)
+    def test_drive_loop_survives_failed_detection(self, _):
+        """Tests that a model error shows the raw frame and detects again on the next one."""
+        self.robot.is_running = True
+        frames = self._frames(2)
+        self.mock_gui.cap.read.side_effect = [(True, f) for f in frames] + [(False, None)]
+        self.mock_model.detect.side_effect = [RuntimeError("boom"), self._detections()]
+        self.robot.drive_loop()
+        self.assertIs(self.mock_gui.display_frame.call_args_list[0].args[0], frames[0])
+        self.assertEqual(self.mock_model.detect.call_count, 2)
+        self.assertEqual(len(self.robot.tracker.tracks), 2)
+
+    @patch("time.sleep", return_value=None)
+    def test_drive_loop_detects_every_nth_frame(self, _):
+        """Tests that frames between detections only advance the tracker."""
+        robot = Robot(self.mock_gui, self.mock_model, detect_every=3)
+        robot.is_running = True
+        self.mock_gui.cap.read.side_effect = [(True, f) for f in self._frames(7)] + [(False, None)]
+        self.mock_model.detect.return_value = self._detections()
+        robot.drive_loop()
+        self.assertEqual(self.mock_model.detect.call_count, 3)
+        self.assertEqual(len(robot.tracker.tracks), 2)
+
+    @patch("time.sleep", return_value=None)
+    def test_drive_loop_uses_adaptive_input_size(self, _):
+        """Tests that frames are detected at the input size of the frame budget."""
+        resolution = ResolutionController(target_ms=100, window=1)
+        robot = Robot(self.mock_gui, self.mock_model, resolution=resolution)
+        robot.is_running = True
+        self.mock_gui.cap.read.side_effect = [(True, f) for f in self._frames(1)] + [(False, None)]
+        self.mock_model.detect.return_value = self._detections()
+        robot.drive_loop()
+        self.assertEqual(self.mock_model.detect.call_args[1], {"imgsz": 640})
+
+    @patch("time.sleep", return_value=None)
+    def test_drive_loop_skips_inference_on_unchanged_frames(self, _):
+        """Tests that a still scene reuses the last detections instead of running the model."""
+        frame = self._frames(1)[0]
+        self.robot.is_running = True
+        self.mock_gui.cap.read.side_effect = [(True, frame.copy()) for _ in range(4)] + [
+            (False, None)]
+        self.mock_model.detect.return_value = self._detections()
+        self.robot.drive_loop()
+        self.mock_model.detect.assert_called_once()
+        self.mock_model.stats.increment.assert_called_with("skipped_inference")
+        self.assertEqual(self.mock_model.stats.increment.call_count, 3)
+        self.assertEqual(self.robot.tracker.tracks[0].hits, 4)
+
+    @patch("app.robot.time.sleep", return_value=None)
+    def test_arm_loop_eliminates_newest_targets(self, _):
+        """Tests the arm thread works on the newest targets and stops on the sentinel."""
+        self.robot.is_running = True
+        self.robot.tracker.mark_treated(3)
+        self.robot._hand_over([(1, 1, 1)])
+        self.robot._hand_over([(2, 5, 5), (3, 6, 6), (4, 7, 7)])
+        arm = threading.Thread(target=self.robot.arm_loop)
+        arm.start()
+        deadline = time.monotonic() + 5
+        while self.robot.eliminated < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.robot.is_running = False
+        self.robot._hand_over(None)
+        arm.join(5)
+        self.assertFalse(arm.is_alive())
+        self.mock_gui.log_robot_action.assert_any_call("Roboter arm is moving to (5, 5)")
+        moves = [c.args[0] for c in self.mock_gui.log_robot_action.call_args_list
+                 if c.args[0].startswith("Roboter arm is moving")]
+        self.assertEqual(moves, ["Roboter arm is moving to (5, 5)",
+                                 "Roboter arm is moving to (7, 7)"])
+        self.assertTrue(self.robot.tracker.is_treated(2))
+        self.assertTrue(self.robot.tracker.is_treated(4))
+
+    def test_concurrent_hand_overs_keep_only_the_newest(self):
+        """Tests that hand-overs from several threads never overflow the target queue."""
+        errors = []
+
+        def hand_over(value):
+            try:
+                for _ in range(2000):
+                    self.robot._hand_over(value)
+            except Exception as e:  # pylint: disable=broad-except
+                errors.append(e)
+
+        threads = [threading.Thread(target=hand_over, args=([(i, i, i)],)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.robot._targets.qsize(), 1)
+
     @patch("time.sleep", return_value=None)
     def test_drive_loop_stops_on_camera_error(self, _):
         """Tests the drive_loop method stops if camera read fails."""
@@ -59,5 +206,31 @@ class TestRobot(unittest.TestCase):
         self.mock_gui.log_robot_action.assert_any_call("Eliminating weed...")
         self.mock_gui.log_robot_action.assert_any_call("Weed eliminated.")
 
+    @patch("time.sleep", return_value=None)
+    def test_eliminate_all_visits_weeds_along_planned_route(self, mock_sleep):
+        """Tests eliminate_all visits the nearest weeds first and sleeps by distance."""
+        self.robot.is_running = True
+        self.robot.eliminate_all([(300, 0), (100, 0), (200, 0)])
+        moves = [c.args[0] for c in self.mock_gui.log_robot_action.call_args_list
+                 if c.args[0].startswith("Roboter arm is moving")]
+        self.assertEqual(moves, ["Roboter arm is moving to (100, 0)",
+                                 "Roboter arm is moving to (200, 0)",
+                                 "Roboter arm is moving to (300, 0)"])
+        self.assertEqual(self.robot.arm_position, (300, 0))
+        first_move = mock_sleep.call_args_list[0].args[0]
+        self.assertAlmostEqual(first_move, self.robot.motion.move_time(100))
+
+    @staticmethod
+    def _frames(count):
+        """Distinct random camera frames."""
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (48, 64, 3), dtype=np.uint8) for _ in range(count)]
+
+    @staticmethod
+    def _detections():
+        """Two confident weed detections."""
+        return Detections([[0, 10, 20, 30], [20, 30, 40, 50]], [0, 0], [0.9, 0.8],
+                          {0: "weed"})
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,68 @@
+"""Unit tests for the route planning module."""
+import itertools
+import unittest
+import numpy as np
+from app.route import (ArmMotion, distance_matrix, nearest_neighbour, plan_route,
+                       route_length, two_opt)
+
+class TestRoutePlanning(unittest.TestCase):
+    """Test cases for plan_route and its helpers."""
+    def test_distance_matrix(self):
+        """Test that the matrix holds the pairwise Euclidean distances."""
+        distances = distance_matrix([(0, 0), (3, 4), (6, 8)])
+        np.testing.assert_allclose(distances, [[0, 5, 10], [5, 0, 5], [10, 5, 0]])
+
+    def test_small_inputs(self):
+        """Test that zero or one target needs no planning."""
+        self.assertEqual(plan_route([]), [])
+        self.assertEqual(plan_route([(5, 5)]), [0])
+
+    def test_route_is_a_permutation_close_to_brute_force(self):
+        """Test that the planned route on small inputs is close to the optimum."""
+        rng = np.random.default_rng(0)
+        ratios = []
+        for _ in range(20):
+            targets = rng.uniform(0, 640, size=(6, 2))
+            order = plan_route(targets)
+            self.assertEqual(sorted(order), list(range(6)))
+            best = min(route_length(targets, perm) for perm in itertools.permutations(range(6)))
+            ratios.append(route_length(targets, order) / best)
+        self.assertLessEqual(max(ratios), 1.15)
+        self.assertLessEqual(np.mean(ratios), 1.02)
+
+    def test_two_opt_removes_crossing(self):
+        """Test that 2-opt untangles a route that crosses itself."""
+        points = [(0, 0), (0, 10), (10, 0), (10, 10)]
+        distances = distance_matrix(points)
+        route = two_opt([0, 2, 1, 3], distances)
+        self.assertEqual(list(route), [0, 2, 3, 1])
+
+    def test_nearest_neighbour_starts_at_first_index(self):
+        """Test that the greedy route starts at index 0 and visits every point once."""
+        route = nearest_neighbour(distance_matrix([(0, 0), (9, 0), (1, 0), (5, 0)]))
+        self.assertEqual(list(route), [0, 2, 3, 1])
+
+    def test_planned_route_beats_detection_order(self):
+        """Test that planning shortens the route compared to the given order."""
+        rng = np.random.default_rng(1)
+        targets = rng.uniform(0, 640, size=(40, 2))
+        order = plan_route(targets)
+        self.assertLess(route_length(targets, order), route_length(targets, range(40)) / 2)
+
+class TestArmMotion(unittest.TestCase):
+    """Test cases for the ArmMotion travel-time model."""
+    def test_move_time_profiles(self):
+        """Test short (triangular) and long (trapezoidal) moves."""
+        motion = ArmMotion(max_speed=100.0, acceleration=100.0)
+        self.assertEqual(motion.move_time(0), 0.0)
+        self.assertAlmostEqual(motion.move_time(25.0), 1.0)
+        self.assertAlmostEqual(motion.move_time(300.0), 4.0)
+        self.assertLess(motion.move_time(50.0), motion.move_time(100.0))
+
+    def test_invalid_parameters(self):
+        """Test that non-positive limits are rejected."""
+        with self.assertRaises(ValueError):
+            ArmMotion(max_speed=0)
+
+if __name__ == "__main__":
+    unittest.main()
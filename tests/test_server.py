@@ -0,0 +1,151 @@
+"""Unit tests for the HTTP detection server."""
+import http.client
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock
+import cv2
+import numpy as np
+from app import server
+from app.detections import Detections
+
+class TestMicroBatcher(unittest.TestCase):
+    """Test cases for the MicroBatcher class."""
+    def setUp(self):
+        self.mock_model = MagicMock()
+        self.batch_sizes = []
+
+        def predict_batch(images, batch_size, render):
+            self.batch_sizes.append(batch_size)
+            return [(image, [(1, 2, "weed", float(image[0, 0, 0]))]) for image in images]
+        self.mock_model.predict_batch.side_effect = predict_batch
+
+    def _images(self, count):
+        """Returns count small images whose first pixel holds their index."""
+        return [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(count)]
+
+    def test_batches_are_bounded_by_max_batch_size(self):
+        """Test that queued images are split into full batches plus the rest."""
+        batcher = server.MicroBatcher(self.mock_model, max_batch_size=4, max_wait_ms=50)
+        futures = [batcher.submit(image) for image in self._images(6)]
+        batcher.start()
+        results = [future.result(timeout=5) for future in futures]
+        batcher.stop()
+        self.assertEqual(self.batch_sizes, [4, 2])
+        self.assertEqual([r[0][3] for r in results], list(range(6)))
+        self.assertEqual((batcher.batches, batcher.requests), (2, 6))
+
+    def test_single_image_waits_at_most_max_wait(self):
+        """Test that a lone image is run once the wait time is over."""
+        batcher = server.MicroBatcher(self.mock_model, max_batch_size=8, max_wait_ms=20)
+        batcher.start()
+        result = batcher.submit(self._images(1)[0]).result(timeout=5)
+        batcher.stop()
+        self.assertEqual(result, [(1, 2, "weed", 0.0)])
+        self.assertEqual(self.batch_sizes, [1])
+
+    def test_failed_batch_fails_its_requests_only(self):
+        """Test that a model error is passed to the waiting requests and the worker goes on."""
+        batcher = server.MicroBatcher(self.mock_model, max_batch_size=1, max_wait_ms=0)
+        self.mock_model.predict_batch.side_effect = [RuntimeError("boom"),
+                                                     [(None, [])]]
+        batcher.start()
+        with self.assertRaises(RuntimeError):
+            batcher.submit(self._images(1)[0]).result(timeout=5)
+        self.assertEqual(batcher.submit(self._images(1)[0]).result(timeout=5), [])
+        batcher.stop()
+
+    def test_invalid_arguments(self):
+        """Test that invalid batch settings raise ValueError."""
+        with self.assertRaises(ValueError):
+            server.MicroBatcher(self.mock_model, max_batch_size=0)
+        with self.assertRaises(ValueError):
+            server.MicroBatcher(self.mock_model, max_wait_ms=-1)
+
+class TestDetectionServer(unittest.TestCase):
+    """Test cases for the HTTP endpoints."""
+    def setUp(self):
+        self.mock_model = MagicMock()
+        self.mock_model.predict_batch.side_effect = lambda images, batch_size, render: [
+            (image, Detections([[0, 0, 20, 10]], [0], [0.9], {0: "weed"})) for image in images
+        ]
+        self.server = server.create_server(self.mock_model, port=0, max_wait_ms=5)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        _, jpeg = cv2.imencode(".jpg", np.zeros((30, 40, 3), dtype=np.uint8))
+        self.jpeg = jpeg.tobytes()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server.batcher.stop()
+
+    def _post(self, body, content_type):
+        """Posts body to /detect and returns the status and the decoded JSON."""
+        request = urllib.request.Request(f"{self.url}/detect", data=body,
+                                         headers={"Content-Type": content_type})
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_detect_raw_jpeg(self):
+        """Test detection on a raw JPEG body."""
+        status, payload = self._post(self.jpeg, "image/jpeg")
+        self.assertEqual(status, 200)
+        self.assertEqual(payload, {"width": 40, "height": 30, "detections": [
+            {"class": "weed", "x": 10, "y": 5, "confidence": 0.9}]})
+
+    def test_detect_multipart_upload(self):
+        """Test detection on a multipart/form-data file upload."""
+        body = (b"--xyz\r\nContent-Disposition: form-data; name=\"image\"; "
+                b"filename=\"a.jpg\"\r\nContent-Type: image/jpeg\r\n\r\n"
+                + self.jpeg + b"\r\n--xyz--\r\n")
+        status, payload = self._post(body, "multipart/form-data; boundary=xyz")
+        self.assertEqual(status, 200)
+        self.assertEqual(len(payload["detections"]), 1)
+
+    def test_invalid_image_is_rejected(self):
+        """Test that a body that is no image gives a 400 error."""
+        status, payload = self._post(b"not an image", "image/jpeg")
+        self.assertEqual(status, 400)
+        self.assertIn("error", payload)
+        self.mock_model.predict_batch.assert_not_called()
+
+    def _post_raw(self, headers):
+        """Posts the JPEG with exactly the given headers; returns the status and JSON."""
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1],
+                                                timeout=5)
+        try:
+            connection.putrequest("POST", "/detect")
+            for name, value in headers.items():
+                connection.putheader(name, value)
+            connection.endheaders(self.jpeg)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            connection.close()
+
+    def test_bad_content_length_is_rejected(self):
+        """Test that a missing, malformed or negative Content-Length gets an error response."""
+        self.assertEqual(self._post_raw({"Content-Type": "image/jpeg"})[0], 411)
+        for length in ("abc", "-1"):
+            status, payload = self._post_raw({"Content-Type": "image/jpeg",
+                                              "Content-Length": length})
+            self.assertEqual(status, 400, length)
+            self.assertIn("Content-Length", payload["error"])
+        self.mock_model.predict_batch.assert_not_called()
+
+    def test_health(self):
+        """Test that the health check reports the counters."""
+        self._post(self.jpeg, "image/jpeg")
+        with urllib.request.urlopen(f"{self.url}/health", timeout=5) as response:
+            payload = json.loads(response.read())
+        self.assertEqual(payload, {"status": "ok", "requests": 1, "batches": 1})
+
+if __name__ == "__main__":
+    unittest.main()
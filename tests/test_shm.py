@@ -0,0 +1,127 @@
+"""Unit tests for the shared-memory inference transport."""
+import types
+import unittest
+import numpy as np
+from app.detections import Detections
+from app.shm import FrameRing, InferenceProcess
+
+class FakeModel:
+    """Stands in for WeedDetectorModel in the child process.
+
+    Detects one box whose confidence is the first pixel of the frame / 100.
+    """
+    def __init__(self, fail=False):
+        if fail:
+            raise RuntimeError("no weights")
+        self.model = types.SimpleNamespace(conf=0.15)
+
+    def detect(self, image, imgsz=None):
+        """Returns a single detection derived from the frame and the settings."""
+        if image[0, 0, 0] == 255:
+            raise ValueError("bad frame")
+        size = imgsz or 640
+        return Detections([[0, 0, image.shape[1], image.shape[0]]], [0],
+                          [image[0, 0, 0] / 100.0], {0: f"weed@{size}/{self.model.conf}"})
+
+class TestFrameRing(unittest.TestCase):
+    """Test cases for the FrameRing class."""
+    def test_write_and_attach(self):
+        """Test that a second handle sees the frames written through the first one."""
+        ring = FrameRing(2, slot_bytes=48 * 64 * 3)
+        other = FrameRing(2, slot_bytes=48 * 64 * 3, name=ring.name)
+        frame = np.random.default_rng(0).integers(0, 255, (48, 64, 3), dtype=np.uint8)
+        ring.write(1, frame)
+        view = other.view(1, frame.shape)
+        self.assertTrue(np.array_equal(view, frame))
+        del view
+        other.close()
+        ring.close()
+
+    def test_frame_too_large(self):
+        """Test that frames larger than a slot are rejected."""
+        ring = FrameRing(1, slot_bytes=100)
+        with self.assertRaises(ValueError):
+            ring.write(0, np.zeros((10, 10, 3), dtype=np.uint8))
+        ring.close()
+
+class TestInferenceProcess(unittest.TestCase):
+    """Test cases for the InferenceProcess class."""
+    @classmethod
+    def setUpClass(cls):
+        cls.process = InferenceProcess(slots=2, slot_bytes=48 * 64 * 3, model_factory=FakeModel)
+        cls.process.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.process.stop()
+
+    def _frame(self, value):
+        """Returns a small frame filled with value."""
+        return np.full((48, 64, 3), value, dtype=np.uint8)
+
+    def test_results_come_back_in_order(self):
+        """Test that frames and their detections are returned in submission order."""
+        self.assertIsNotNone(self.process.submit(self._frame(10), 0.3))
+        self.assertIsNotNone(self.process.submit(self._frame(20), 0.4, imgsz=320))
+        self.assertEqual(self.process.pending, 2)
+        frame, detections, inference_ms = self.process.result()
+        self.assertEqual(frame[0, 0, 0], 10)
+        self.assertAlmostEqual(detections.confidences[0], 0.1)
+        self.assertEqual(detections.class_names, ["weed@640/0.3"])
+        self.assertGreaterEqual(inference_ms, 0.0)
+        frame, detections, _ = self.process.result()
+        self.assertEqual(frame[0, 0, 0], 20)
+        self.assertEqual(detections.class_names, ["weed@320/0.4"])
+        self.assertIsNone(self.process.result(timeout=0))
+
+    def test_frames_are_dropped_when_all_slots_are_busy(self):
+        """Test that a full ring drops new frames instead of blocking."""
+        dropped = self.process.dropped_frames
+        for value in (1, 2):
+            self.process.submit(self._frame(value), 0.3)
+        self.assertIsNone(self.process.submit(self._frame(3), 0.3))
+        self.assertEqual(self.process.dropped_frames, dropped + 1)
+        self.process.result()
+        self.process.result()
+
+    def test_larger_frame_grows_the_ring(self):
+        """Test that a frame larger than a slot is detected after the ring has grown."""
+        process = InferenceProcess(slots=2, slot_bytes=48 * 64 * 3, model_factory=FakeModel)
+        process.start()
+        try:
+            self.assertIsNotNone(process.submit(self._frame(1), 0.3))
+            large = np.full((96, 128, 3), 7, dtype=np.uint8)
+            # Dropped while the small frame may still be read from the old ring
+            self.assertIsNone(process.submit(large, 0.3))
+            self.assertEqual(process.dropped_frames, 1)
+            process.result()
+            self.assertIsNotNone(process.submit(large, 0.3))
+            self.assertEqual(process.slot_bytes, large.nbytes)
+            frame, detections, _ = process.result()
+            self.assertTrue(np.array_equal(frame, large))
+            self.assertEqual(detections.boxes.tolist(), [[0, 0, 128, 96]])
+            # Smaller frames keep using the larger slots
+            process.submit(self._frame(3), 0.3)
+            self.assertEqual(process.result()[0][0, 0, 0], 3)
+        finally:
+            process.stop()
+
+    def test_failed_frame_raises_and_frees_its_slot(self):
+        """Test that a detection error is raised for that frame only."""
+        self.process.submit(self._frame(255), 0.3)
+        with self.assertRaises(RuntimeError):
+            self.process.result()
+        self.assertEqual(self.process.pending, 0)
+        self.process.submit(self._frame(5), 0.3)
+        self.assertEqual(self.process.result()[0][0, 0, 0], 5)
+
+    def test_model_load_failure(self):
+        """Test that start raises if the child cannot load its model."""
+        process = InferenceProcess(slots=1, slot_bytes=16, model_factory=FakeModel,
+                                   model_args={"fail": True})
+        with self.assertRaises(RuntimeError):
+            process.start()
+        self.assertIsNone(process.ring)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Unit tests for the tiling helpers."""
+import unittest
+import numpy as np
+from app.tiling import (box_ios, box_iou, merge_boxes, nms, seam_truncated, tile_origins,
+                        tile_starts, weighted_box_fusion)
+
+class TestTiles(unittest.TestCase):
+    """Test cases for the tile layout."""
+    def test_tile_starts_cover_the_axis(self):
+        """Test that tiles overlap and the last tile ends at the border."""
+        self.assertEqual(tile_starts(1000, 400, 0.25), [0, 300, 600])
+        self.assertEqual(tile_starts(300, 400, 0.25), [0])
+        self.assertEqual(tile_starts(400, 400, 0.5), [0])
+
+    def test_tile_origins_grid(self):
+        """Test that origins form a grid over both axes."""
+        origins = tile_origins(1000, 500, 400, 0.25)
+        self.assertEqual(origins.shape, (6, 2))
+        self.assertEqual(origins[-1].tolist(), [600, 100])
+
+    def test_invalid_overlap(self):
+        """Test that an overlap of a whole tile is rejected."""
+        with self.assertRaises(ValueError):
+            tile_starts(1000, 400, 1.0)
+
+class TestMerging(unittest.TestCase):
+    """Test cases for NMS and weighted box fusion."""
+    def setUp(self):
+        self.boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60],
+                               [0, 0, 10, 10]], dtype=np.float32)
+        self.scores = np.array([0.9, 0.6, 0.8, 0.7], dtype=np.float32)
+        self.class_ids = np.array([0, 0, 0, 1])
+
+    def test_box_iou(self):
+        """Test IoU against several boxes at once."""
+        ious = box_iou(self.boxes[0], self.boxes)
+        np.testing.assert_allclose(ious, [1.0, 81 / 119, 0.0, 1.0], rtol=1e-6)
+
+    def test_nms_is_class_aware(self):
+        """Test that NMS only suppresses overlapping boxes of the same class."""
+        keep = nms(self.boxes, self.scores, self.class_ids, iou_threshold=0.5)
+        self.assertEqual(sorted(keep.tolist()), [0, 2, 3])
+
+    def test_weighted_box_fusion_averages_clusters(self):
+        """Test that WBF averages overlapping boxes weighted by their scores."""
+        boxes, scores, class_ids = weighted_box_fusion(self.boxes, self.scores,
+                                                       self.class_ids, iou_threshold=0.5)
+        self.assertEqual(len(boxes), 3)
+        np.testing.assert_allclose(boxes[0], [0.4, 0.4, 10.4, 10.4], rtol=1e-5)
+        self.assertAlmostEqual(float(scores[0]), 0.9, places=5)
+        self.assertEqual(class_ids.tolist(), [0, 0, 1])
+
+    def test_box_ios(self):
+        """Test that a box inside a larger one has an IoS of 1 but a low IoU."""
+        truncated = np.array([600, 100, 640, 200], dtype=np.float32)
+        full = np.array([[600, 100, 700, 200]], dtype=np.float32)
+        np.testing.assert_allclose(box_iou(truncated, full), [0.4])
+        np.testing.assert_allclose(box_ios(truncated, full), [1.0])
+
+    def test_merge_boxes_joins_seam_truncated_box(self):
+        """Test that a plant cut by a tile edge is counted once, with its full box."""
+        boxes = np.array([[600, 100, 640, 200], [600, 100, 700, 200], [720, 100, 760, 200]],
+                         dtype=np.float32)
+        scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+        class_ids = np.array([0, 0, 0])
+        # The first box ends at the right edge of the left tile, the others lie in the right one
+        origins = np.array([[0, 0], [512, 0], [512, 0]])
+        for method in ("nms", "wbf"):
+            merged, merged_scores, _ = merge_boxes(boxes, scores, class_ids, method, 0.45,
+                                                   origins, 640, (1152, 640))
+            self.assertEqual(len(merged), 2, method)
+            self.assertAlmostEqual(float(merged_scores[0]), 0.9, places=5)
+            self.assertEqual(merged[0].tolist(), [600, 100, 700, 200], method)
+
+    def test_merge_boxes_keeps_nested_plants(self):
+        """Test that boxes inside other boxes are only joined when cut by a tile edge."""
+        boxes = np.array([[0, 0, 200, 200], [60, 60, 120, 120], [150, 20, 260, 90]],
+                         dtype=np.float32)
+        scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+        class_ids = np.array([0, 0, 0])
+        merged, _, _ = merge_boxes(boxes, scores, class_ids, "nms", 0.45)
+        self.assertEqual(len(merged), 3)
+        merged, _, _ = merge_boxes(boxes, scores, class_ids, "nms", 0.45,
+                                   np.array([[0, 0], [0, 0], [0, 0]]), 640, (1152, 640))
+        self.assertEqual(len(merged), 3)
+        # A small plant in the overlap, seen whole by the left tile inside a right-tile box
+        boxes = boxes + np.array([520, 0, 520, 0], dtype=np.float32)
+        boxes[1] = [580, 60, 630, 120]
+        merged, _, _ = merge_boxes(boxes, scores, class_ids, "nms", 0.45,
+                                   np.array([[512, 0], [0, 0], [512, 0]]), 640, (1152, 640))
+        self.assertEqual(len(merged), 3)
+
+    def test_seam_truncated(self):
+        """Test that only boxes at tile edges inside the image count as truncated."""
+        boxes = np.array([[600, 100, 640, 200], [0, 0, 40, 40], [700, 600, 760, 640],
+                          [513, 10, 560, 50]], dtype=np.float32)
+        origins = np.array([[0, 0], [0, 0], [512, 0], [512, 0]])
+        self.assertEqual(seam_truncated(boxes, origins, 640, 1152, 640).tolist(),
+                         [True, False, False, True])
+
+    def test_merge_boxes_unknown_method(self):
+        """Test that an unknown merge method raises a ValueError."""
+        with self.assertRaises(ValueError):
+            merge_boxes(self.boxes, self.scores, self.class_ids, method="mean")
+
+    def test_merge_empty(self):
+        """Test that merging no boxes returns no boxes."""
+        boxes, _, _ = merge_boxes(np.empty((0, 4)), np.empty(0), np.empty(0, dtype=int))
+        self.assertEqual(len(boxes), 0)
+
+if __name__ == "__main__":
+    unittest.main()
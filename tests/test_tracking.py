@@ -0,0 +1,88 @@
+"""Unit tests for the WeedTracker class and its helpers."""
+import unittest
+import numpy as np
+from app.detections import Detections
+from app.tracking import WeedTracker, greedy_match, iou_matrix
+
+NAMES = {0: "weed"}
+
+
+def detections(boxes, confidences):
+    """Builds Detections of class 0 from xyxy boxes."""
+    return Detections(boxes, [0] * len(confidences), confidences, NAMES)
+
+
+class TestTrackingHelpers(unittest.TestCase):
+    """Test cases for iou_matrix and greedy_match."""
+    def test_iou_matrix(self):
+        """Test the pairwise IoU of two box sets."""
+        iou = iou_matrix([[0, 0, 10, 10], [20, 20, 30, 30]], [[0, 0, 10, 10], [5, 0, 15, 10]])
+        np.testing.assert_allclose(iou, [[1.0, 1 / 3], [0.0, 0.0]])
+        self.assertEqual(iou_matrix([], [[0, 0, 1, 1]]).shape, (0, 1))
+
+    def test_greedy_match_prefers_highest_iou(self):
+        """Test that each row and column is matched at most once, best IoU first."""
+        iou = np.array([[0.9, 0.8], [0.85, 0.1]])
+        self.assertEqual(greedy_match(iou, 0.3), [(0, 0)])
+        self.assertEqual(greedy_match(np.array([[0.2]]), 0.3), [])
+
+
+class TestWeedTracker(unittest.TestCase):
+    """Test cases for the WeedTracker class."""
+    def setUp(self):
+        self.tracker = WeedTracker(min_hits=3)
+
+    def test_moving_weed_keeps_its_id(self):
+        """Test that a weed moving through the image stays one track."""
+        for step in range(10):
+            x = 10 + 8 * step
+            tracks = self.tracker.update(detections([[x, 50, x + 30, 80]], [0.9]))
+        self.assertEqual([t.track_id for t in tracks], [1])
+        self.assertEqual(len(self.tracker.tracks), 1)
+        self.assertAlmostEqual(self.tracker.tracks[0].mean[4], 8.0, delta=1.0)
+
+    def test_targets_need_confirmation_and_are_treated_once(self):
+        """Test that only confirmed, untreated tracks become targets."""
+        frame = detections([[0, 0, 20, 20], [100, 100, 120, 120]], [0.9, 0.8])
+        self.tracker.update(frame)
+        self.tracker.update(frame)
+        self.assertEqual(self.tracker.untreated_targets(), [])
+        self.tracker.update(frame)
+        self.assertEqual(self.tracker.untreated_targets(), [(1, 10, 10), (2, 110, 110)])
+        self.tracker.mark_treated(1)
+        self.tracker.update(frame)
+        self.assertEqual(self.tracker.untreated_targets(), [(2, 110, 110)])
+        self.assertTrue(self.tracker.is_treated(1))
+
+    def test_weak_detections_only_extend_tracks(self):
+        """Test that low-confidence detections keep tracks alive but start none."""
+        self.tracker.update(detections([[0, 0, 20, 20]], [0.9]))
+        matched = self.tracker.update(detections([[1, 0, 21, 20], [200, 200, 220, 220]],
+                                                 [0.2, 0.2]))
+        self.assertEqual([t.track_id for t in matched], [1])
+        self.assertEqual(len(self.tracker.tracks), 1)
+        self.assertEqual(self.tracker.tracks[0].hits, 2)
+
+    def test_predict_fills_skipped_frames_and_drops_lost_tracks(self):
+        """Test motion compensation without detections and removal after max_misses."""
+        tracker = WeedTracker(max_misses=5)
+        for step in range(5):
+            x = 10 * step
+            tracker.update(detections([[x, 0, x + 20, 20]], [0.9]))
+        before = tracker.tracks[0].center[0]
+        tracks = tracker.predict()
+        self.assertGreater(tracks[0].center[0], before + 5)
+        for _ in range(5):
+            tracker.predict()
+        self.assertEqual(tracker.tracks, [])
+
+    def test_reset(self):
+        """Test that reset forgets tracks and treated IDs."""
+        self.tracker.update(detections([[0, 0, 20, 20]], [0.9]))
+        self.tracker.mark_treated(1)
+        self.tracker.reset()
+        self.assertEqual(self.tracker.tracks, [])
+        self.assertFalse(self.tracker.is_treated(1))
+
+if __name__ == "__main__":
+    unittest.main()
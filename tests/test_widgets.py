@@ -0,0 +1,66 @@
+"""Unit tests for the RingLog widget."""
+import unittest
+import tkinter as tk
+from app.widgets import RingLog
+
+class TestRingLog(unittest.TestCase):
+    """Test cases for the RingLog widget."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create a hidden Tk root for the widgets."""
+        cls.root = tk.Tk()
+        cls.root.withdraw()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Destroy the Tk root after the tests."""
+        cls.root.destroy()
+
+    def setUp(self):
+        self.log = RingLog(self.root, max_lines=3)
+
+    def tearDown(self):
+        self.log.destroy()
+
+    def lines(self):
+        """Returns the lines currently shown in the log."""
+        return self.log.get("1.0", "end-1c").splitlines()
+
+    def test_keeps_only_the_newest_lines(self):
+        """Test that the oldest lines are dropped beyond max_lines."""
+        for i in range(10):
+            self.log.append(f"line {i}")
+        self.assertEqual(self.lines(), ["line 7", "line 8", "line 9"])
+        self.assertEqual(self.log.line_count(), 3)
+
+    def test_append_several_lines_at_once(self):
+        """Test that a batch of lines is appended and trimmed in one call."""
+        self.log.append("a", "b", "c", "d")
+        self.assertEqual(self.lines(), ["b", "c", "d"])
+
+    def test_set_status_replaces_previous_status(self):
+        """Test that status lines replace each other until a normal line is appended."""
+        self.log.append("Camera started")
+        self.log.set_status("Live: 1 object(s) detected")
+        self.log.set_status("Live: 2 object(s) detected")
+        self.assertEqual(self.lines(), ["Camera started", "Live: 2 object(s) detected"])
+        self.log.append("Camera stopped")
+        self.log.set_status("Live: 3 object(s) detected")
+        self.assertEqual(self.lines(), ["Live: 2 object(s) detected", "Camera stopped",
+                                        "Live: 3 object(s) detected"])
+
+    def test_clear_and_read_only(self):
+        """Test that clear empties the log and the widget stays read-only."""
+        self.log.append("text")
+        self.assertEqual(str(self.log.cget("state")), tk.DISABLED)
+        self.log.clear()
+        self.assertEqual(self.log.line_count(), 0)
+
+    def test_invalid_max_lines(self):
+        """Test that a non-positive line limit is rejected."""
+        with self.assertRaises(ValueError):
+            RingLog(self.root, max_lines=0)
+
+if __name__ == "__main__":
+    unittest.main()